@@ -0,0 +1,41 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import language
+from workloads import WORKLOADS
+
+def timeRun(code: str, backend: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, err = language.run(code, backend=backend)
+        elapsed = time.perf_counter() - start
+        if err:
+            raise Exception(repr(err))
+        best = min(best, elapsed)
+    return best
+
+def main():
+    argParser = argparse.ArgumentParser(description="Compare the tree-walking interpreter with the bytecode VM and the Python transpiler")
+    argParser.add_argument("-n", "--iterations", type=int, default=2000, help="loop iterations per workload")
+    argParser.add_argument("-r", "--repeat", type=int, default=5, help="runs per measurement, the best is kept")
+    args = argParser.parse_args()
+    sys.setrecursionlimit(2**15)
+    
+    print(f"{'workload':<12} {'interpreter':>12} {'vm':>12} {'speedup':>8} {'python':>12} {'speedup':>8}")
+    for name, template in WORKLOADS.items():
+        code = template.format(n=args.iterations)
+        interpreterTime = timeRun(code, "interpreter", args.repeat)
+        vmTime = timeRun(code, "vm", args.repeat)
+        pythonTime = timeRun(code, "python", args.repeat)
+        print(f"{name:<12} {interpreterTime * 1000:>10.2f}ms {vmTime * 1000:>10.2f}ms {interpreterTime / vmTime:>7.2f}x {pythonTime * 1000:>10.2f}ms {interpreterTime / pythonTime:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import language
+from languageIO import MemorySink, IterableSource, QueueSource
+from workloads import FIB_LOOP
+
+# Reads one value, waits for the next and so on, like a program talking to a user
+ECHO = """
+echo(i) = $(+(#, i)), <(i, 4, echo(+(i, 1)))
+echo(0)
+"""
+
+def runSequential(code: str, programs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(programs):
+        _, err = language.run(code, backend="vm", output=MemorySink(), input=IterableSource(()))
+        if err:
+            raise Exception(repr(err))
+    return time.perf_counter() - start
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    # How late a 1ms timer fires is how long the programs kept the loop to themselves
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+async def feed(source: QueueSource, delay: float):
+    for i in range(5):
+        await asyncio.sleep(delay)
+        source.feed(str(i))
+
+async def runConcurrent(code: str, programs: int, sliceSize: int, typists: int) -> tuple:
+    stop = asyncio.Event()
+    lags = []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    sources = [QueueSource() for _ in range(typists)]
+    feeders = [asyncio.create_task(feed(source, 0.002)) for source in sources]
+    start = time.perf_counter()
+    runs = [language.runAsync(code, sliceSize=sliceSize, output=MemorySink(), input=IterableSource(())) for _ in range(programs)]
+    runs += [language.runAsync(ECHO, sliceSize=sliceSize, output=MemorySink(), input=source) for source in sources]
+    for _, err in await asyncio.gather(*runs):
+        if err:
+            raise Exception(repr(err))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    await asyncio.gather(*feeders)
+    return elapsed, max(lags, default=0.0)
+
+def main():
+    argParser = argparse.ArgumentParser(description="Run many Funke programs on one event loop and measure throughput and how long the loop is held")
+    argParser.add_argument("-p", "--programs", type=int, default=50, help="programs run at the same time")
+    argParser.add_argument("-n", "--iterations", type=int, default=1000, help="loop iterations per program")
+    argParser.add_argument("--typists", type=int, default=10, help="extra programs that wait for input arriving every 2ms")
+    argParser.add_argument("--slices", nargs="+", type=int, default=[100, 1000, 10000], help="calls each program makes before it yields")
+    args = argParser.parse_args()
+    sys.setrecursionlimit(2**15)
+    
+    code = FIB_LOOP.format(n=args.iterations)
+    sequential = runSequential(code, args.programs)
+    print(f"{'mode':<20} {'total':>12} {'max loop lag':>14}")
+    print(f"{'sequential run':<20} {sequential * 1000:>10.2f}ms {'-':>14}")
+    for sliceSize in args.slices:
+        elapsed, lag = asyncio.run(runConcurrent(code, args.programs, sliceSize, args.typists))
+        print(f"{f'runAsync slice {sliceSize}':<20} {elapsed * 1000:>10.2f}ms {lag * 1000:>12.2f}ms")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import language
+
+RULE = """
+score(a, b) = -(*(a, 3), b), >(-(*(a, 3), b), 100, 100), <(-(*(a, 3), b), 0, 0)
+{call}
+"""
+
+def timeRun(calls: int, backend: str) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        _, err = language.run(RULE.format(call=f"score({i}, 7)"), backend=backend)
+        if err:
+            raise Exception(repr(err))
+    return time.perf_counter() - start
+
+def timeProgram(calls: int, backend: str) -> float:
+    start = time.perf_counter()
+    program, err = language.compile(RULE.format(call="score(0, 0)"), backend=backend)
+    if err:
+        raise Exception(repr(err))
+    score = program.getFunction("score")
+    for i in range(calls):
+        _, err = score.call(i, 7)
+        if err:
+            raise Exception(repr(err))
+    return time.perf_counter() - start
+
+def timeBatch(calls: int, backend: str) -> float:
+    start = time.perf_counter()
+    program, err = language.compile(RULE.format(call="score(0, 0)"), backend=backend)
+    if err:
+        raise Exception(repr(err))
+    _, err = program.callBatch("score", list(range(calls)), [7] * calls)
+    if err:
+        raise Exception(repr(err))
+    return time.perf_counter() - start
+
+def main():
+    argParser = argparse.ArgumentParser(description="Compare calling a Funke rule through language.run with a compiled Program, one call at a time and batched")
+    argParser.add_argument("-n", "--calls", type=int, default=5000, help="calls per measurement")
+    args = argParser.parse_args()
+    
+    print(f"{'backend':<12} {'run':>14} {'program':>14} {'batch':>14} {'speedup':>8}")
+    for backend in language.BACKENDS:
+        runTime = timeRun(args.calls, backend)
+        programTime = timeProgram(args.calls, backend)
+        batchTime = timeBatch(args.calls, backend)
+        print(f"{backend:<12} {args.calls / runTime:>10.0f}/s {args.calls / programTime:>10.0f}/s {args.calls / batchTime:>10.0f}/s {runTime / batchTime:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,64 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import language
+from languageReport import RunReport
+from languageIO import MemorySink, IterableSource
+
+# Everything between lexing and running the program
+FRONT_END = ("parse", "optimize", "resolve", "typecheck", "analyze")
+
+def makeProgram(definitions: int, called: int) -> str:
+    lines = [f"h{i}(a) = b = +(a, {i}), >(b, 100, b = %(b, 97)), c = *(b, 2), <(c, 50, c = +(c, {i})), c" for i in range(definitions)]
+    # The calls are spread over the whole file, so no part of it is favoured
+    step = max(definitions // called, 1)
+    calls = ", ".join(f"s = +(s, h{i}(s))" for i in range(0, definitions, step)[:called])
+    lines.append(f"main() = s = 1, {calls}, s")
+    lines.append("main()")
+    return "\n".join(lines)
+
+def timeRun(code: str, lazy: bool, repeat: int) -> dict:
+    best = None
+    for _ in range(repeat):
+        report = RunReport()
+        _, err = language.run(code, lazy=lazy, memoize=False, report=report, output=MemorySink(), input=IterableSource(()))
+        if err:
+            raise Exception(repr(err))
+        phases = {name: phase.wall for name, phase in report.phases.items()}
+        times = {
+            "lex": phases.get("lex", 0.0),
+            "front end": sum(phases.get(name, 0.0) for name in FRONT_END),
+            "execute": phases.get("execute", 0.0),
+        }
+        times["total"] = sum(times.values())
+        if best is None or times["total"] < best["total"]:
+            best = times
+    return best
+
+def printRow(definitions: int, called: int, mode: str, times: dict):
+    print(f"{definitions:>12} {called:>8} {mode:>6} {times['lex'] * 1000:>10.1f}ms {times['front end'] * 1000:>10.1f}ms {times['execute'] * 1000:>10.1f}ms {times['total'] * 1000:>10.1f}ms")
+
+def main():
+    argParser = argparse.ArgumentParser(description="Compare parsing every body up front with parsing each on its first call, as definitions and calls grow")
+    argParser.add_argument("-d", "--definitions", nargs="+", type=int, default=[1000, 2000, 5000], help="numbers of definitions, each run with the first count of calls")
+    argParser.add_argument("-c", "--called", nargs="+", type=int, default=[10, 100, 1000, 5000], help="numbers of called functions, each run with the largest number of definitions")
+    argParser.add_argument("-r", "--repeat", type=int, default=3, help="runs per measurement, the fastest is kept")
+    args = argParser.parse_args()
+    sys.setrecursionlimit(2**15)
+    
+    sizes = [(definitions, args.called[0]) for definitions in args.definitions]
+    largest = max(args.definitions)
+    sizes += [(largest, called) for called in args.called if (largest, called) not in sizes and called <= largest]
+    print(f"{'definitions':>12} {'called':>8} {'mode':>6} {'lex':>12} {'front end':>12} {'execute':>12} {'total':>12}")
+    for definitions, called in sizes:
+        code = makeProgram(definitions, called)
+        for mode, lazy in (("eager", False), ("lazy", True)):
+            printRow(definitions, called, mode, timeRun(code, lazy, args.repeat))
+    print("front end is parsing, optimization and analysis; a lazy run parses the bodies it calls during execute")
+    print("lexing still goes over the whole source, the rest of a lazy run grows with the functions it calls")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
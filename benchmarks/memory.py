@@ -0,0 +1,88 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+from workloads import WORKLOADS
+
+def countValues(values) -> list:
+    # Every Value subclass initializes through Value.__init__, on both sides of the comparison
+    count = [0]
+    init = values.Value.__init__
+    def countingInit(self, *args, **kwargs):
+        count[0] += 1
+        init(self, *args, **kwargs)
+    values.Value.__init__ = countingInit
+    return count
+
+def valueSize(values) -> int:
+    value = values.IntValue(1000)
+    return sys.getsizeof(value) + (sys.getsizeof(value.__dict__) if hasattr(value, "__dict__") else 0)
+
+def measure(root: str, workload: str, iterations: int) -> dict:
+    sys.path.insert(0, root)
+    import language
+    import values
+    sys.setrecursionlimit(2**15)
+    code = WORKLOADS[workload].format(n=iterations)
+    size = valueSize(values)
+    count = countValues(values)
+    collections = gc.get_stats()[0]["collections"]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, err = language.run(code)
+    elapsed = time.perf_counter() - start
+    if err:
+        raise Exception(repr(err))
+    return {
+        "time": elapsed,
+        "maxrss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "values": count[0],
+        "valueSize": size,
+        "gc0": gc.get_stats()[0]["collections"] - collections,
+    }
+
+def runWorker(root: str, workload: str, iterations: int) -> dict:
+    args = [sys.executable, os.path.abspath(__file__), "--worker", root, "--workload", workload, "-n", str(iterations)]
+    out = subprocess.run(args, capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+def exportRevision(rev: str, dest: str):
+    archive = subprocess.run(["git", "-C", ROOT, "archive", rev], capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest)
+
+def main():
+    argParser = argparse.ArgumentParser(description="Compare peak memory and allocation churn of the interpreter against a git revision")
+    argParser.add_argument("rev", nargs="?", help="git revision to compare the working tree against")
+    argParser.add_argument("-n", "--iterations", type=int, default=2000, help="loop iterations per workload")
+    argParser.add_argument("--worker", help=argparse.SUPPRESS)
+    argParser.add_argument("--workload", choices=WORKLOADS, help=argparse.SUPPRESS)
+    args = argParser.parse_args()
+    
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.workload, args.iterations)))
+        return
+    
+    if not args.rev:
+        argParser.error("a revision to compare against is required")
+    with tempfile.TemporaryDirectory() as baseRoot:
+        exportRevision(args.rev, baseRoot)
+        print(f"{'workload':<12} {'tree':<10} {'time':>10} {'maxrss':>10} {'values':>10} {'bytes':>6} {'gc0':>6}")
+        for workload in WORKLOADS:
+            for label, root in ((args.rev, baseRoot), ("current", ROOT)):
+                res = runWorker(root, workload, args.iterations)
+                print(f"{workload:<12} {label[:10]:<10} {res['time'] * 1000:>8.2f}ms {res['maxrss'] / 1024:>8.1f}MB {res['values']:>10} {res['valueSize']:>6} {res['gc0']:>6}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from languageLexer import Lexer
+from languageParser import Parser
+
+def makeProgram(definitions: int) -> str:
+    lines = [f"f{i}(a, b) = c = +(a, *(b, {i})), <(c, 100, f{i}(c, b))" for i in range(definitions)]
+    lines.append("f0(1, 2)")
+    return "\n".join(lines)
+
+def timeParse(code: str, repeat: int) -> float:
+    tokens, err = Lexer(code).makeTokens()
+    if err:
+        raise Exception(repr(err))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        Parser(tokens).parseTokens()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+    return best
+
+def main():
+    argParser = argparse.ArgumentParser(description="Measure how parse time grows with the number of definitions")
+    argParser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000, 100000], help="numbers of definitions to parse")
+    argParser.add_argument("-r", "--repeat", type=int, default=3, help="runs per measurement, the best is kept")
+    args = argParser.parse_args()
+    
+    print(f"{'definitions':>12} {'parse':>10} {'per definition':>15} {'growth':>8}")
+    previous = None
+    for size in args.sizes:
+        elapsed = timeParse(makeProgram(size), args.repeat)
+        growth = "" if previous is None else f"{elapsed / previous[1] / (size / previous[0]):.2f}"
+        print(f"{size:>12} {elapsed * 1000:>8.1f}ms {elapsed / size * 1e6:>13.2f}us {growth:>8}")
+        previous = (size, elapsed)
+    print("growth is the time ratio divided by the size ratio; 1.00 means linear")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,106 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Every call returns through all of the calls below it, which is where the tuples used to be built and checked
+DEEP_RECURSION = """
+sum(k) = =(k, 0, 0), >(k, 0, +(k, sum(-(k, 1))))
+loop(i) = sum({n}), <(i, 20, loop(+(i, 1)))
+loop(0)
+"""
+
+# The error is raised at the bottom of the recursion and has to travel back up through every call
+DEEP_ERROR = """
+sum(k) = =(k, 0, /(k, 0)), >(k, 0, +(k, sum(-(k, 1))))
+sum({n})
+"""
+
+WORKLOADS = {
+    "return": (DEEP_RECURSION, False),
+    "error": (DEEP_ERROR, True),
+}
+
+def timeRun(language, code: str, backend: str, failing: bool, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, err = language.run(code, backend=backend, memoize=False)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        if (err is not None) != failing:
+            raise Exception(repr(err))
+        best = min(best, elapsed)
+    return best
+
+def measure(tree: str, depths: list, backends: list, repeat: int) -> dict:
+    sys.path.insert(0, tree)
+    import language
+    results = {}
+    for depth in depths:
+        for name, (template, failing) in WORKLOADS.items():
+            code = template.format(n=depth)
+            for backend in backends:
+                results[f"{name} {depth} {backend}"] = timeRun(language, code, backend, failing, repeat)
+    return results
+
+def measureTree(tree: str, args) -> dict:
+    # Each tree runs in its own process, so the two never share imported modules
+    command = [sys.executable, os.path.abspath(__file__), "--tree", tree, "--json", "-r", str(args.repeat), "--backends", *args.backends, "--", *map(str, args.depths)]
+    res = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(res.stdout)
+
+def compareRevision(revision: str, args) -> tuple:
+    with tempfile.TemporaryDirectory() as tree:
+        archive = subprocess.run(["git", "-C", ROOT, "archive", revision], capture_output=True, check=True).stdout
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(tree)
+        baseline, current = {}, {}
+        # Alternating the two trees spreads any drift in the machine's speed over both of them
+        for _ in range(args.rounds):
+            for results, source in ((baseline, tree), (current, ROOT)):
+                for name, elapsed in measureTree(source, args).items():
+                    results[name] = min(results.get(name, elapsed), elapsed)
+    return baseline, current
+
+def main():
+    argParser = argparse.ArgumentParser(description="Time deep non-tail recursion, returning normally and unwinding an error, optionally against another revision")
+    argParser.add_argument("depths", nargs="*", type=int, default=[500, 1000, 2000, 3000], help="recursion depths to measure")
+    argParser.add_argument("-r", "--repeat", type=int, default=5, help="runs per measurement, the best is kept")
+    argParser.add_argument("--backends", nargs="+", default=["interpreter", "vm"], help="backends to time")
+    argParser.add_argument("--baseline", help="git revision to compare the working tree against")
+    argParser.add_argument("--rounds", type=int, default=3, help="times each tree is measured when comparing, the best is kept")
+    argParser.add_argument("--tree", default=ROOT, help=argparse.SUPPRESS)
+    argParser.add_argument("--json", action="store_true", help=argparse.SUPPRESS)
+    args = argParser.parse_args()
+    sys.setrecursionlimit(2**15)
+    
+    if args.baseline is None:
+        current = measure(args.tree, args.depths, args.backends, args.repeat)
+        if args.json:
+            print(json.dumps(current))
+            return
+        print(f"{'workload':<28} {'time':>12}")
+        for name, elapsed in current.items():
+            print(f"{name:<28} {elapsed * 1000:>10.2f}ms")
+        return
+    baseline, current = compareRevision(args.baseline, args)
+    print(f"{'workload':<28} {'baseline':>12} {'current':>12} {'speedup':>8}")
+    for name, elapsed in current.items():
+        before = baseline[name]
+        print(f"{name:<28} {before * 1000:>10.2f}ms {elapsed * 1000:>10.2f}ms {before / elapsed:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
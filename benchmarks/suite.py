@@ -0,0 +1,132 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import language
+from languageReport import RunReport
+from workloads import SUITE, makeWorkload
+
+def timeWorkload(code: str, backend: str, options: dict, repeat: int) -> dict:
+    # Each phase keeps its best time over all repeats, which is the least noisy estimate
+    best = {}
+    for _ in range(repeat):
+        report = RunReport()
+        gc.collect()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, err = language.run(code, backend=backend, report=report, **options)
+        elapsed = time.perf_counter() - start
+        if err:
+            raise Exception(repr(err))
+        timings = {name: phase.wall for name, phase in report.phases.items()}
+        timings["total"] = elapsed
+        for phase, elapsed in timings.items():
+            best[phase] = min(best.get(phase, elapsed), elapsed)
+    return best
+
+def gitRevision() -> str:
+    res = subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return res.stdout.strip() if res.returncode == 0 else "unknown"
+
+def runSuite(args) -> dict:
+    results = {}
+    for name, (_, size, options) in SUITE.items():
+        if args.workloads and name not in args.workloads:
+            continue
+        code = makeWorkload(name, int(size * args.scale))
+        results[name] = {backend: timeWorkload(code, backend, options, args.repeat) for backend in args.backends}
+    return {
+        "meta": {
+            "revision": gitRevision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "scale": args.scale,
+        },
+        "results": results,
+    }
+
+def formatResults(report: dict) -> str:
+    lines = [f"{'workload':<18} {'backend':<12} {'phase':<10} {'time':>12}"]
+    for name, backends in report["results"].items():
+        for backend, phases in backends.items():
+            for phase, elapsed in phases.items():
+                lines.append(f"{name:<18} {backend:<12} {phase:<10} {elapsed * 1000:>10.3f}ms")
+    return "\n".join(lines)
+
+def compare(baseline: dict, current: dict, threshold: float, minDelta: float) -> tuple:
+    lines = [f"{'workload':<18} {'backend':<12} {'phase':<10} {'baseline':>12} {'current':>12} {'change':>8}"]
+    regressions = 0
+    for name, backends in current["results"].items():
+        for backend, phases in backends.items():
+            basePhases = baseline["results"].get(name, {}).get(backend, {})
+            for phase, elapsed in phases.items():
+                if phase not in basePhases:
+                    continue
+                before = basePhases[phase]
+                change = elapsed / before - 1 if before > 0 else 0.0
+                # Phases too short to measure reliably are never flagged
+                regressed = change > threshold and elapsed - before > minDelta
+                regressions += regressed
+                lines.append(f"{name:<18} {backend:<12} {phase:<10} {before * 1000:>10.3f}ms {elapsed * 1000:>10.3f}ms {change:>+7.1%}" + ("  REGRESSION" if regressed else ""))
+    return "\n".join(lines), regressions
+
+def main():
+    argParser = argparse.ArgumentParser(description="Time every phase of language.run on representative Funke workloads")
+    commands = argParser.add_subparsers(dest="command", required=True)
+    
+    runParser = commands.add_parser("run", help="run the suite and print the results")
+    runParser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    runParser.add_argument("-r", "--repeat", type=int, default=5, help="runs per measurement, the best is kept")
+    runParser.add_argument("--scale", type=float, default=1.0, help="multiplier applied to every workload size")
+    runParser.add_argument("--backends", nargs="+", choices=language.BACKENDS, default=list(language.BACKENDS), help="backends to time")
+    runParser.add_argument("--workloads", nargs="+", choices=SUITE, help="only run these workloads")
+    
+    compareParser = commands.add_parser("compare", help="compare two result files and flag regressions")
+    compareParser.add_argument("baseline", help="JSON results to compare against")
+    compareParser.add_argument("current", nargs="?", help="JSON results to check, the suite is run now if omitted")
+    compareParser.add_argument("-t", "--threshold", type=float, default=0.10, help="relative slowdown that counts as a regression")
+    compareParser.add_argument("--min-delta", type=float, default=0.0005, help="absolute slowdown in seconds below which nothing is flagged")
+    compareParser.add_argument("-r", "--repeat", type=int, default=5, help="runs per measurement when running the suite")
+    compareParser.add_argument("--scale", type=float, default=None, help="workload size multiplier when running the suite, the baseline's by default")
+    compareParser.add_argument("--backends", nargs="+", choices=language.BACKENDS, default=list(language.BACKENDS), help="backends to time when running the suite")
+    compareParser.add_argument("--workloads", nargs="+", choices=SUITE, help="only run these workloads when running the suite")
+    args = argParser.parse_args()
+    sys.setrecursionlimit(2**15)
+    
+    if args.command == "run":
+        report = runSuite(args)
+        print(formatResults(report))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        return
+    
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        if args.scale is None:
+            args.scale = baseline["meta"]["scale"]
+        current = runSuite(args)
+    table, regressions = compare(baseline, current, args.threshold, args.min_delta)
+    print(f"baseline {baseline['meta']['revision']}, current {current['meta']['revision']}")
+    print(table)
+    if regressions:
+        print(f"{regressions} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,63 @@
+FIB_LOOP = """
+fib(a, b) = c = b, b = a, a = +(a, c)
+loop(a, b, i) = fib(a, b), i = +(i, 1), <(i, {n}, loop(%(a, 1000003), b, i))
+loop(1, 0, 0)
+"""
+
+COUNT_LOOP = """
+count(i, n) = <(i, n, count(+(i, 1), n)), =(i, n, i)
+count(0, {n})
+"""
+
+PRINT_LOOP = """
+print(n) = $(n)
+fib(a, b) = print(a), c = b, b = a, a = +(a, c)
+loop(a, b, i) = fib(a, b), i = +(i, 1), <(i, {n}, loop(%(a, 1000003), b, i))
+loop(1, 0, 0)
+"""
+
+WORKLOADS = {
+    "fib-loop": FIB_LOOP,
+    "count-loop": COUNT_LOOP,
+    "print-loop": PRINT_LOOP,
+}
+
+TAIL_LOOP = """
+count(i, n) = <(i, n, count(+(i, 1), n))
+count(0, {n})
+"""
+
+FIB_RECURSIVE = """
+fib(n) = r = n, >(n, 1, r = +(fib(-(n, 1)), fib(-(n, 2)))), r
+fib({n})
+"""
+
+DEEP_RECURSION = """
+sum(n) = =(n, 0, 0), >(n, 0, +(n, sum(-(n, 1))))
+sum({n})
+"""
+
+STRING_BUILD = """
+build(s, i, n) = =(i, n, s), <(i, n, build(+(s, *("ab", %(i, 3))), +(i, 1), n))
+build("", 0, {n})
+"""
+
+def makeDefinitions(n: int) -> str:
+    lines = [f"f{i}(a) = c = +(a, {i}), >(c, 0, f{i + 1}(-(c, {i})))" for i in range(n)]
+    lines.append(f"f{n}(a) = a")
+    lines.append("f0(1)")
+    return "\n".join(lines)
+
+# Name -> (template or generator, default size, language.run options)
+SUITE = {
+    "tail-loop": (TAIL_LOOP, 20000, {}),
+    "fib-loop": (FIB_LOOP, 2000, {}),
+    "fib-recursive": (FIB_RECURSIVE, 18, {"scoping": "lexical", "memoize": False}),
+    "deep-recursion": (DEEP_RECURSION, 2000, {"memoize": False}),
+    "string-build": (STRING_BUILD, 2000, {}),
+    "many-definitions": (makeDefinitions, 5000, {}),
+}
+
+def makeWorkload(name: str, n: int) -> str:
+    source = SUITE[name][0]
+    return source(n) if callable(source) else source.format(n=n)
\ No newline at end of file
@@ -1,5 +1,7 @@
 from __future__ import annotations
-from typing import Optional
+from typing import Any, Optional, List, Tuple
+
+import bisect
 
 class Position:
     def __init__(self, idx: int, line: int, column: int, code: str):
@@ -19,8 +21,51 @@ class Position:
     def copy(self) -> Position:
         return Position(self.idx, self.line, self.column, self.code)
 
-class Error:
+class Source:
+    def __init__(self, code: str):
+        self.code: str = code
+        self.lineStarts: Optional[List[int]] = None
+    
+    def lineColumn(self, idx: int) -> Tuple[int, int]:
+        if self.lineStarts is None:
+            lineStarts = [0]
+            newline = self.code.find("\n")
+            while newline >= 0:
+                lineStarts.append(newline + 1)
+                newline = self.code.find("\n", newline + 1)
+            self.lineStarts = lineStarts
+        line = bisect.bisect_right(self.lineStarts, idx) - 1
+        return line, idx - self.lineStarts[line]
+
+class SourcePosition:
+    __slots__ = ("idx", "source")
+    
+    def __init__(self, idx: int, source: Source):
+        self.idx: int = idx
+        self.source: Source = source
+    
+    @property
+    def line(self) -> int:
+        return self.source.lineColumn(self.idx)[0]
+    
+    @property
+    def column(self) -> int:
+        return self.source.lineColumn(self.idx)[1]
+    
+    @property
+    def code(self) -> str:
+        return self.source.code
+    
+    def advance(self, char: Optional[str] = None) -> SourcePosition:
+        self.idx += 1
+        return self
+    
+    def copy(self) -> SourcePosition:
+        return SourcePosition(self.idx, self.source)
+
+class Error(Exception):
     def __init__(self, startPos: Optional[Position], endPos: Optional[Position], _type: str, msg: str):
+        super().__init__(msg)
         if startPos:
             self.startPos: Position = startPos
         else:
@@ -67,6 +112,9 @@ class Error:
         res += f"Line {self.startPos.line + 1}\n\n"
         res += self.stringWithArrows()
         return res + "\n"
+    
+    def __str__(self) -> str:
+        return self.__repr__()
 
 class IllegalCharacterError(Error):
     def __init__(self, charPos: Position, char: str):
@@ -78,4 +126,11 @@ class InvalidSyntaxError(Error):
 
 class RTError(Error):
     def __init__(self, startPos: Optional[Position], endPos: Optional[Position], msg: str):
-        super().__init__(startPos, endPos, "RTError", msg)
\ No newline at end of file
+        super().__init__(startPos, endPos, "RTError", msg)
+
+class BudgetError(RTError):
+    def __init__(self, startPos: Optional[Position], endPos: Optional[Position], resource: str, limit: Any, msg: str):
+        super().__init__(startPos, endPos, msg)
+        # Which budget ran out and its limit, so callers can tell the runs that were stopped from the ones that failed
+        self.resource: str = resource
+        self.limit: Any = limit
\ No newline at end of file
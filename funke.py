@@ -1,23 +1,112 @@
+import argparse
 import os
 import sys
 
 import language
+from languageMemo import formatStats
+from languageCache import ProgramCache
+from languageProfiler import Profiler, SORT_KEYS
+from languageReport import RunReport
+from languageBudget import Budget
+from languageCoverage import Coverage
+from languageIO import FLUSH_POLICIES, StdoutSink, FileSink, PromptSource, StreamSource, FileSource
 
 def main():
     sys.setrecursionlimit(2**15)
-    if len(sys.argv) > 1:
-        if os.path.isfile(sys.argv[1]):
-            with open(sys.argv[1]) as f:
-                _, err = language.run(f.read())
-                if err:
-                    print(err)
+    argParser = argparse.ArgumentParser(description="Run a Funke program")
+    argParser.add_argument("file", nargs="?", help="Funke source file")
+    argParser.add_argument("--backend", choices=language.BACKENDS, default="interpreter", help="execution backend")
+    argParser.add_argument("--lexer", choices=language.LEXERS, default="classic", help="lexer implementation")
+    argParser.add_argument("--scoping", choices=language.SCOPINGS, default="dynamic", help="dynamic: calls bind parameters in the shared context; lexical: every call gets its own frame of locals")
+    argParser.add_argument("-O", "--optimize", type=int, choices=language.OPTIMIZE_LEVELS, default=1, help="0: no optimization; 1: fold constants, drop dead branches and specialize operations on proven types; 2: also inline trivial functions")
+    argParser.add_argument("--lazy", action="store_true", help="parse function bodies when they are first called instead of up front; leaves out inlining, type specialization and memoization, which need every body")
+    argParser.add_argument("--no-memo", dest="memoize", action="store_false", help="do not memoize pure functions")
+    argParser.add_argument("--memo-size", type=int, default=1024, help="maximum number of cached results per function")
+    argParser.add_argument("--memo-stats", action="store_true", help="print memoization hits and misses to stderr")
+    argParser.add_argument("--no-cache", dest="cache", action="store_false", help="always lex and parse the source instead of loading the program from __funkecache__")
+    argParser.add_argument("--cache-dir", help="directory for cached programs, instead of __funkecache__ next to the source file")
+    argParser.add_argument("--profile", action="store_true", help="print call counts and time per function to stderr")
+    argParser.add_argument("--profile-sort", choices=SORT_KEYS, default="exclusive", help="column the profile table is sorted by")
+    argParser.add_argument("--profile-out", help="also write the profile to this file, as JSON if it ends in .json and in pstats format otherwise")
+    argParser.add_argument("--coverage", action="store_true", help="print the source annotated with how often each expression ran and each comparison branch was taken to stderr; the program runs unoptimized")
+    argParser.add_argument("--coverage-out", help="also write the evaluation count of every node and branch to this file as JSON")
+    argParser.add_argument("--timings", action="store_true", help="print wall and CPU time per phase, and token and AST node counts, to stderr")
+    argParser.add_argument("--memory", action="store_true", help="like --timings, and also trace peak memory per phase, which slows the run down")
+    argParser.add_argument("--output", help="write what the program prints to this file instead of stdout")
+    argParser.add_argument("--flush", choices=FLUSH_POLICIES, help="when printed output is written: after every line, in blocks, or only at the end; line on a terminal and blocks otherwise by default")
+    argParser.add_argument("--input", help="read the values for # from this file, one per line, instead of prompting")
+    argParser.add_argument("--no-prompt", dest="prompt", action="store_false", help="read the values for # from stdin without printing a prompt")
+    argParser.add_argument("--max-nodes", type=int, help="stop the program after it evaluates this many nodes")
+    argParser.add_argument("--max-depth", type=int, help="stop the program when its calls nest deeper than this, tail calls do not count")
+    argParser.add_argument("--max-time", type=float, help="stop the program after this many seconds")
+    argParser.add_argument("--max-string", type=int, help="stop the program before it builds a string longer than this many characters")
+    args = argParser.parse_args()
+    budget = None
+    if any(limit is not None for limit in (args.max_nodes, args.max_depth, args.max_time, args.max_string)):
+        if args.backend != "interpreter":
+            argParser.error("budgets are only enforced by the interpreter backend")
+        budget = Budget(args.max_nodes, args.max_depth, args.max_time, args.max_string)
+    coverage = None
+    if args.coverage or args.coverage_out:
+        if args.backend != "interpreter":
+            argParser.error("coverage is only collected by the interpreter backend")
+        if budget is not None:
+            argParser.error("coverage cannot be collected together with budgets")
+        coverage = Coverage(args.file or "<funke>")
+    if args.lazy:
+        if args.backend != "interpreter":
+            argParser.error("lazy parsing is only done by the interpreter backend")
+        if coverage is not None:
+            argParser.error("coverage cannot be collected from a lazily parsed program")
+    if args.file:
+        if os.path.isfile(args.file):
+            with open(args.file) as f:
+                code = f.read()
         else:
             print("File not found")
+            return
     else:
         print("No file specified, using test code")
-        _, err = language.run("add(a, b) = +(a, b)\nprint(n) = $(n)\nprint(add(3, 4))")
-        if err:
-            print(err)
+        code = "add(a, b) = +(a, b)\nprint(n) = $(n)\nprint(add(3, 4))"
+    cache = None
+    if args.file and args.cache:
+        cache = ProgramCache.forScript(args.file, args.cache_dir)
+    profiler = None
+    if args.profile or args.profile_out:
+        profiler = Profiler(args.file or "<funke>")
+    report = None
+    if args.timings or args.memory:
+        report = RunReport(traceMemory=args.memory)
+    if args.output:
+        output = FileSink(args.output, args.flush or "buffered")
+    else:
+        output = StdoutSink(args.flush)
+    if args.input:
+        if not os.path.isfile(args.input):
+            print("Input file not found")
+            return
+        source = FileSource(args.input)
+    elif args.prompt:
+        source = PromptSource(output)
+    else:
+        source = StreamSource()
+    memoCaches = {}
+    with output, source:
+        _, err = language.run(code, backend=args.backend, lexer=args.lexer, scoping=args.scoping, optimize=args.optimize, memoize=args.memoize, memoSize=args.memo_size, memoCaches=memoCaches, cache=cache, profiler=profiler, report=report, output=output, input=source, budget=budget, coverage=coverage, lazy=args.lazy)
+    if err:
+        print(err)
+    if args.memo_stats:
+        print(formatStats(memoCaches), file=sys.stderr)
+    if report is not None:
+        print(report.format(), file=sys.stderr)
+    if args.profile:
+        print(profiler.formatTable(args.profile_sort), file=sys.stderr)
+    if args.profile_out:
+        profiler.dump(args.profile_out)
+    if args.coverage:
+        print(coverage.formatListing(), file=sys.stderr)
+    if args.coverage_out:
+        coverage.dump(args.coverage_out)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
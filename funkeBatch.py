@@ -0,0 +1,198 @@
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import signal
+import sys
+import time
+from typing import Any, Dict, List
+
+import language
+from languageCache import ProgramCache
+from languageIO import MemorySink, FileSource, IterableSource
+
+class ScriptTimeout(Exception):
+    pass
+
+# Options every worker runs its scripts with, set once per process by initWorker
+workerOptions: Dict[str, Any] = {}
+
+def initWorker(options: Dict[str, Any]):
+    sys.setrecursionlimit(2**15)
+    workerOptions.update(options)
+
+def onTimeout(signum, frame):
+    raise ScriptTimeout()
+
+def runScript(path: str) -> Dict[str, Any]:
+    options = dict(workerOptions)
+    timeout = options.pop("timeout")
+    cacheDir = options.pop("cacheDir")
+    useCache = options.pop("cache")
+    inputPath = options.pop("input")
+    result = {"path": path, "status": "ok", "output": "", "error": None, "wall": 0.0, "cpu": 0.0}
+    try:
+        with open(path) as f:
+            code = f.read()
+    except OSError as e:
+        result["status"] = "error"
+        result["error"] = f"Cannot read {path}: {e.strerror}"
+        return result
+    cache = ProgramCache.forScript(path, cacheDir) if useCache else None
+    output = MemorySink()
+    # Scripts cannot share the terminal, so # reads from the input file, and without one there is no input at all
+    source = FileSource(inputPath) if inputPath is not None else IterableSource(())
+    # SIGALRM interrupts the script wherever it is, so a runaway program cannot hold on to its worker
+    timed = timeout is not None and hasattr(signal, "setitimer")
+    if timed:
+        signal.signal(signal.SIGALRM, onTimeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    start = time.perf_counter()
+    startCpu = time.process_time()
+    try:
+        _, err = language.run(code, cache=cache, output=output, input=source, **options)
+        if err:
+            result["status"] = "error"
+            result["error"] = str(err)
+    except ScriptTimeout:
+        result["status"] = "timeout"
+        result["error"] = f"Timed out after {timeout}s"
+    except Exception as e:
+        result["status"] = "crash"
+        result["error"] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+    finally:
+        if timed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        result["wall"] = time.perf_counter() - start
+        result["cpu"] = time.process_time() - startCpu
+        result["output"] = output.getvalue()
+        source.close()
+    return result
+
+def findScripts(patterns: List[str]) -> List[str]:
+    scripts = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            scripts.extend(sorted(glob.glob(os.path.join(pattern, "*.fun"))))
+        elif os.path.isfile(pattern):
+            scripts.append(pattern)
+        else:
+            # Quoted globs reach us unexpanded, and so does every glob on shells that do not expand them
+            scripts.extend(sorted(glob.glob(pattern, recursive=True)))
+    seen = set()
+    return [script for script in scripts if not (script in seen or seen.add(script))]
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(results: List[Dict[str, Any]], wall: float, workers: int) -> Dict[str, Any]:
+    latencies = [result["wall"] for result in results]
+    counts = {status: 0 for status in ("ok", "error", "timeout", "crash")}
+    for result in results:
+        counts[result["status"]] += 1
+    summary = {"scripts": len(results), **counts, "workers": workers, "wall": wall, "throughput": len(results) / wall if wall > 0 else 0.0}
+    if latencies:
+        summary["latency"] = {
+            "mean": sum(latencies) / len(latencies),
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "max": max(latencies),
+        }
+    return summary
+
+def formatSummary(summary: Dict[str, Any], results: List[Dict[str, Any]], slowest: int) -> str:
+    lines = [
+        f"scripts: {summary['scripts']} (ok {summary['ok']}, errors {summary['error']}, timeouts {summary['timeout']}, crashes {summary['crash']})",
+        f"wall: {summary['wall']:.3f}s with {summary['workers']} workers, {summary['throughput']:.1f} scripts/s",
+    ]
+    if "latency" in summary:
+        latency = summary["latency"]
+        lines.append(f"latency: mean {latency['mean'] * 1000:.1f}ms, p50 {latency['p50'] * 1000:.1f}ms, p95 {latency['p95'] * 1000:.1f}ms, max {latency['max'] * 1000:.1f}ms")
+    if slowest > 0 and results:
+        lines.append("slowest:")
+        for result in sorted(results, key=lambda result: result["wall"], reverse=True)[:slowest]:
+            lines.append(f"  {result['wall'] * 1000:>10.1f}ms  {result['status']:<8} {result['path']}")
+    return "\n".join(lines)
+
+def writeOutputs(result: Dict[str, Any], outputDir: str, root: str):
+    base = os.path.join(outputDir, os.path.relpath(result["path"], root))
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    with open(f"{base}.out", "w") as f:
+        f.write(result["output"])
+    if result["error"] is not None:
+        with open(f"{base}.err", "w") as f:
+            f.write(result["error"] + "\n")
+
+def printResult(result: Dict[str, Any]):
+    print(f"==> {result['path']} <==")
+    sys.stdout.write(result["output"])
+    if result["error"] is not None:
+        print(result["error"])
+
+def main():
+    argParser = argparse.ArgumentParser(description="Run many Funke programs across a pool of worker processes")
+    argParser.add_argument("scripts", nargs="+", help="Funke source files, directories of .fun files, or glob patterns")
+    argParser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    argParser.add_argument("-t", "--timeout", type=float, help="seconds a single script may run before it is stopped")
+    argParser.add_argument("--backend", choices=language.BACKENDS, default="interpreter", help="execution backend")
+    argParser.add_argument("--lexer", choices=language.LEXERS, default="classic", help="lexer implementation")
+    argParser.add_argument("--scoping", choices=language.SCOPINGS, default="dynamic", help="dynamic: calls bind parameters in the shared context; lexical: every call gets its own frame of locals")
+    argParser.add_argument("-O", "--optimize", type=int, choices=language.OPTIMIZE_LEVELS, default=1, help="0: no optimization; 1: fold constants, drop dead branches and specialize operations on proven types; 2: also inline trivial functions")
+    argParser.add_argument("--no-memo", dest="memoize", action="store_false", help="do not memoize pure functions")
+    argParser.add_argument("--memo-size", type=int, default=1024, help="maximum number of cached results per function")
+    argParser.add_argument("--no-cache", dest="cache", action="store_false", help="always lex and parse the sources instead of loading the programs from __funkecache__")
+    argParser.add_argument("--cache-dir", help="directory for cached programs, instead of __funkecache__ next to each source file")
+    argParser.add_argument("--input", help="file every script reads the values for # from, one per line")
+    argParser.add_argument("-o", "--output-dir", help="write each script's output to <script>.out and its error to <script>.err in this directory, instead of printing them")
+    argParser.add_argument("-q", "--quiet", action="store_true", help="print only the summary")
+    argParser.add_argument("--slowest", type=int, default=5, help="number of slowest scripts listed in the summary")
+    argParser.add_argument("--json", help="also write the summary and every script's result to this file as JSON")
+    args = argParser.parse_args()
+    
+    if args.input and not os.path.isfile(args.input):
+        print("Input file not found")
+        sys.exit(1)
+    scripts = findScripts(args.scripts)
+    if not scripts:
+        print("No scripts found")
+        sys.exit(1)
+    options = {
+        "backend": args.backend,
+        "lexer": args.lexer,
+        "scoping": args.scoping,
+        "optimize": args.optimize,
+        "memoize": args.memoize,
+        "memoSize": args.memo_size,
+        "timeout": args.timeout,
+        "cache": args.cache,
+        "cacheDir": args.cache_dir,
+        "input": args.input,
+    }
+    workers = max(1, min(args.workers, len(scripts)))
+    root = os.path.commonpath([os.path.abspath(os.path.dirname(script)) for script in scripts])
+    results = []
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=initWorker, initargs=(options,)) as executor:
+        futures = [executor.submit(runScript, script) for script in scripts]
+        # Results are reported in the order the scripts were given, as soon as each one is done
+        for future in futures:
+            result = future.result()
+            results.append(result)
+            if args.output_dir:
+                writeOutputs(result, args.output_dir, root)
+            elif not args.quiet:
+                printResult(result)
+    wall = time.perf_counter() - start
+    
+    summary = summarize(results, wall, workers)
+    print(formatSummary(summary, results, args.slowest), file=sys.stderr)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "scripts": results}, f, indent=2)
+    if summary["ok"] != len(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
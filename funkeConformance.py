@@ -0,0 +1,95 @@
+import argparse
+import itertools
+import os
+import random
+import signal
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import language
+from funkeBatch import findScripts
+from languageIO import MemorySink, FileSource, IterableSource
+
+class RunTimeout(Exception):
+    pass
+
+def onTimeout(signum, frame):
+    raise RunTimeout()
+
+def runOnce(code: str, inputPath: Optional[str], backend: str, options: Dict[str, Any], timeout: Optional[float]) -> Tuple[str, str]:
+    output = MemorySink()
+    source = FileSource(inputPath) if inputPath is not None else IterableSource(())
+    # Every backend draws the same numbers for @
+    random.seed(0)
+    timed = timeout is not None and hasattr(signal, "setitimer")
+    if timed:
+        signal.signal(signal.SIGALRM, onTimeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        res, err = language.run(code, backend=backend, output=output, input=source, **options)
+        outcome = str(err) if err else repr(res)
+    except RunTimeout:
+        outcome = f"Timed out after {timeout}s"
+    except Exception as e:
+        # Crashes are part of the behaviour too, every backend has to crash the same way
+        outcome = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+    finally:
+        if timed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        source.close()
+    return output.getvalue(), outcome
+
+def configurations(args) -> List[Dict[str, Any]]:
+    configs = []
+    for scoping, optimize, memoSize in itertools.product(args.scopings, args.optimize, args.memo_sizes):
+        configs.append({"scoping": scoping, "optimize": optimize, "memoize": memoSize > 0, "memoSize": memoSize})
+    return configs
+
+def describe(options: Dict[str, Any]) -> str:
+    return f"{options['scoping']} -O{options['optimize']} memo {options['memoSize']}"
+
+def checkScript(path: str, backends: List[str], configs: List[Dict[str, Any]], timeout: Optional[float]) -> List[str]:
+    with open(path) as f:
+        code = f.read()
+    inputPath = os.path.splitext(path)[0] + ".in"
+    if not os.path.isfile(inputPath):
+        inputPath = None
+    mismatches = []
+    for options in configs:
+        expected = runOnce(code, inputPath, "interpreter", options, timeout)
+        for backend in backends:
+            actual = runOnce(code, inputPath, backend, options, timeout)
+            for what, want, got in zip(("output", "result"), expected, actual):
+                if want != got:
+                    mismatches.append(f"{path} [{backend}, {describe(options)}] {what} differs\n  interpreter: {want!r}\n  {backend}: {got!r}")
+    return mismatches
+
+def main():
+    argParser = argparse.ArgumentParser(description="Check that every backend prints, returns and fails exactly like the interpreter")
+    argParser.add_argument("scripts", nargs="*", default=[os.path.join(os.path.dirname(os.path.abspath(__file__)), "programs", "conformance")], help="Funke source files, directories of .fun files, or glob patterns; a script reads # from the .in file next to it")
+    argParser.add_argument("--backends", nargs="+", choices=[backend for backend in language.BACKENDS if backend != "interpreter"], default=[backend for backend in language.BACKENDS if backend != "interpreter"], help="backends to check against the interpreter")
+    argParser.add_argument("--scopings", nargs="+", choices=language.SCOPINGS, default=list(language.SCOPINGS), help="scopings to check")
+    argParser.add_argument("-O", "--optimize", nargs="+", type=int, choices=language.OPTIMIZE_LEVELS, default=list(language.OPTIMIZE_LEVELS), help="optimization levels to check")
+    argParser.add_argument("--memo-sizes", nargs="+", type=int, default=[1024, 0], help="memo sizes to check, 0 turns memoization off")
+    argParser.add_argument("-t", "--timeout", type=float, default=10.0, help="seconds a single run may take before it counts as timed out")
+    args = argParser.parse_args()
+    sys.setrecursionlimit(2**15)
+    
+    scripts = findScripts(args.scripts)
+    if not scripts:
+        print("No scripts found")
+        sys.exit(1)
+    configs = configurations(args)
+    mismatches = []
+    for script in scripts:
+        found = checkScript(script, args.backends, configs, args.timeout)
+        print(f"{'ok' if not found else 'FAIL':<4} {script}")
+        mismatches.extend(found)
+    for mismatch in mismatches:
+        print(mismatch)
+    print(f"{len(scripts)} scripts, {len(configs)} configurations, {len(mismatches)} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
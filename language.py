@@ -1,8 +1,24 @@
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Dict, Union
 
-from languageLexer import Lexer
-from languageParser import Parser
+from languageLexer import Lexer, StreamLexer
+from languageParser import Parser, ProgramNode
 from languageInterpreter import Interpreter
+from languageCompiler import Compiler
+from languageVM import VM
+from languageTranspiler import Transpiler, PythonRunner
+from languageAsync import AsyncRunner
+from languageBudget import Budget, BudgetedInterpreter
+from languageCoverage import Coverage, CoveringInterpreter
+from languageMemo import MemoCache, markPureFunctions
+from languageResolver import Resolver
+from languageTypes import checkTypes
+from languageLazy import BodyLoader
+from languageOptimizer import Optimizer
+from languageCache import ProgramCache, cacheKey
+from languageProfiler import Profiler
+from languageReport import RunReport
+from languageProgram import Program
+from languageIO import OutputSink, StdoutSink, AsyncOutputSink, InputSource, PromptSource, AsyncInputSource
 from values import Value
 from error import Error, RTError
 
@@ -10,29 +26,228 @@ from pprint import pprint
 
 DEBUG = False
 
-def run(code: str) -> Tuple[Optional[Value], Optional[Error]]:
-    try:
-        lexer = Lexer(code)
-        tokens, err = lexer.makeTokens()
+BACKENDS = ("interpreter", "vm", "python")
+LEXERS = ("classic", "stream")
+SCOPINGS = ("dynamic", "lexical")
+OPTIMIZE_LEVELS = (0, 1, 2)
+
+def prepare(code: str, lexer: str = "classic", scoping: str = "dynamic", optimize: int = 1, memoize: bool = True, report: Optional[RunReport] = None, exported: bool = False, lazy: bool = False, maxString: Optional[int] = None) -> Tuple[Optional[ProgramNode], Optional[Error]]:
+    if report is not None:
+        report.restart()
+    if lexer == "stream":
+        streamLexer = StreamLexer(code)
+        tokens = streamLexer.iterTokens()
+        if report is not None:
+            tokens = report.countTokens(tokens)
+    else:
+        tokens, err = Lexer(code).makeTokens()
         if err:
             return None, err
+        if report is not None:
+            report.tokenCount = len(tokens)
+            report.mark("lex")
+    if DEBUG:
+        tokens = list(tokens)
+        print("Tokens:")
+        print(tokens)
+        print()
+    parser = Parser(tokens, lazy)
+    ast, err = None, None
+    try:
+        ast = parser.parseTokens()
+    except Error as e:
+        err = e
+    if lexer == "stream":
+        # Lex whatever the parser did not need, so illegal characters are still reported
+        for _ in tokens:
+            pass
+        if streamLexer.error:
+            return None, streamLexer.error
+    if err:
+        return None, err
+    # The stream lexer runs inside the parser, so its time is part of parsing
+    if report is not None:
+        report.mark("parse")
+        report.countNodes(ast)
+        report.restart()
+    if DEBUG:
+        print("AST:")
+        print(ast)
+        print()
+    if optimize > 0:
+        # Inlining needs the bodies a lazy parser skipped
+        ast = Optimizer(min(optimize, 1) if lazy else optimize, scoping == "lexical", maxString).optimize(ast)
         if DEBUG:
-            print("Tokens:")
-            print(tokens)
+            print("Optimized AST:")
+            print(ast)
             print()
-        parser = Parser(tokens)
-        ast, err = parser.parseTokens()
-        if err:
-            return None, err
+        if report is not None:
+            report.mark("optimize")
+    if scoping == "lexical":
+        Resolver().resolve(ast)
+        if report is not None:
+            report.mark("resolve")
+    if lazy:
+        # Types and purity are proven over every body, and most bodies of a lazily parsed program are never parsed
+        return ast, None
+    if optimize > 0:
+        specialized = checkTypes(ast, scoping == "lexical", exported)
         if DEBUG:
-            print("AST:")
-            print(ast)
+            print("Specialized operations:")
+            print(specialized)
+            print()
+        if report is not None:
+            report.mark("typecheck")
+    if memoize:
+        pure = markPureFunctions(ast, scoping == "lexical")
+        if DEBUG:
+            print("Pure functions:")
+            print(sorted(pure))
             print()
-        interpreter = Interpreter(ast)
-        res, err = interpreter.interpret()
+        if report is not None:
+            report.mark("analyze")
+    return ast, None
+
+def prepareCached(code: str, lexer: str = "classic", scoping: str = "dynamic", optimize: int = 1, memoize: bool = True, cache: Optional[ProgramCache] = None, report: Optional[RunReport] = None, exported: bool = False, lazy: bool = False, maxString: Optional[int] = None) -> Tuple[Optional[ProgramNode], Optional[Error]]:
+    if cache is None:
+        return prepare(code, lexer, scoping, optimize, memoize, report, exported, lazy, maxString)
+    # The lexer only changes how the tree is built, not the tree itself
+    key = cacheKey(code, {"scoping": scoping, "optimize": optimize, "memoize": memoize, "exported": exported, "lazy": lazy, "maxString": maxString})
+    ast = cache.load(key)
+    if report is not None:
+        report.mark("load")
+    if ast is not None:
+        return ast, None
+    ast, err = prepare(code, lexer, scoping, optimize, memoize, report, exported, lazy, maxString)
+    if err:
+        return None, err
+    cache.store(key, ast)
+    if report is not None:
+        report.mark("store")
+    return ast, None
+
+def compile(code: str, backend: str = "interpreter", lexer: str = "classic", scoping: str = "dynamic", optimize: int = 1, memoize: bool = True, memoSize: int = 1024, cache: Optional[ProgramCache] = None, output: Optional[OutputSink] = None, input: Optional[InputSource] = None) -> Tuple[Optional[Program], Optional[Error]]:
+    # A program's functions can be called from Python with anything, so nothing is assumed about their parameters
+    ast, err = prepareCached(code, lexer, scoping, optimize, memoize, cache, exported=True)
+    if err:
+        return None, err
+    return Program(ast, backend, memoSize, output, input), None
+
+def run(code: str, backend: str = "interpreter", lexer: str = "classic", scoping: str = "dynamic", optimize: int = 1, memoize: bool = True, memoSize: int = 1024, memoCaches: Optional[Dict[str, MemoCache]] = None, cache: Optional[ProgramCache] = None, profiler: Optional[Profiler] = None, report: Optional[RunReport] = None, output: Optional[OutputSink] = None, input: Optional[InputSource] = None, budget: Optional[Budget] = None, coverage: Optional[Coverage] = None, lazy: bool = False) -> Tuple[Optional[Value], Optional[Error]]:
+    if budget is not None and backend != "interpreter":
+        raise ValueError(f"Budgets are enforced by the interpreter backend, not {backend}")
+    if coverage is not None and backend != "interpreter":
+        raise ValueError(f"Coverage is collected by the interpreter backend, not {backend}")
+    if budget is not None and coverage is not None:
+        raise ValueError("A run can have a budget or collect coverage, not both")
+    if lazy and backend != "interpreter":
+        raise ValueError(f"Bodies are parsed on their first call by the interpreter backend, not {backend}")
+    if lazy and coverage is not None:
+        raise ValueError("Coverage is collected over every body, which a lazy run does not parse")
+    if coverage is not None:
+        # The optimizer drops branches that can never run, and coverage has to report them as never executed
+        optimize = 0
+    if output is None:
+        output = StdoutSink()
+    if input is None:
+        input = PromptSource(output)
+    try:
+        if report is not None:
+            report.start()
+        # Strings the optimizer builds count against the budget like the ones built at runtime
+        maxString = budget.maxString if budget is not None else None
+        ast, err = prepareCached(code, lexer, scoping, optimize, memoize, cache, report, lazy=lazy, maxString=maxString)
+        if err:
+            return None, err
+        if profiler is not None:
+            profiler.addDefinitions(ast)
+        if coverage is not None:
+            coverage.addProgram(ast, code)
+        if backend == "vm":
+            program = Compiler().compileProgram(ast)
+            if DEBUG:
+                print("Bytecode:")
+                print(program.disassemble())
+                print()
+            if report is not None:
+                report.mark("compile")
+            runner = VM(program, memoSize=memoSize, profiler=profiler, output=output, input=input)
+        elif backend == "python":
+            program = Transpiler().transpileProgram(ast)
+            if DEBUG:
+                print("Python:")
+                print(program.disassemble())
+                print()
+            if report is not None:
+                report.mark("compile")
+            runner = PythonRunner(program, memoSize=memoSize, profiler=profiler, output=output, input=input)
+        elif budget is not None:
+            runner = BudgetedInterpreter(ast, budget, memoSize=memoSize, profiler=profiler, output=output, input=input)
+        elif coverage is not None:
+            runner = CoveringInterpreter(ast, coverage, memoSize=memoSize, profiler=profiler, output=output, input=input)
+        else:
+            runner = Interpreter(ast, memoSize=memoSize, profiler=profiler, output=output, input=input)
+        if lazy:
+            runner.bodyLoader = BodyLoader(optimize, scoping == "lexical", maxString)
+        res, err = None, None
+        try:
+            res = runner.interpret() if backend == "interpreter" else runner.run()
+        except Error as e:
+            # Errors unwind the whole run at once and only become a value again here
+            err = e
+        output.flush()
+        if report is not None:
+            report.mark("execute")
+        if profiler is not None:
+            profiler.finish()
+        if memoCaches is not None:
+            memoCaches.update(runner.memoCaches)
         if err:
             return None, err
         return res, None
     except KeyboardInterrupt:
+        output.flush()
         print("KeyboardInterrupt")
-        return None, None
\ No newline at end of file
+        return None, None
+    finally:
+        # Whatever was printed before an error or a crash is still written
+        output.flush()
+        if report is not None:
+            report.stop()
+
+async def runAsync(code: str, lexer: str = "classic", scoping: str = "dynamic", optimize: int = 1, memoize: bool = True, memoSize: int = 1024, sliceSize: int = 1000, memoCaches: Optional[Dict[str, MemoCache]] = None, cache: Optional[ProgramCache] = None, profiler: Optional[Profiler] = None, report: Optional[RunReport] = None, output: Optional[OutputSink] = None, input: Optional[Union[InputSource, AsyncInputSource]] = None) -> Tuple[Optional[Value], Optional[Error]]:
+    # Only the VM keeps its whole state outside the Python stack, so it is the one backend a run can pause in and resume
+    if output is None:
+        output = StdoutSink()
+    try:
+        if report is not None:
+            report.start()
+        ast, err = prepareCached(code, lexer, scoping, optimize, memoize, cache, report)
+        if err:
+            return None, err
+        if profiler is not None:
+            profiler.addDefinitions(ast)
+        program = Compiler().compileProgram(ast)
+        if report is not None:
+            report.mark("compile")
+        runner = AsyncRunner(program, memoSize=memoSize, sliceSize=sliceSize, profiler=profiler, output=output, input=input)
+        res, err = None, None
+        try:
+            res = await runner.run()
+        except Error as e:
+            err = e
+        if isinstance(output, AsyncOutputSink):
+            await output.drain()
+        if report is not None:
+            report.mark("execute")
+        if profiler is not None:
+            profiler.finish()
+        if memoCaches is not None:
+            memoCaches.update(runner.memoCaches)
+        if err:
+            return None, err
+        return res, None
+    finally:
+        output.flush()
+        if report is not None:
+            report.stop()
\ No newline at end of file
@@ -0,0 +1,50 @@
+from __future__ import annotations
+from typing import Dict, Optional, Union
+
+import asyncio
+
+from languageCompiler import Code
+from languageInterpreter import Context, inputValue
+from languageVM import VM
+from languageMemo import MemoCache
+from languageProfiler import Profiler
+from languageIO import OutputSink, StdoutSink, AsyncOutputSink, InputSource, AsyncInputSource, IterableSource
+from values import Value
+
+class AsyncRunner:
+    def __init__(self, code: Code, context: Optional[Context] = None, memoSize: int = 1024, sliceSize: int = 1000, profiler: Optional[Profiler] = None, output: Optional[OutputSink] = None, input: Optional[Union[InputSource, AsyncInputSource]] = None):
+        if sliceSize < 1:
+            raise ValueError(f"Slice size must be at least 1, got {sliceSize}")
+        self.output: OutputSink = output if output is not None else StdoutSink()
+        # A prompt would block the whole event loop, so without a source there is no input at all
+        self.input: Union[InputSource, AsyncInputSource] = input if input is not None else IterableSource(())
+        asyncInput = isinstance(self.input, AsyncInputSource)
+        self.vm: VM = VM(code, context, memoSize, profiler, self.output, None if asyncInput else self.input)
+        self.vm.sliceSize = sliceSize
+        self.vm.pauseOnInput = asyncInput
+    
+    @property
+    def memoCaches(self) -> Dict[str, MemoCache]:
+        return self.vm.memoCaches
+    
+    async def run(self) -> Optional[Value]:
+        vm = self.vm
+        while True:
+            res = vm.run()
+            if not vm.paused:
+                return res
+            node = vm.waitingFor
+            if node is None:
+                await self.drain()
+                # Draining only waits when the reader is behind, this hands the loop to the other programs every slice
+                await asyncio.sleep(0)
+            else:
+                vm.waitingFor = None
+                # Whatever the program printed before asking for input has to be out before it waits for it
+                self.output.flush()
+                await self.drain()
+                vm.stack.append(inputValue(node, await self.input.readLine()))
+    
+    async def drain(self):
+        if isinstance(self.output, AsyncOutputSink):
+            await self.output.drain()
\ No newline at end of file
@@ -0,0 +1,238 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from languageParser import *
+from error import Error, RTError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if TYPE_CHECKING:
+    from languageProgram import Function
+
+# Largest magnitude an int64 holds on both sides, anything that could reach past it is left to Python ints
+INT_LIMIT = 2**63 - 1
+
+class Column:
+    __slots__ = ("kind", "data", "bound", "present")
+    
+    def __init__(self, kind: Optional[str], data: Any, bound: int = 0, present: Any = None):
+        # kind is "int" or "float", or None for a column that is None on every row
+        self.kind: Optional[str] = kind
+        self.data: Any = data
+        # Upper bound of the magnitude of every int in data
+        self.bound: int = bound
+        # Rows whose value is not None, None when that is every row
+        self.present: Any = present
+    
+    def __repr__(self) -> str:
+        return f"Column [{self.kind}, bound={self.bound}]"
+
+def toColumn(column: Any) -> Optional[Column]:
+    if isinstance(column, np.ndarray):
+        if column.dtype.kind in "iu":
+            bound = max(-int(column.min()), int(column.max())) if column.size else 0
+            if bound > INT_LIMIT:
+                return None
+            return Column("int", column.astype(np.int64, copy=False), bound)
+        if column.dtype.kind == "f":
+            return Column("float", column.astype(np.float64, copy=False))
+        return None
+    # A Python sequence keeps the type of each element, so only a uniform one maps onto one dtype
+    types = set(map(type, column))
+    if types == {int}:
+        bound = max(map(abs, column))
+        if bound > INT_LIMIT:
+            return None
+        return Column("int", np.array(column, dtype=np.int64), bound)
+    if types == {float}:
+        return Column("float", np.array(column, dtype=np.float64))
+    return None
+
+class Vectorizer:
+    def __init__(self, params: Dict[str, Column], size: int):
+        self.params: Dict[str, Column] = params
+        self.size: int = size
+    
+    def vectorize(self, body: List[Node]) -> Optional[Any]:
+        with np.errstate(all="ignore"):
+            res = self.visitBody(body, None)
+        # Rows that return None cannot be stored in a numeric array
+        if res is None or res.kind is None or (res.present is not None and not res.present.all()):
+            return None
+        return np.broadcast_to(res.data, (self.size,)).copy()
+    
+    def visit(self, node: Node, active: Any) -> Optional[Column]:
+        methodName = f"visit{type(node).__name__}"
+        method = getattr(self, methodName, self.noVisitMethod)
+        return method(node, active)
+    
+    def noVisitMethod(self, node: Node, active: Any) -> Optional[Column]:
+        # Anything with side effects, calls or strings is run row by row
+        return None
+    
+    def visitBody(self, exprNodes: List[Node], active: Any) -> Optional[Column]:
+        # Like a function body, the last expression that is not None on a row gives that row's result
+        res = Column(None, None, 0, np.zeros(self.size, dtype=bool))
+        for expr in exprNodes:
+            column = self.visit(expr, active)
+            if column is None:
+                return None
+            res = self.merge(res, column)
+            if res is None:
+                return None
+        return res
+    
+    def merge(self, res: Column, column: Column) -> Optional[Column]:
+        if column.present is None:
+            return column
+        if column.kind is None:
+            return res
+        if res.kind is None:
+            return Column(column.kind, column.data, column.bound, column.present | res.present)
+        if res.kind != column.kind:
+            return None
+        present = None if res.present is None else column.present | res.present
+        return Column(column.kind, np.where(column.present, column.data, res.data), max(res.bound, column.bound), present)
+    
+    def visitIntNode(self, node: IntNode, active: Any) -> Optional[Column]:
+        if abs(node.value) > INT_LIMIT:
+            return None
+        return Column("int", np.int64(node.value), abs(node.value))
+    
+    def visitFloatNode(self, node: FloatNode, active: Any) -> Optional[Column]:
+        return Column("float", np.float64(node.value))
+    
+    def visitVarAccessNode(self, node: VarAccessNode, active: Any) -> Optional[Column]:
+        return self.params.get(node.varName)
+    
+    def operands(self, node: Node, active: Any) -> Tuple[Optional[Column], Optional[Column]]:
+        left = self.visit(node.leftNode, active)
+        right = self.visit(node.rightNode, active)
+        # Arithmetic on a value that may be None, or on an int and a float, is left to the row by row path and its errors
+        if left is None or right is None or left.present is not None or right.present is not None or left.kind != right.kind:
+            return None, None
+        return left, right
+    
+    def arithmetic(self, kind: str, data: Any, bound: int) -> Optional[Column]:
+        if kind == "int" and bound > INT_LIMIT:
+            return None
+        return Column(kind, data, bound)
+    
+    def divisor(self, right: Column, active: Any) -> Optional[Any]:
+        zeros = right.data == 0
+        # A zero divisor on a row that is evaluated is an error the row by row path reports
+        if np.any(zeros if active is None else zeros & active):
+            return None
+        return np.where(zeros, 1, right.data) if right.kind == "int" else right.data
+    
+    def visitPlusNode(self, node: PlusNode, active: Any) -> Optional[Column]:
+        left, right = self.operands(node, active)
+        if left is None:
+            return None
+        return self.arithmetic(left.kind, left.data + right.data, left.bound + right.bound)
+    
+    def visitMinusNode(self, node: MinusNode, active: Any) -> Optional[Column]:
+        left, right = self.operands(node, active)
+        if left is None:
+            return None
+        return self.arithmetic(left.kind, left.data - right.data, left.bound + right.bound)
+    
+    def visitMulNode(self, node: MulNode, active: Any) -> Optional[Column]:
+        left, right = self.operands(node, active)
+        if left is None:
+            return None
+        return self.arithmetic(left.kind, left.data * right.data, left.bound * right.bound)
+    
+    def visitDivNode(self, node: DivNode, active: Any) -> Optional[Column]:
+        left, right = self.operands(node, active)
+        if left is None:
+            return None
+        divisor = self.divisor(right, active)
+        if divisor is None:
+            return None
+        # Floor division never grows the magnitude of an int
+        if left.kind == "int":
+            return self.arithmetic("int", np.floor_divide(left.data, divisor), left.bound)
+        return self.arithmetic("float", np.true_divide(left.data, divisor), 0)
+    
+    def visitModNode(self, node: ModNode, active: Any) -> Optional[Column]:
+        left, right = self.operands(node, active)
+        if left is None:
+            return None
+        divisor = self.divisor(right, active)
+        if divisor is None:
+            return None
+        # np.remainder takes the sign of the divisor, the same as Python's %
+        return self.arithmetic(left.kind, np.remainder(left.data, divisor), right.bound)
+    
+    def comparison(self, node: Node, active: Any, compare: Any, mismatch: bool) -> Optional[Column]:
+        left = self.visit(node.leftNode, active)
+        right = self.visit(node.rightNode, active)
+        if left is None or right is None or left.present is not None or right.present is not None:
+            return None
+        # Values of different types never compare, except as not equal
+        if left.kind != right.kind:
+            cond = np.full(self.size, mismatch)
+        else:
+            cond = np.broadcast_to(compare(left.data, right.data), (self.size,))
+        branchActive = cond if active is None else cond & active
+        res = Column(None, None, 0, np.zeros(self.size, dtype=bool))
+        # A branch evaluates to its last expression, even when that one is None
+        for expr in node.exprNodes:
+            res = self.visit(expr, branchActive)
+            if res is None:
+                return None
+        if res.kind is None:
+            return Column(None, None, 0, np.zeros(self.size, dtype=bool))
+        present = cond if res.present is None else cond & res.present
+        return Column(res.kind, res.data, res.bound, present)
+    
+    def visitEqualNode(self, node: EqualNode, active: Any) -> Optional[Column]:
+        return self.comparison(node, active, np.equal, False)
+    
+    def visitNotEqualNode(self, node: NotEqualNode, active: Any) -> Optional[Column]:
+        return self.comparison(node, active, np.not_equal, True)
+    
+    def visitLessThanNode(self, node: LessThanNode, active: Any) -> Optional[Column]:
+        return self.comparison(node, active, np.less, False)
+    
+    def visitGreaterThanNode(self, node: GreaterThanNode, active: Any) -> Optional[Column]:
+        return self.comparison(node, active, np.greater, False)
+
+def vectorize(function: Function, columns: Sequence[Any], size: int) -> Optional[Any]:
+    params = {}
+    for paramName, column in zip(function.value.paramNames, columns):
+        param = toColumn(column)
+        if param is None:
+            return None
+        params[paramName] = param
+    return Vectorizer(params, size).vectorize(function.value.value)
+
+def callBatch(function: Function, columns: Sequence[Sequence[Any]]) -> Tuple[Any, Optional[Error]]:
+    if len(columns) != len(function.value.paramNames):
+        return None, RTError(function.value.startPos, function.value.endPos, f"{function.name} takes {len(function.value.paramNames)} arguments, got {len(columns)} columns")
+    if not columns:
+        return None, RTError(function.value.startPos, function.value.endPos, f"{function.name} takes no arguments, there is nothing to batch")
+    size = len(columns[0])
+    if any(len(column) != size for column in columns):
+        return None, RTError(None, None, f"Columns of {function.name} have different lengths")
+    if np is not None:
+        res = vectorize(function, columns, size)
+        if res is not None:
+            return res, None
+    results = []
+    rows = zip(*(column.tolist() if hasattr(column, "tolist") else column for column in columns))
+    for row in rows:
+        res, err = function.call(*row)
+        if err:
+            return None, err
+        results.append(res)
+    if np is not None:
+        # Only results that all share one numeric type, and fit it, go into a typed array
+        types = set(map(type, results))
+        numeric = types == {float} or (types == {int} and max(map(abs, results)) <= INT_LIMIT)
+        return np.array(results, dtype=None if numeric else object), None
+    return results, None
\ No newline at end of file
@@ -0,0 +1,106 @@
+from __future__ import annotations
+from typing import Optional
+
+import time
+
+from languageParser import Node, PlusNode, MulNode, CallNode
+from languageInterpreter import Context, Interpreter
+from languageProfiler import Profiler
+from languageIO import OutputSink, InputSource
+from values import Value, IntValue, StringValue
+from error import BudgetError
+
+# Nodes evaluated between two checks of the node count and the clock
+CHECK_INTERVAL = 1024
+
+class Budget:
+    def __init__(self, maxNodes: Optional[int] = None, maxDepth: Optional[int] = None, maxTime: Optional[float] = None, maxString: Optional[int] = None):
+        for name, limit in (("maxNodes", maxNodes), ("maxDepth", maxDepth), ("maxTime", maxTime), ("maxString", maxString)):
+            if limit is not None and limit < 0:
+                raise ValueError(f"{name} cannot be negative, got {limit}")
+        self.maxNodes: Optional[int] = maxNodes
+        self.maxDepth: Optional[int] = maxDepth
+        # Seconds of wall-clock time
+        self.maxTime: Optional[float] = maxTime
+        # Characters in a string built by + or *
+        self.maxString: Optional[int] = maxString
+    
+    def __repr__(self) -> str:
+        limits = [f"{name} {limit}" for name, limit in (("nodes", self.maxNodes), ("depth", self.maxDepth), ("time", self.maxTime), ("string", self.maxString)) if limit is not None]
+        return f"Budget [{', '.join(limits) or 'unlimited'}]"
+
+class BudgetedInterpreter(Interpreter):
+    def __init__(self, ast: Optional[Node], budget: Budget, memoSize: int = 1024, profiler: Optional[Profiler] = None, output: Optional[OutputSink] = None, input: Optional[InputSource] = None):
+        super().__init__(ast, memoSize, profiler, output, input)
+        self.budget: Budget = budget
+        self.evaluated: int = 0
+        self.depth: int = 0
+        self.deadline: Optional[float] = None
+        self.batch: int = self.nextBatch()
+        self.countdown: int = self.batch
+    
+    def interpret(self) -> Optional[Value]:
+        if self.budget.maxTime is not None:
+            self.deadline = time.perf_counter() + self.budget.maxTime
+        return super().interpret()
+    
+    def nextBatch(self) -> int:
+        # The batch never runs past the node limit, so the node that goes over it is the one that reports it
+        if self.budget.maxNodes is None:
+            return CHECK_INTERVAL
+        return min(CHECK_INTERVAL, self.budget.maxNodes + 1 - self.evaluated)
+    
+    def visit(self, node: Node, context: Context) -> Optional[Value]:
+        # One decrement per node, everything else waits until the countdown runs out
+        self.countdown -= 1
+        if self.countdown <= 0:
+            self.checkpoint(node)
+        method = self.methods.get(type(node))
+        if method is None:
+            method = self.methods[type(node)] = getattr(self, f"visit{type(node).__name__}", self.noVisitMethod)
+        return method(node, context)
+    
+    def checkpoint(self, node: Node):
+        self.evaluated += self.batch
+        budget = self.budget
+        if budget.maxNodes is not None and self.evaluated > budget.maxNodes:
+            raise BudgetError(node.startPos, node.endPos, "nodes", budget.maxNodes, f"Node budget of {budget.maxNodes} evaluated nodes exceeded")
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise BudgetError(node.startPos, node.endPos, "time", budget.maxTime, f"Time budget of {budget.maxTime}s exceeded")
+        self.batch = self.countdown = self.nextBatch()
+    
+    def visitCallNode(self, node: CallNode, context: Context) -> Optional[Value]:
+        # A tail call replaces the caller's activation, so only the others make the call stack deeper
+        maxDepth = self.budget.maxDepth
+        if node.isTail or maxDepth is None:
+            return super().visitCallNode(node, context)
+        if self.depth >= maxDepth:
+            raise BudgetError(node.startPos, node.endPos, "depth", maxDepth, f"Call depth budget of {maxDepth} exceeded")
+        self.depth += 1
+        try:
+            return super().visitCallNode(node, context)
+        finally:
+            self.depth -= 1
+    
+    def checkString(self, node: Node, length: int):
+        maxString = self.budget.maxString
+        if length > maxString:
+            raise BudgetError(node.startPos, node.endPos, "string", maxString, f"String of {length} characters exceeds the budget of {maxString}")
+    
+    def visitPlusNode(self, node: PlusNode, context: Context) -> Optional[Value]:
+        left = self.visit(node.leftNode, context)
+        right = self.visit(node.rightNode, context)
+        assert(left is not None and right is not None)
+        # The size is checked before the string is built, which is what the budget has to prevent
+        if type(left) is StringValue and type(right) is StringValue and self.budget.maxString is not None:
+            self.checkString(node, left.length() + right.length())
+        return left.add(right)
+    
+    def visitMulNode(self, node: MulNode, context: Context) -> Optional[Value]:
+        left = self.visit(node.leftNode, context)
+        right = self.visit(node.rightNode, context)
+        assert(left is not None)
+        assert(right is not None)
+        if type(left) is StringValue and type(right) is IntValue and self.budget.maxString is not None:
+            self.checkString(node, left.length() * max(right.value, 0))
+        return left.mul(right)
\ No newline at end of file
@@ -0,0 +1,106 @@
+from __future__ import annotations
+from typing import Optional, Dict, Any
+
+import gc
+import hashlib
+import os
+import pickle
+import sys
+
+from languageParser import ProgramNode
+
+CACHE_DIR_NAME = "__funkecache__"
+CACHE_FORMAT = 1
+
+# Every module whose source decides what the front end produces, or what a cached tree means
+FRONT_END_MODULES = ("tokens", "error", "values", "languageLexer", "languageParser", "languageOptimizer", "languageResolver", "languageTypes", "languageMemo", "languageCache")
+
+interpreterHash: Optional[str] = None
+
+def interpreterVersion() -> str:
+    global interpreterHash
+    if interpreterHash is None:
+        digest = hashlib.sha256(f"{CACHE_FORMAT} {sys.version}".encode())
+        for moduleName in FRONT_END_MODULES:
+            __import__(moduleName)
+            with open(sys.modules[moduleName].__file__, "rb") as f:
+                digest.update(f.read())
+        interpreterHash = digest.hexdigest()
+    return interpreterHash
+
+def cacheKey(code: str, options: Dict[str, Any]) -> str:
+    # The options get a part of their own, so entries for other options of the same source are told apart from stale ones
+    optionsDigest = hashlib.sha256(repr(sorted(options.items())).encode())
+    digest = hashlib.sha256(interpreterVersion().encode())
+    digest.update(repr(sorted(options.items())).encode())
+    digest.update(code.encode())
+    return f"{optionsDigest.hexdigest()[:16]}.{digest.hexdigest()}"
+
+class ProgramCache:
+    def __init__(self, directory: str, name: str = "program"):
+        self.directory: str = directory
+        self.name: str = name
+        self.hits: int = 0
+        self.misses: int = 0
+    
+    @staticmethod
+    def forScript(path: str, directory: Optional[str] = None) -> ProgramCache:
+        scriptDirectory, fileName = os.path.split(os.path.abspath(path))
+        if directory is None:
+            directory = os.path.join(scriptDirectory, CACHE_DIR_NAME)
+        # The whole file name, so scripts that only differ in their extension keep apart
+        return ProgramCache(directory, fileName)
+    
+    def pathFor(self, key: str) -> str:
+        options, digest = key.split(".")
+        return os.path.join(self.directory, f"{self.name}.{options}.{digest[:32]}.pickle")
+    
+    def load(self, key: str) -> Optional[ProgramNode]:
+        # Unpickling creates every node at once, and the collector would otherwise walk them over and over
+        gcEnabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.pathFor(key), "rb") as f:
+                storedKey, ast = pickle.load(f)
+        except Exception:
+            # A file that cannot be read back, however it fails, is only a miss
+            self.misses += 1
+            return None
+        finally:
+            if gcEnabled:
+                gc.enable()
+        if storedKey != key or not isinstance(ast, ProgramNode):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ast
+    
+    def store(self, key: str, ast: ProgramNode):
+        path = self.pathFor(key)
+        tmpPath = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmpPath, "wb") as f:
+                pickle.dump((key, ast), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpPath, path)
+        except (OSError, pickle.PicklingError, RecursionError):
+            # The cache is only an accelerator, a program that cannot be stored still runs
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            return
+        self.removeStale(key, path)
+    
+    def removeStale(self, key: str, current: str):
+        # Entries for older versions of the same source with the same options can never be hit again
+        prefix = f"{self.name}.{key.split('.')[0]}."
+        for fileName in os.listdir(self.directory):
+            path = os.path.join(self.directory, fileName)
+            rest = fileName[len(prefix):]
+            if fileName.startswith(prefix) and rest.endswith(".pickle") and len(rest) == 32 + len(".pickle") and path != current:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    
+    def __repr__(self) -> str:
+        return f"ProgramCache [{self.directory}, {self.name}, hits={self.hits}, misses={self.misses}]"
\ No newline at end of file
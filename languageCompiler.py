@@ -0,0 +1,193 @@
+from __future__ import annotations
+from typing import List, Tuple, Any, Optional, NoReturn
+
+from languageParser import Node, ProgramNode, AssignNode, VarAssignNode, VarAccessNode, IntNode, FloatNode, StringNode, InputNode, PrintNode, PlusNode, MinusNode, MulNode, DivNode, ModNode, EqualNode, LessThanNode, GreaterThanNode, NotEqualNode, CallNode, RandNode
+from values import IntValue, FloatValue, StringValue
+
+OP_LOAD_CONST = 0
+OP_LOAD_NAME = 1
+OP_STORE_NAME = 2
+OP_POP = 3
+OP_MERGE = 4
+OP_JUMP = 5
+OP_JUMP_IF_NOT_EQ = 6
+OP_JUMP_IF_NOT_LT = 7
+OP_JUMP_IF_NOT_GT = 8
+OP_JUMP_IF_NOT_NE = 9
+OP_ADD = 10
+OP_SUB = 11
+OP_MUL = 12
+OP_DIV = 13
+OP_MOD = 14
+OP_LOAD_FUNC = 15
+OP_CALL = 16
+OP_RETURN = 17
+OP_PRINT = 18
+OP_INPUT = 19
+OP_RAND = 20
+OP_MAKE_FUNCTION = 21
+OP_TAIL_CALL = 22
+OP_LOAD_FAST = 23
+OP_STORE_FAST = 24
+OP_APPLY = 25
+OP_JUMP_UNLESS = 26
+
+OP_NAMES = {value: name[3:] for name, value in dict(globals()).items() if name.startswith("OP_")}
+
+Instruction = Tuple[int, Any]
+
+class Code:
+    def __init__(self, name: str, params: List[str], node: Optional[Node] = None):
+        self.name: str = name
+        self.params: List[str] = params
+        self.node: Optional[Node] = node
+        self.numSlots: Optional[int] = None
+        self.instructions: List[Instruction] = []
+        self.nodes: List[Optional[Node]] = []
+    
+    def emit(self, op: int, arg: Any = None, node: Optional[Node] = None) -> int:
+        self.instructions.append((op, arg))
+        self.nodes.append(node)
+        return len(self.instructions) - 1
+    
+    def patch(self, idx: int, arg: Any):
+        self.instructions[idx] = (self.instructions[idx][0], arg)
+    
+    def disassemble(self) -> str:
+        lines = [f"Code {self.name}({', '.join(self.params)}):"]
+        for i, (op, arg) in enumerate(self.instructions):
+            if isinstance(arg, Code):
+                arg = f"<Code {arg.name}>"
+            elif op == OP_APPLY:
+                arg = f"<{arg.__name__}>"
+            elif op == OP_JUMP_UNLESS:
+                arg = (f"<{arg[0].__name__}>", arg[1])
+            lines.append(f"{i:>6} {OP_NAMES[op]:<16} {'' if arg is None else repr(arg)}")
+        for op, arg in self.instructions:
+            if isinstance(arg, Code):
+                lines.append("")
+                lines.append(arg.disassemble())
+        return "\n".join(lines)
+    
+    def __repr__(self) -> str:
+        return f"<Code {self.name}>"
+
+class Compiler:
+    def compileProgram(self, ast: Node) -> Code:
+        code = Code("<program>", [], ast)
+        self.compile(ast, code)
+        code.emit(OP_RETURN)
+        return code
+    
+    def compile(self, node: Node, code: Code):
+        methodName = f"compile{type(node).__name__}"
+        method = getattr(self, methodName, self.noCompileMethod)
+        method(node, code)
+    
+    def noCompileMethod(self, node: Node, code: Code) -> NoReturn:
+        raise Exception(f"No compile{type(node).__name__} method defined")
+    
+    def compileProgramNode(self, node: ProgramNode, code: Code):
+        for i, inst in enumerate(node.nodes):
+            if i > 0:
+                code.emit(OP_POP)
+            self.compile(inst, code)
+    
+    def compileAssignNode(self, node: AssignNode, code: Code):
+        funcCode = Code(node.funcName, node.params, node)
+        funcCode.numSlots = node.numSlots
+        funcCode.emit(OP_LOAD_CONST, None)
+        for expr in node.exprNodes:
+            self.compile(expr, funcCode)
+            funcCode.emit(OP_MERGE)
+        funcCode.emit(OP_RETURN)
+        code.emit(OP_MAKE_FUNCTION, funcCode, node)
+    
+    def compileVarAssignNode(self, node: VarAssignNode, code: Code):
+        self.compile(node.value, code)
+        if node.slot is not None:
+            code.emit(OP_STORE_FAST, node.slot, node)
+        else:
+            code.emit(OP_STORE_NAME, node.varName, node)
+    
+    def compileVarAccessNode(self, node: VarAccessNode, code: Code):
+        if node.slot is not None:
+            code.emit(OP_LOAD_FAST, node.slot, node)
+        else:
+            code.emit(OP_LOAD_NAME, node.varName, node)
+    
+    def compileIntNode(self, node: IntNode, code: Code):
+        code.emit(OP_LOAD_CONST, node.constant if node.constant is not None else IntValue(node.value, node.startPos, node.endPos), node)
+    
+    def compileFloatNode(self, node: FloatNode, code: Code):
+        code.emit(OP_LOAD_CONST, node.constant if node.constant is not None else FloatValue(node.value, node.startPos, node.endPos), node)
+    
+    def compileStringNode(self, node: StringNode, code: Code):
+        code.emit(OP_LOAD_CONST, node.constant if node.constant is not None else StringValue(node.value, node.startPos, node.endPos), node)
+    
+    def compileInputNode(self, node: InputNode, code: Code):
+        code.emit(OP_INPUT, None, node)
+    
+    def compilePrintNode(self, node: PrintNode, code: Code):
+        self.compile(node.node, code)
+        code.emit(OP_PRINT, None, node)
+    
+    def compileBinary(self, op: int, node: Node, code: Code):
+        self.compile(node.leftNode, code)
+        self.compile(node.rightNode, code)
+        if node.operation is not None:
+            code.emit(OP_APPLY, node.operation, node)
+        else:
+            code.emit(op, None, node)
+    
+    def compilePlusNode(self, node: PlusNode, code: Code):
+        self.compileBinary(OP_ADD, node, code)
+    
+    def compileMinusNode(self, node: MinusNode, code: Code):
+        self.compileBinary(OP_SUB, node, code)
+    
+    def compileMulNode(self, node: MulNode, code: Code):
+        self.compileBinary(OP_MUL, node, code)
+    
+    def compileDivNode(self, node: DivNode, code: Code):
+        self.compileBinary(OP_DIV, node, code)
+    
+    def compileModNode(self, node: ModNode, code: Code):
+        self.compileBinary(OP_MOD, node, code)
+    
+    def compileComparison(self, op: int, node: Node, code: Code):
+        self.compile(node.leftNode, code)
+        self.compile(node.rightNode, code)
+        jumpIdx = code.emit(op if node.operation is None else OP_JUMP_UNLESS, None, node)
+        for i, inst in enumerate(node.exprNodes):
+            if i > 0:
+                code.emit(OP_POP)
+            self.compile(inst, code)
+        endIdx = code.emit(OP_JUMP)
+        target = code.emit(OP_LOAD_CONST, None)
+        # A specialized comparison carries the operation it compares with along with where it jumps
+        code.patch(jumpIdx, target if node.operation is None else (node.operation, target))
+        code.patch(endIdx, len(code.instructions))
+    
+    def compileEqualNode(self, node: EqualNode, code: Code):
+        self.compileComparison(OP_JUMP_IF_NOT_EQ, node, code)
+    
+    def compileLessThanNode(self, node: LessThanNode, code: Code):
+        self.compileComparison(OP_JUMP_IF_NOT_LT, node, code)
+    
+    def compileGreaterThanNode(self, node: GreaterThanNode, code: Code):
+        self.compileComparison(OP_JUMP_IF_NOT_GT, node, code)
+    
+    def compileNotEqualNode(self, node: NotEqualNode, code: Code):
+        self.compileComparison(OP_JUMP_IF_NOT_NE, node, code)
+    
+    def compileCallNode(self, node: CallNode, code: Code):
+        code.emit(OP_LOAD_FUNC, node.funcName, node)
+        for param in node.params:
+            self.compile(param, code)
+        code.emit(OP_TAIL_CALL if node.isTail else OP_CALL, len(node.params), node)
+    
+    def compileRandNode(self, node: RandNode, code: Code):
+        self.compile(node.fromNode, code)
+        self.compile(node.toNode, code)
+        code.emit(OP_RAND, None, node)
\ No newline at end of file
@@ -0,0 +1,168 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import json
+
+from languageParser import Node, ProgramNode, AssignNode, EqualNode, LessThanNode, GreaterThanNode, NotEqualNode
+from languageInterpreter import Context, Interpreter
+from languageMemo import walk
+from languageProfiler import Profiler
+from languageIO import OutputSink, InputSource
+from values import Value
+
+BRANCH_NODES = (EqualNode, LessThanNode, GreaterThanNode, NotEqualNode)
+
+# Node type name, start index and end index in the source
+Span = Tuple[str, int, int]
+
+def spanOf(node: Node) -> Optional[Span]:
+    if node.startPos is None or node.endPos is None:
+        return None
+    return (type(node).__name__, node.startPos.idx, node.endPos.idx)
+
+class Coverage:
+    def __init__(self, fileName: str = "<funke>"):
+        self.fileName: str = fileName
+        self.code: str = ""
+        self.nodes: List[Node] = []
+        # Node -> times it was evaluated, and for comparisons times its branch was taken
+        self.counts: Dict[Node, int] = {}
+        self.taken: Dict[Node, int] = {}
+        # Spans that get their own count in the listing: the comma-separated expressions of every body, and every comparison
+        self.marked: Set[Span] = set()
+    
+    def addProgram(self, ast: ProgramNode, code: str):
+        self.code = code
+        for node in walk(ast):
+            self.nodes.append(node)
+            if isinstance(node, AssignNode):
+                self.marked.update(spanOf(expr) for expr in node.exprNodes)
+            elif isinstance(node, ProgramNode):
+                self.marked.update(spanOf(expr) for expr in node.nodes if not isinstance(expr, AssignNode))
+            elif isinstance(node, BRANCH_NODES):
+                self.marked.add(spanOf(node))
+        self.marked.discard(None)
+    
+    def spans(self) -> Dict[Span, List[Any]]:
+        # Counts are reported per source span, so any two nodes built from the same source count as one
+        spans = {}
+        for node in self.nodes:
+            span = spanOf(node)
+            if span is None:
+                continue
+            entry = spans.get(span)
+            if entry is None:
+                entry = spans[span] = [node, 0, 0]
+            entry[1] += self.counts.get(node, 0)
+            entry[2] += self.taken.get(node, 0)
+        return spans
+    
+    def lineCounts(self) -> Dict[int, int]:
+        # Like gcov, a line counts as often as the node on it that ran the most
+        lines = {}
+        for node, count, _ in self.spans().values():
+            if isinstance(node, (ProgramNode, AssignNode)):
+                continue
+            line = node.startPos.line
+            lines[line] = max(lines.get(line, 0), count)
+        return lines
+    
+    def labels(self) -> Dict[int, List[Tuple[int, str]]]:
+        labels = {}
+        for span, (node, count, taken) in self.spans().items():
+            if span not in self.marked:
+                continue
+            label = f"^{taken}/{count}" if isinstance(node, BRANCH_NODES) else f"^{count}"
+            labels.setdefault(node.startPos.line, []).append((node.startPos.column, label))
+        return labels
+    
+    def formatListing(self) -> str:
+        lineCounts = self.lineCounts()
+        labels = self.labels()
+        lines = [
+            f"Coverage of {self.fileName}: ^n under an expression is how often it ran, ^t/n under a comparison how often its branch was taken",
+            f"{'count':>8}  {'line':>5}  source",
+        ]
+        prefix = " " * 17
+        for i, text in enumerate(self.code.split("\n")):
+            count = lineCounts.get(i)
+            shown = "-" if count is None else "#####" if count == 0 else str(count)
+            lines.append(f"{shown:>8}  {i + 1:>5}  {text}")
+            # Labels go on as few rows as they fit on without overlapping, left to right
+            rows = []
+            for column, label in sorted(labels.get(i, [])):
+                for j, row in enumerate(rows):
+                    if len(row) < column:
+                        rows[j] = row.ljust(column) + label
+                        break
+                else:
+                    rows.append(" " * column + label)
+            lines.extend(prefix + row for row in rows)
+        return "\n".join(lines)
+    
+    def toDict(self) -> Dict[str, Any]:
+        nodes = []
+        branches = []
+        for span, (node, count, taken) in sorted(self.spans().items(), key=lambda item: (item[0][1], item[0][2])):
+            entry = {
+                "type": span[0],
+                "line": node.startPos.line + 1,
+                "column": node.startPos.column + 1,
+                "endLine": node.endPos.line + 1,
+                "endColumn": node.endPos.column + 1,
+                "count": count,
+            }
+            nodes.append(entry)
+            if isinstance(node, BRANCH_NODES):
+                branches.append({**entry, "taken": taken, "notTaken": count - taken})
+        return {
+            "file": self.fileName,
+            "lines": {str(line + 1): count for line, count in sorted(self.lineCounts().items())},
+            "nodes": nodes,
+            "branches": branches,
+        }
+    
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.toDict(), f, indent=2)
+    
+    def __repr__(self) -> str:
+        return f"Coverage [{self.fileName}, {len(self.counts)} of {len(self.nodes)} nodes evaluated]"
+
+class CoveringInterpreter(Interpreter):
+    def __init__(self, ast: Optional[Node], coverage: Coverage, memoSize: int = 1024, profiler: Optional[Profiler] = None, output: Optional[OutputSink] = None, input: Optional[InputSource] = None):
+        super().__init__(ast, memoSize, profiler, output, input)
+        self.coverage: Coverage = coverage
+        self.counts: Dict[Node, int] = coverage.counts
+        self.taken: Dict[Node, int] = coverage.taken
+    
+    def visit(self, node: Node, context: Context) -> Optional[Value]:
+        counts = self.counts
+        counts[node] = counts.get(node, 0) + 1
+        method = self.methods.get(type(node))
+        if method is None:
+            method = self.methods[type(node)] = getattr(self, f"visit{type(node).__name__}", self.noVisitMethod)
+        return method(node, context)
+    
+    def branch(self, node: Node, context: Context, compare: str) -> Optional[Value]:
+        left = self.visit(node.leftNode, context)
+        right = self.visit(node.rightNode, context)
+        assert(left is not None and right is not None)
+        res = None
+        if getattr(left, compare)(right):
+            self.taken[node] = self.taken.get(node, 0) + 1
+            for inst in node.exprNodes:
+                res = self.visit(inst, context)
+        return res
+    
+    def visitEqualNode(self, node: EqualNode, context: Context) -> Optional[Value]:
+        return self.branch(node, context, "eq")
+    
+    def visitLessThanNode(self, node: LessThanNode, context: Context) -> Optional[Value]:
+        return self.branch(node, context, "lt")
+    
+    def visitGreaterThanNode(self, node: GreaterThanNode, context: Context) -> Optional[Value]:
+        return self.branch(node, context, "gt")
+    
+    def visitNotEqualNode(self, node: NotEqualNode, context: Context) -> Optional[Value]:
+        return self.branch(node, context, "ne")
\ No newline at end of file
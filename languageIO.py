@@ -0,0 +1,243 @@
+from __future__ import annotations
+from typing import Any, Iterable, List, Optional, TextIO
+
+from abc import ABC, abstractmethod
+import asyncio
+import sys
+
+# line: hand every write on at once; buffered: whenever bufferSize characters are waiting; end: only on flush or close
+FLUSH_POLICIES = ("line", "buffered", "end")
+
+class OutputSink(ABC):
+    def __init__(self, flushPolicy: str = "buffered", bufferSize: int = 8192):
+        if flushPolicy not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy {flushPolicy!r}")
+        self.flushPolicy: str = flushPolicy
+        self.bufferSize: int = bufferSize
+        self.buffer: List[str] = []
+        self.size: int = 0
+    
+    def write(self, text: str):
+        self.buffer.append(text)
+        self.size += len(text)
+        if self.flushPolicy == "line" or (self.flushPolicy == "buffered" and self.size >= self.bufferSize):
+            self.flush()
+    
+    def flush(self):
+        if self.buffer:
+            text = "".join(self.buffer)
+            self.buffer.clear()
+            self.size = 0
+            self.emit(text)
+    
+    @abstractmethod
+    def emit(self, text: str):
+        pass
+    
+    def close(self):
+        self.flush()
+    
+    def __enter__(self) -> OutputSink:
+        return self
+    
+    def __exit__(self, *excInfo):
+        self.close()
+
+class StdoutSink(OutputSink):
+    def __init__(self, flushPolicy: Optional[str] = None, bufferSize: int = 8192):
+        # Like Python itself, a terminal sees every line as it is printed and anything else gets blocks
+        if flushPolicy is None:
+            flushPolicy = "line" if sys.stdout.isatty() else "buffered"
+        super().__init__(flushPolicy, bufferSize)
+    
+    def emit(self, text: str):
+        # sys.stdout is looked up on every flush, so redirecting it still works
+        sys.stdout.write(text)
+        sys.stdout.flush()
+    
+    def __repr__(self) -> str:
+        return f"StdoutSink [{self.flushPolicy}]"
+
+class MemorySink(OutputSink):
+    def __init__(self, flushPolicy: str = "end", bufferSize: int = 8192):
+        super().__init__(flushPolicy, bufferSize)
+        self.chunks: List[str] = []
+    
+    def emit(self, text: str):
+        self.chunks.append(text)
+    
+    def getvalue(self) -> str:
+        self.flush()
+        return "".join(self.chunks)
+    
+    def clear(self):
+        self.buffer.clear()
+        self.size = 0
+        self.chunks.clear()
+    
+    def __repr__(self) -> str:
+        return f"MemorySink [{self.flushPolicy}, {sum(map(len, self.chunks)) + self.size} characters]"
+
+class FileSink(OutputSink):
+    def __init__(self, path: str, flushPolicy: str = "buffered", bufferSize: int = 65536, append: bool = False):
+        super().__init__(flushPolicy, bufferSize)
+        self.path: str = path
+        self.file: Optional[TextIO] = open(path, "a" if append else "w")
+    
+    def emit(self, text: str):
+        self.file.write(text)
+        if self.flushPolicy == "line":
+            self.file.flush()
+    
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+    
+    def __repr__(self) -> str:
+        return f"FileSink [{self.path}, {self.flushPolicy}]"
+
+class AsyncOutputSink(OutputSink):
+    async def drain(self):
+        # Called whenever an async run pauses, so a slow reader holds back only the program writing to it
+        self.flush()
+
+class WriterSink(AsyncOutputSink):
+    def __init__(self, writer: asyncio.StreamWriter, flushPolicy: str = "buffered", bufferSize: int = 8192, encoding: str = "utf-8"):
+        super().__init__(flushPolicy, bufferSize)
+        self.writer: asyncio.StreamWriter = writer
+        self.encoding: str = encoding
+    
+    def emit(self, text: str):
+        self.writer.write(text.encode(self.encoding))
+    
+    async def drain(self):
+        self.flush()
+        await self.writer.drain()
+    
+    def __repr__(self) -> str:
+        return f"WriterSink [{self.flushPolicy}]"
+
+class InputSource(ABC):
+    @abstractmethod
+    def readLine(self) -> Optional[str]:
+        # One line of input without its line break, or None once the input is exhausted
+        pass
+    
+    def close(self):
+        pass
+    
+    def __enter__(self) -> InputSource:
+        return self
+    
+    def __exit__(self, *excInfo):
+        self.close()
+
+class PromptSource(InputSource):
+    def __init__(self, output: Optional[OutputSink] = None, prompt: str = "> "):
+        self.output: Optional[OutputSink] = output
+        self.prompt: str = prompt
+    
+    def readLine(self) -> Optional[str]:
+        try:
+            if self.output is None:
+                return input(self.prompt)
+            # The prompt has to appear after everything printed before it
+            self.output.write(self.prompt)
+            self.output.flush()
+            return input()
+        except EOFError:
+            return None
+    
+    def __repr__(self) -> str:
+        return f"PromptSource [{self.prompt!r}]"
+
+class StreamSource(InputSource):
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream: TextIO = stream if stream is not None else sys.stdin
+    
+    def readLine(self) -> Optional[str]:
+        # readline only ever holds one buffer of the stream, so inputs of any size are read as they are needed
+        line = self.stream.readline()
+        if not line:
+            return None
+        return line[:-1] if line.endswith("\n") else line
+    
+    def __repr__(self) -> str:
+        return f"StreamSource [{getattr(self.stream, 'name', self.stream)}]"
+
+class FileSource(StreamSource):
+    def __init__(self, path: str):
+        super().__init__(open(path))
+        self.path: str = path
+    
+    def close(self):
+        self.stream.close()
+    
+    def __repr__(self) -> str:
+        return f"FileSource [{self.path}]"
+
+class IterableSource(InputSource):
+    def __init__(self, values: Iterable[Any]):
+        # Values that are not strings are read as their text, and then classified like any other line
+        self.values = iter(values)
+    
+    def readLine(self) -> Optional[str]:
+        value = next(self.values, None)
+        if value is None:
+            return None
+        return value if isinstance(value, str) else str(value)
+    
+    def __repr__(self) -> str:
+        return "IterableSource"
+
+class AsyncInputSource(ABC):
+    @abstractmethod
+    async def readLine(self) -> Optional[str]:
+        # Like InputSource.readLine, but waiting for the line lets every other task run
+        pass
+    
+    def close(self):
+        pass
+    
+    def __enter__(self) -> AsyncInputSource:
+        return self
+    
+    def __exit__(self, *excInfo):
+        self.close()
+
+class QueueSource(AsyncInputSource):
+    def __init__(self, queue: Optional[asyncio.Queue] = None):
+        # Lines are put on the queue by whoever serves the program, and None ends the input
+        self.queue: asyncio.Queue = queue if queue is not None else asyncio.Queue()
+        self.ended: bool = False
+    
+    def feed(self, line: Optional[str]):
+        self.queue.put_nowait(line)
+    
+    async def readLine(self) -> Optional[str]:
+        if self.ended:
+            return None
+        line = await self.queue.get()
+        if line is None:
+            self.ended = True
+            return None
+        return line if isinstance(line, str) else str(line)
+    
+    def __repr__(self) -> str:
+        return f"QueueSource [{self.queue.qsize()} waiting]"
+
+class ReaderSource(AsyncInputSource):
+    def __init__(self, reader: asyncio.StreamReader, encoding: str = "utf-8"):
+        self.reader: asyncio.StreamReader = reader
+        self.encoding: str = encoding
+    
+    async def readLine(self) -> Optional[str]:
+        line = (await self.reader.readline()).decode(self.encoding)
+        if not line:
+            return None
+        return line[:-1] if line.endswith("\n") else line
+    
+    def __repr__(self) -> str:
+        return "ReaderSource"
\ No newline at end of file
@@ -1,14 +1,27 @@
 from __future__ import annotations
-from typing import Tuple, Optional, NoReturn, Dict
+from typing import Callable, Tuple, Optional, NoReturn, Dict, List, Set, TYPE_CHECKING
 
 import random
 
 from languageParser import Node, ProgramNode, AssignNode, VarAssignNode, VarAccessNode, IntNode, FloatNode, StringNode, InputNode, PrintNode, PlusNode, MinusNode, MulNode, DivNode, ModNode, EqualNode, LessThanNode, GreaterThanNode, NotEqualNode, CallNode, RandNode
 from values import Value, IntValue, FloatValue, StringValue, FunctionValue
+from languageMemo import MemoCache, memoKey
+from languageProfiler import Profiler
+from languageIO import OutputSink, StdoutSink, InputSource, PromptSource
 from error import Error, RTError
 
+if TYPE_CHECKING:
+    from languageLazy import BodyLoader
+
 RuntimeResult = Tuple[Optional[Value], Optional[Error]]
 
+class TailCall:
+    __slots__ = ("func", "params")
+    
+    def __init__(self, func: Value, params: List[Value]):
+        self.func: Value = func
+        self.params: List[Value] = params
+
 class Context:
     def __init__(self, symbolTable: Optional[Dict[str, Value]] = None, parent: Optional[Context] = None):
         if symbolTable is not None:
@@ -16,6 +29,8 @@ class Context:
         else:
             self.symbolTable: Dict[str, Value] = {}
         self.parent: Optional[Context] = parent
+        # Names written while a memoized call is being recorded
+        self.writeLog: Optional[Set[str]] = None
     
     def getVar(self, varName: str) -> Optional[Value]:
         if varName in self.symbolTable:
@@ -26,6 +41,13 @@ class Context:
     
     def setVar(self, varName: str, value: Value):
         self.symbolTable[varName] = value
+        if self.writeLog is not None:
+            self.writeLog.add(varName)
+    
+    def root(self) -> Context:
+        if self.parent:
+            return self.parent.root()
+        return self
     
     def __repr__(self) -> str:
         res = f"{self.symbolTable}"
@@ -33,213 +55,306 @@ class Context:
             res += "\n" + str(self.parent)
         return res
 
+class Frame(Context):
+    def __init__(self, slots: List[Optional[Value]], parent: Context):
+        # Locals live in slots resolved ahead of time; any other name is a global of the parent
+        super().__init__(parent.symbolTable, parent)
+        self.slots: List[Optional[Value]] = slots
+    
+    def getVar(self, varName: str) -> Optional[Value]:
+        return self.parent.getVar(varName)
+    
+    def setVar(self, varName: str, value: Value):
+        self.parent.setVar(varName, value)
+    
+    def __repr__(self) -> str:
+        return f"{self.slots}\n{self.parent}"
+
+def inputValue(node: InputNode, val: Optional[str]) -> Value:
+    if val is None:
+        raise RTError(node.startPos, node.endPos, "No more input")
+    if val.isdigit():
+        return IntValue(int(val), node.startPos, node.endPos)
+    if val.replace(".", "", 1).isdigit():
+        return FloatValue(float(val), node.startPos, node.endPos)
+    return StringValue(val, node.startPos, node.endPos)
+
 class Interpreter:
-    def __init__(self, ast: Optional[Node] = None):
+    def __init__(self, ast: Optional[Node] = None, memoSize: int = 1024, profiler: Optional[Profiler] = None, output: Optional[OutputSink] = None, input: Optional[InputSource] = None):
         self.ast = ast
+        self.memoSize: int = memoSize
+        self.memoCaches: Dict[str, MemoCache] = {}
+        self.profiler: Optional[Profiler] = profiler
+        self.output: OutputSink = output if output is not None else StdoutSink("line")
+        self.input: InputSource = input if input is not None else PromptSource(self.output)
+        # Node type -> bound visit method, so the name is only built once per type
+        self.methods: Dict[type, Callable[[Node, Context], Optional[Value]]] = {}
+        # Parses the bodies a lazy parser skipped, set by whoever runs such a tree
+        self.bodyLoader: Optional[BodyLoader] = None
     
-    def interpret(self) -> RuntimeResult:
+    def interpret(self) -> Optional[Value]:
         if not self.ast:
-            return None, RTError(None, None, "No AST generated")
-        return self.visit(self.ast, Context())
+            raise RTError(None, None, "No AST generated")
+        res = self.visit(self.ast, Context())
+        self.loadFunction(res)
+        return res
+    
+    def loadFunction(self, value: Optional[Value]):
+        # A function value shows its body, so one that goes out of the program is parsed even if it was never called
+        if type(value) is FunctionValue and value.definition is not None:
+            self.bodyLoader.load(value)
     
-    def visit(self, node: Node, context: Context) -> RuntimeResult:
-        methodName = f"visit{type(node).__name__}"
-        method = getattr(self, methodName, self.noVisitMethod)
+    def visit(self, node: Node, context: Context) -> Optional[Value]:
+        method = self.methods.get(type(node))
+        if method is None:
+            method = self.methods[type(node)] = getattr(self, f"visit{type(node).__name__}", self.noVisitMethod)
         return method(node, context)
-
+    
     def noVisitMethod(self, node, context) -> NoReturn:
         raise Exception(f"No visit{type(node).__name__} method defined")
     
-    def visitProgramNode(self, node: ProgramNode, context: Context) -> RuntimeResult:
-        res, err = None, None
+    def visitProgramNode(self, node: ProgramNode, context: Context) -> Optional[Value]:
+        res = None
         for inst in node.nodes:
-            res, err = self.visit(inst, context)
-        return res, err
+            res = self.visit(inst, context)
+        return res
     
-    def visitAssignNode(self, node: AssignNode, context: Context) -> RuntimeResult:
+    def visitAssignNode(self, node: AssignNode, context: Context) -> Optional[Value]:
         f = FunctionValue(node.exprNodes, node.params, node.startPos, node.endPos)
+        f.name = node.funcName
+        f.numSlots = node.numSlots
+        if node.tokens is not None:
+            f.definition = node
+        if node.isPure and self.memoSize > 0:
+            f.memo = MemoCache(self.memoSize)
+            self.memoCaches[node.funcName] = f.memo
         context.setVar(node.funcName, f)
-        return f, None
+        return f
     
-    def visitVarAssignNode(self, node: VarAssignNode, context: Context) -> RuntimeResult:
+    def visitVarAssignNode(self, node: VarAssignNode, context: Context) -> Optional[Value]:
         varName = node.varName
-        value, err = self.visit(node.value, context)
+        value = self.visit(node.value, context)
         if value:
-            context.setVar(varName, value)
-        return value, err
+            if node.slot is not None:
+                context.slots[node.slot] = value
+            else:
+                context.setVar(varName, value)
+        return value
     
-    def visitVarAccessNode(self, node: VarAccessNode, context: Context) -> RuntimeResult:
-        value = context.getVar(node.varName)
+    def visitVarAccessNode(self, node: VarAccessNode, context: Context) -> Optional[Value]:
+        if node.slot is not None:
+            value = context.slots[node.slot]
+        else:
+            value = context.getVar(node.varName)
         if value:
-            return value, None
-        return None, RTError(node.startPos, node.endPos, f"Name '{node.varName}' is not defined")
-    
-    def visitIntNode(self, node: IntNode, context: Context) -> RuntimeResult:
-        return IntValue(node.value, node.startPos, node.endPos), None
-    
-    def visitFloatNode(self, node: FloatNode, context: Context) -> RuntimeResult:
-        return FloatValue(node.value, node.startPos, node.endPos), None
-    
-    def visitStringNode(self, node: StringNode, context: Context) -> RuntimeResult:
-        return StringValue(node.value, node.startPos, node.endPos), None
-    
-    def visitInputNode(self, node: InputNode, context: Context) -> RuntimeResult:
-        val = input("> ")
-        if val.isdigit():
-            return IntValue(int(val), node.startPos, node.endPos), None
-        if val.replace(".", "", 1).isdigit():
-            return FloatValue(float(val), node.startPos, node.endPos), None
-        return StringValue(val, node.startPos, node.endPos), None
-    
-    def visitPrintNode(self, node: PrintNode, context: Context) -> RuntimeResult:
-        res, err = self.visit(node.node, context)
-        if err:
-            return None, err
-        print(res)
-        return res, err
-    
-    def visitPlusNode(self, node: PlusNode, context: Context) -> RuntimeResult:
-        left, err = self.visit(node.leftNode, context)
-        if err:
-            return None, err
-        right, err = self.visit(node.rightNode, context)
-        if err:
-            return None, err
+            return value
+        raise RTError(node.startPos, node.endPos, f"Name '{node.varName}' is not defined")
+    
+    def visitIntNode(self, node: IntNode, context: Context) -> Optional[Value]:
+        if node.constant is None:
+            node.constant = IntValue(node.value, node.startPos, node.endPos)
+        return node.constant
+    
+    def visitFloatNode(self, node: FloatNode, context: Context) -> Optional[Value]:
+        if node.constant is None:
+            node.constant = FloatValue(node.value, node.startPos, node.endPos)
+        return node.constant
+    
+    def visitStringNode(self, node: StringNode, context: Context) -> Optional[Value]:
+        if node.constant is None:
+            node.constant = StringValue(node.value, node.startPos, node.endPos)
+        return node.constant
+    
+    def visitInputNode(self, node: InputNode, context: Context) -> Optional[Value]:
+        return inputValue(node, self.input.readLine())
+    
+    def visitPrintNode(self, node: PrintNode, context: Context) -> Optional[Value]:
+        res = self.visit(node.node, context)
+        self.loadFunction(res)
+        self.output.write(f"{res}\n")
+        return res
+    
+    def visitPlusNode(self, node: PlusNode, context: Context) -> Optional[Value]:
+        left = self.visit(node.leftNode, context)
+        right = self.visit(node.rightNode, context)
+        if node.operation is not None:
+            return node.operation(left, right)
         assert(left is not None and right is not None)
-        res, err = left.add(right)
-        return res, err
-    
-    def visitMinusNode(self, node: MinusNode, context: Context) -> RuntimeResult:
-        left, err = self.visit(node.leftNode, context)
-        if err:
-            return None, err
-        right, err = self.visit(node.rightNode, context)
-        if err:
-            return None, err
+        return left.add(right)
+    
+    def visitMinusNode(self, node: MinusNode, context: Context) -> Optional[Value]:
+        left = self.visit(node.leftNode, context)
+        right = self.visit(node.rightNode, context)
+        if node.operation is not None:
+            return node.operation(left, right)
         assert(left is not None and right is not None)
-        res, err = left.sub(right)
-        return res, err
-    
-    def visitMulNode(self, node: MulNode, context: Context) -> RuntimeResult:
-        left, err = self.visit(node.leftNode, context)
-        if err:
-            return None, err
-        right, err = self.visit(node.rightNode, context)
-        if err:
-            return None, err
+        return left.sub(right)
+    
+    def visitMulNode(self, node: MulNode, context: Context) -> Optional[Value]:
+        left = self.visit(node.leftNode, context)
+        right = self.visit(node.rightNode, context)
+        if node.operation is not None:
+            return node.operation(left, right)
         assert(left is not None)
         assert(right is not None)
-        res, err = left.mul(right)
-        return res, err
-    
-    def visitDivNode(self, node: DivNode, context: Context) -> RuntimeResult:
-        left, err = self.visit(node.leftNode, context)
-        if err:
-            return None, err
-        right, err = self.visit(node.rightNode, context)
-        if err:
-            return None, err
-        assert(left is not None and right is not None)
-        res, err = left.div(right)
-        return res, err
-    
-    def visitModNode(self, node: ModNode, context: Context) -> RuntimeResult:
-        left, err = self.visit(node.leftNode, context)
-        if err:
-            return None, err
-        right, err = self.visit(node.rightNode, context)
-        if err:
-            return None, err
+        return left.mul(right)
+    
+    def visitDivNode(self, node: DivNode, context: Context) -> Optional[Value]:
+        left = self.visit(node.leftNode, context)
+        right = self.visit(node.rightNode, context)
+        if node.operation is not None:
+            return node.operation(left, right)
         assert(left is not None and right is not None)
-        res, err = left.mod(right)
-        return res, err
-    
-    def visitEqualNode(self, node: EqualNode, context: Context) -> RuntimeResult:
-        left, err = self.visit(node.leftNode, context)
-        if err:
-            return None, err
-        right, err = self.visit(node.rightNode, context)
-        if err:
-            return None, err
+        return left.div(right)
+    
+    def visitModNode(self, node: ModNode, context: Context) -> Optional[Value]:
+        left = self.visit(node.leftNode, context)
+        right = self.visit(node.rightNode, context)
+        if node.operation is not None:
+            return node.operation(left, right)
         assert(left is not None and right is not None)
+        return left.mod(right)
+    
+    def visitEqualNode(self, node: EqualNode, context: Context) -> Optional[Value]:
+        left = self.visit(node.leftNode, context)
+        right = self.visit(node.rightNode, context)
+        if node.operation is not None:
+            cond = node.operation(left, right)
+        else:
+            assert(left is not None and right is not None)
+            cond = left.eq(right)
         res = None
-        if left.eq(right):
+        if cond:
             for inst in node.exprNodes:
-                res, err = self.visit(inst, context)
-                if err:
-                    return None, err
-        return res, None
-    
-    def visitLessThanNode(self, node: LessThanNode, context: Context) -> RuntimeResult:
-        left, err = self.visit(node.leftNode, context)
-        if err:
-            return None, err
-        right, err = self.visit(node.rightNode, context)
-        if err:
-            return None, err
-        assert(left is not None and right is not None)
+                res = self.visit(inst, context)
+        return res
+    
+    def visitLessThanNode(self, node: LessThanNode, context: Context) -> Optional[Value]:
+        left = self.visit(node.leftNode, context)
+        right = self.visit(node.rightNode, context)
+        if node.operation is not None:
+            cond = node.operation(left, right)
+        else:
+            assert(left is not None and right is not None)
+            cond = left.lt(right)
         res = None
-        if left.lt(right):
+        if cond:
             for inst in node.exprNodes:
-                res, err = self.visit(inst, context)
-                if err:
-                    return None, err
-        return res, None
-    
-    def visitGreaterThanNode(self, node: GreaterThanNode, context: Context) -> RuntimeResult:
-        left, err = self.visit(node.leftNode, context)
-        if err:
-            return None, err
-        right, err = self.visit(node.rightNode, context)
-        if err:
-            return None, err
-        assert(left is not None and right is not None)
+                res = self.visit(inst, context)
+        return res
+    
+    def visitGreaterThanNode(self, node: GreaterThanNode, context: Context) -> Optional[Value]:
+        left = self.visit(node.leftNode, context)
+        right = self.visit(node.rightNode, context)
+        if node.operation is not None:
+            cond = node.operation(left, right)
+        else:
+            assert(left is not None and right is not None)
+            cond = left.gt(right)
         res = None
-        if left.gt(right):
+        if cond:
             for inst in node.exprNodes:
-                res, err = self.visit(inst, context)
-                if err:
-                    return None, err
-        return res, None
-    
-    def visitNotEqualNode(self, node: NotEqualNode, context: Context) -> RuntimeResult:
-        left, err = self.visit(node.leftNode, context)
-        if err:
-            return None, err
-        right, err = self.visit(node.rightNode, context)
-        if err:
-            return None, err
-        assert(left is not None and right is not None)
+                res = self.visit(inst, context)
+        return res
+    
+    def visitNotEqualNode(self, node: NotEqualNode, context: Context) -> Optional[Value]:
+        left = self.visit(node.leftNode, context)
+        right = self.visit(node.rightNode, context)
+        if node.operation is not None:
+            cond = node.operation(left, right)
+        else:
+            assert(left is not None and right is not None)
+            cond = left.ne(right)
         res = None
-        if left.ne(right):
+        if cond:
             for inst in node.exprNodes:
-                res, err = self.visit(inst, context)
-                if err:
-                    return None, err
-        return res, None
+                res = self.visit(inst, context)
+        return res
     
-    def visitCallNode(self, node: CallNode, context: Context) -> RuntimeResult:
-        res, err = None, None
+    def visitCallNode(self, node: CallNode, context: Context) -> Optional[Value]:
         func = context.getVar(node.funcName)
         if not func:
-            return None, RTError(node.startPos, node.endPos, f"Function {node.funcName} is not defined")
+            raise RTError(node.startPos, node.endPos, f"Function {node.funcName} is not defined")
+        if type(func) is FunctionValue and func.definition is not None:
+            self.bodyLoader.load(func)
         params = []
         for param in node.params:
-            value, err = self.visit(param, context)
-            if err:
-                return None, err
+            value = self.visit(param, context)
             params.append(value)
-        res, err = func.call(params, context)
-        if err:
-            return None, err
-        return res, None
-    
-    def visitRandNode(self, node: RandNode, context: Context) -> RuntimeResult:
-        fromVal, err = self.visit(node.fromNode, context)
-        if err:
-            return None, err
-        toVal, err = self.visit(node.toNode, context)
-        if err:
-            return None, err
+        if node.isTail:
+            return TailCall(func, params)
+        if isinstance(func, FunctionValue):
+            return self.callFunction(func, params, context)
+        return func.call(params, context, self)
+    
+    def callFunction(self, func: FunctionValue, params: List[Value], context: Context) -> Optional[Value]:
+        if self.profiler is None:
+            return self.callMemoized(func, params, context)
+        self.profiler.enter(func.name)
+        try:
+            return self.callMemoized(func, params, context)
+        finally:
+            self.profiler.leave()
+    
+    def callMemoized(self, func: FunctionValue, params: List[Value], context: Context) -> Optional[Value]:
+        if func.memo is None:
+            return self.runFunction(func, params, context)
+        key = memoKey(params)
+        if key is None:
+            return self.runFunction(func, params, context)
+        entry = func.memo.get(key)
+        if entry is not None:
+            res, writes = entry
+            for varName, value in writes.items():
+                context.root().setVar(varName, value)
+            return res
+        root = context.root()
+        parentLog = root.writeLog
+        writeLog = root.writeLog = set()
+        try:
+            res = self.runFunction(func, params, context)
+        finally:
+            root.writeLog = parentLog
+        if parentLog is not None:
+            parentLog |= writeLog
+        func.memo.put(key, (res, {varName: root.getVar(varName) for varName in writeLog}))
+        return res
+    
+    def runFunction(self, func: FunctionValue, params: List[Value], context: Context) -> Optional[Value]:
+        fallback = None
+        while True:
+            if func.numSlots is None:
+                scope = context
+                for i in range(len(func.paramNames)):
+                    context.setVar(func.paramNames[i], params[i])
+            else:
+                scope = Frame([None] * func.numSlots, context.root())
+                for i in range(len(func.paramNames)):
+                    scope.slots[i] = params[i]
+            assert(isinstance(func.value, list) and len(func.value) > 0 and isinstance(func.value[0], Node))
+            body = func.value
+            res = None
+            for i in range(len(body) - 1):
+                result = self.visit(body[i], scope)
+                if result is not None:
+                    res = result
+            result = self.visit(body[-1], scope)
+            if type(result) is not TailCall:
+                if result is not None:
+                    return result
+                return (res if res is not None else fallback)
+            # The tail call replaces this activation; its result falls back to ours if it is None
+            if res is not None:
+                fallback = res
+            func, params = result.func, result.params
+            if not isinstance(func, FunctionValue):
+                res = func.call(params, context, self)
+                return (res if res is not None else fallback)
+            if self.profiler is not None:
+                self.profiler.switch(func.name)
+    
+    def visitRandNode(self, node: RandNode, context: Context) -> Optional[Value]:
+        fromVal = self.visit(node.fromNode, context)
+        toVal = self.visit(node.toNode, context)
         assert(isinstance(fromVal.value, int) and isinstance(toVal.value, int))
-        return IntValue(random.randint(fromVal.value, toVal.value), node.startPos, node.endPos), None
\ No newline at end of file
+        return IntValue(random.randint(fromVal.value, toVal.value), node.startPos, node.endPos)
\ No newline at end of file
@@ -0,0 +1,31 @@
+from __future__ import annotations
+from typing import Optional
+
+from languageParser import parseBody
+from languageOptimizer import Optimizer
+from languageResolver import Resolver
+from values import FunctionValue
+
+class BodyLoader:
+    def __init__(self, optimize: int = 1, lexical: bool = False, maxString: Optional[int] = None):
+        # Inlining needs every body, so a body parsed on its own only gets its constants folded
+        self.optimizer: Optional[Optimizer] = Optimizer(1, lexical, maxString) if optimize > 0 else None
+        self.lexical: bool = lexical
+        self.loaded: int = 0
+    
+    def load(self, func: FunctionValue):
+        node = func.definition
+        assert(node is not None)
+        if node.tokens is not None:
+            parseBody(node)
+            if self.optimizer is not None:
+                self.optimizer.visit(node)
+            if self.lexical:
+                Resolver().resolveFunction(node)
+            self.loaded += 1
+        func.value = node.exprNodes
+        func.numSlots = node.numSlots
+        func.definition = None
+    
+    def __repr__(self) -> str:
+        return f"BodyLoader [{self.loaded} bodies parsed]"
\ No newline at end of file
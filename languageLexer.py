@@ -1,9 +1,10 @@
-from typing import List, Optional, Union, Tuple
+from typing import List, Optional, Union, Tuple, Iterator
 
+import re
 import string
 
 from tokens import *
-from error import Position, Error, IllegalCharacterError
+from error import Position, Source, SourcePosition, Error, IllegalCharacterError
 
 DIGITS = "1234567890"
 LETTERS = string.ascii_letters + "_"
@@ -114,19 +115,19 @@ class Lexer:
             if self.char != "_":
                 numStr += self.char
             self.advance()
-
+        
         if hasDot:
             return Token(TT_FLOAT, float(numStr), startPos, self.pos)
         return Token(TT_INT, int(numStr), startPos, self.pos)
-
+    
     def makeIdentifier(self) -> Token:
         idStr = ""
         startPos = self.pos.copy()
-
+        
         while self.char is not None and self.char in LETTERS_DIGITS:
             idStr += self.char
             self.advance()
-
+        
         return Token(TT_IDENTIFIER, idStr, startPos, self.pos)
     
     def makeString(self) -> Token:
@@ -161,4 +162,160 @@ class Lexer:
             self.advance()
         self.advance()
         
-        return Token(TT_STRING, string, startPos, self.pos)
\ No newline at end of file
+        return Token(TT_STRING, string, startPos, self.pos)
+
+ESCAPE_CHARS = {
+    "n": "\n",
+    "t": "\t",
+    "r": "\r"
+}
+
+SINGLE_CHAR_TOKENS = {
+    "=": TT_EQUAL,
+    "(": TT_LPAREN,
+    ")": TT_RPAREN,
+    ",": TT_COMMA,
+    "+": TT_PLUS,
+    "-": TT_MINUS,
+    "*": TT_MUL,
+    "/": TT_DIV,
+    "%": TT_MOD,
+    "<": TT_LESSTHAN,
+    ">": TT_GREATERTHAN,
+    "!": TT_NOTEQUAL,
+    "$": TT_DOLLAR,
+    "#": TT_POUND,
+    "@": TT_AT
+}
+
+# Character classes of the first character of a token
+CC_WHITESPACE = 0
+CC_DIGIT = 1
+CC_LETTER = 2
+CC_QUOTE = 3
+CC_SINGLE = 4
+
+CHAR_CLASSES = {}
+for char in " \n\r\t":
+    CHAR_CLASSES[char] = CC_WHITESPACE
+for char in DIGITS:
+    CHAR_CLASSES[char] = CC_DIGIT
+for char in LETTERS:
+    CHAR_CLASSES[char] = CC_LETTER
+CHAR_CLASSES["\""] = CC_QUOTE
+for char in SINGLE_CHAR_TOKENS:
+    CHAR_CLASSES[char] = CC_SINGLE
+
+WHITESPACE_RE = re.compile(r"[ \n\r\t]+")
+NUMBER_RE = re.compile(r"[0-9][0-9_]*(\.[0-9_]*)?")
+IDENTIFIER_RE = re.compile(r"[A-Za-z0-9_]+")
+STRING_RE = re.compile(r'"((?:[^"\\]|\\x[\s\S]{0,2}|\\[\s\S]?)*)("?)')
+
+def unescape(string: str) -> str:
+    result = []
+    i = 0
+    while i < len(string):
+        char = string[i]
+        if char == "\\" and i + 1 < len(string):
+            i += 1
+            char = string[i]
+            if char in ESCAPE_CHARS:
+                result.append(ESCAPE_CHARS[char])
+            elif char == "x":
+                a = string[i + 1:i + 2]
+                b = string[i + 2:i + 3]
+                if a and b and a in DIGITS + "abcdef" and b in DIGITS + "abcdef":
+                    result.append(chr(int(a + b, 16)))
+                else:
+                    result.append("?")
+                i += 2
+            else:
+                result.append(char)
+        else:
+            result.append(char)
+        i += 1
+    return "".join(result)
+
+class CompactToken:
+    __slots__ = ("type", "value", "start", "end", "source")
+    
+    def __init__(self, _type: str, value: Union[str, int, float, None], start: int, end: int, source: Source):
+        self.type: str = _type
+        self.value: Union[str, int, float, None] = value
+        self.start: int = start
+        self.end: int = end
+        self.source: Source = source
+    
+    @property
+    def startPos(self) -> SourcePosition:
+        return SourcePosition(self.start, self.source)
+    
+    @property
+    def endPos(self) -> SourcePosition:
+        return SourcePosition(self.end, self.source)
+    
+    def __repr__(self) -> str:
+        if self.value is not None:
+            return f"{self.type}: {self.value}"
+        return f"{self.type}"
+
+class StreamLexer:
+    def __init__(self, code: str):
+        self.code: str = code
+        self.source: Source = Source(code)
+        self.error: Optional[Error] = None
+    
+    def __iter__(self) -> Iterator[CompactToken]:
+        return self.iterTokens()
+    
+    def iterTokens(self) -> Iterator[CompactToken]:
+        code = self.code
+        source = self.source
+        length = len(code)
+        charClasses = CHAR_CLASSES
+        singleCharTokens = SINGLE_CHAR_TOKENS
+        pos = 0
+        
+        while pos < length:
+            char = code[pos]
+            charClass = charClasses.get(char)
+            if charClass == CC_SINGLE:
+                yield CompactToken(singleCharTokens[char], None, pos, pos, source)
+                pos += 1
+            elif charClass == CC_WHITESPACE:
+                pos = WHITESPACE_RE.match(code, pos).end()
+            elif charClass == CC_LETTER:
+                end = IDENTIFIER_RE.match(code, pos).end()
+                yield CompactToken(TT_IDENTIFIER, code[pos:end], pos, end, source)
+                pos = end
+            elif charClass == CC_DIGIT:
+                match = NUMBER_RE.match(code, pos)
+                end = match.end()
+                numStr = code[pos:end].replace("_", "")
+                if match.group(1) is not None:
+                    yield CompactToken(TT_FLOAT, float(numStr), pos, end, source)
+                else:
+                    yield CompactToken(TT_INT, int(numStr), pos, end, source)
+                pos = end
+            elif charClass == CC_QUOTE:
+                match = STRING_RE.match(code, pos)
+                end = match.end()
+                if not match.group(2):
+                    # An unterminated string steps past the end, like Lexer.makeString
+                    end += 1
+                string = match.group(1)
+                if "\\" in string:
+                    string = unescape(string)
+                yield CompactToken(TT_STRING, string, pos, end, source)
+                pos = end
+            else:
+                self.error = IllegalCharacterError(SourcePosition(pos, source), f"'{char}'")
+                break
+        
+        yield CompactToken(TT_EOF, None, pos, pos, source)
+    
+    def makeTokens(self) -> Tuple[List[CompactToken], Optional[Error]]:
+        tokens = list(self.iterTokens())
+        if self.error:
+            return [], self.error
+        return tokens, None
\ No newline at end of file
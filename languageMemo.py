@@ -0,0 +1,125 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Set, Tuple, Any
+
+from collections import OrderedDict
+
+from languageParser import Node, ProgramNode, AssignNode, VarAssignNode, VarAccessNode, PrintNode, InputNode, RandNode, CallNode
+from values import Value, IntValue, FloatValue, StringValue
+
+# Result of a call, and the final value of every variable the call wrote
+MemoEntry = Tuple[Optional[Value], Dict[str, Optional[Value]]]
+
+class MemoCache:
+    def __init__(self, maxSize: int):
+        self.maxSize: int = maxSize
+        self.entries: OrderedDict[Tuple[Any, ...], MemoEntry] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+    
+    def get(self, key: Tuple[Any, ...]) -> Optional[MemoEntry]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+    
+    def put(self, key: Tuple[Any, ...], entry: MemoEntry):
+        self.entries[key] = entry
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+    
+    def __repr__(self) -> str:
+        return f"MemoCache [{len(self.entries)}/{self.maxSize}, hits={self.hits}, misses={self.misses}]"
+
+def memoKey(params: List[Value]) -> Optional[Tuple[Any, ...]]:
+    key = []
+    for param in params:
+        if type(param) not in (IntValue, FloatValue, StringValue):
+            return None
+        # 0.0 and -0.0 compare equal but can give different results, repr tells them apart
+        key.append((type(param), repr(param.value) if type(param) is FloatValue else param.value))
+    return tuple(key)
+
+def walk(node: Node):
+    yield node
+    for child in node.children():
+        yield from walk(child)
+
+def stableFunctions(ast: ProgramNode, lexical: bool = False) -> Set[str]:
+    # A function can only be called by name safely if nothing else ever binds that name
+    definitions = set()
+    duplicates = set()
+    rebound = set()
+    for node in ast.nodes:
+        if isinstance(node, AssignNode):
+            if node.funcName in definitions:
+                duplicates.add(node.funcName)
+            definitions.add(node.funcName)
+            if not lexical:
+                rebound.update(node.params)
+    # With lexical scoping only assignments outside of function bodies touch the globals
+    for node in (ast.nodes if lexical else [ast]):
+        if lexical and isinstance(node, AssignNode):
+            continue
+        for child in walk(node):
+            if isinstance(child, VarAssignNode):
+                rebound.add(child.varName)
+    return definitions - duplicates - rebound
+
+class PurityAnalyzer:
+    def __init__(self, ast: ProgramNode, lexical: bool = False):
+        self.ast: ProgramNode = ast
+        self.lexical: bool = lexical
+        self.definitions: Dict[str, AssignNode] = {}
+        self.callees: Dict[str, Set[str]] = {}
+    
+    def findPureFunctions(self) -> Set[str]:
+        for node in self.ast.nodes:
+            if isinstance(node, AssignNode):
+                self.definitions[node.funcName] = node
+        
+        pure = set()
+        for name in stableFunctions(self.ast, self.lexical):
+            if self.isLocallyPure(self.definitions[name]):
+                pure.add(name)
+        
+        changed = True
+        while changed:
+            changed = False
+            for name in list(pure):
+                if not self.callees[name] <= pure:
+                    pure.discard(name)
+                    changed = True
+        return pure
+    
+    def isLocallyPure(self, node: AssignNode) -> bool:
+        localNames = set(node.params)
+        if self.lexical:
+            for expr in node.exprNodes:
+                localNames.update(child.varName for child in walk(expr) if isinstance(child, VarAssignNode))
+        callees = set()
+        for expr in node.exprNodes:
+            for child in walk(expr):
+                if isinstance(child, (PrintNode, InputNode, RandNode)):
+                    return False
+                if isinstance(child, (VarAssignNode, VarAccessNode)) and child.varName not in localNames:
+                    return False
+                if isinstance(child, CallNode):
+                    callees.add(child.funcName)
+        self.callees[node.funcName] = callees
+        return True
+
+def markPureFunctions(ast: ProgramNode, lexical: bool = False) -> Set[str]:
+    pure = PurityAnalyzer(ast, lexical).findPureFunctions()
+    for node in ast.nodes:
+        if isinstance(node, AssignNode):
+            node.isPure = node.funcName in pure
+    return pure
+
+def formatStats(caches: Dict[str, MemoCache]) -> str:
+    lines = [f"{'function':<20} {'hits':>10} {'misses':>10} {'size':>8}"]
+    for name, cache in sorted(caches.items()):
+        lines.append(f"{name:<20} {cache.hits:>10} {cache.misses:>10} {len(cache.entries):>8}")
+    return "\n".join(lines)
\ No newline at end of file
@@ -0,0 +1,195 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Set
+
+import copy
+
+from languageParser import Node, ProgramNode, AssignNode, VarAssignNode, VarAccessNode, IntNode, FloatNode, StringNode, InputNode, PrintNode, PlusNode, MinusNode, MulNode, DivNode, ModNode, EqualNode, LessThanNode, GreaterThanNode, NotEqualNode, CallNode, RandNode
+from languageMemo import walk, stableFunctions
+from values import Value, IntValue, FloatValue, StringValue
+from error import Error
+
+LITERAL_VALUES = {IntNode: IntValue, FloatNode: FloatValue, StringNode: StringValue}
+VALUE_LITERALS = {IntValue: IntNode, FloatValue: FloatNode, StringValue: StringNode}
+
+# Operand types each operation is defined for, anything else is left for the runtime to report
+FOLDABLE = {
+    PlusNode: ("add", {(IntNode, IntNode), (FloatNode, FloatNode), (StringNode, StringNode)}),
+    MinusNode: ("sub", {(IntNode, IntNode), (FloatNode, FloatNode)}),
+    MulNode: ("mul", {(IntNode, IntNode), (FloatNode, FloatNode), (StringNode, IntNode)}),
+    DivNode: ("div", {(IntNode, IntNode), (FloatNode, FloatNode)}),
+    ModNode: ("mod", {(IntNode, IntNode), (FloatNode, FloatNode)}),
+}
+
+COMPARISONS = {EqualNode: "eq", LessThanNode: "lt", GreaterThanNode: "gt", NotEqualNode: "ne"}
+
+MAX_FOLDED_STRING = 4096
+MAX_INLINE_NODES = 16
+
+class Optimizer:
+    def __init__(self, level: int = 1, lexical: bool = False, maxString: Optional[int] = None):
+        self.level: int = level
+        self.lexical: bool = lexical
+        # String budget of the run, which a string built here would otherwise never be checked against
+        self.maxString: Optional[int] = maxString
+        self.inlinable: Dict[str, AssignNode] = {}
+        self.substitutions: Optional[Dict[str, Node]] = None
+    
+    def optimize(self, ast: ProgramNode) -> ProgramNode:
+        if self.level <= 0:
+            return ast
+        if self.level >= 2:
+            self.findInlinable(ast)
+        return self.visit(ast)
+    
+    def visit(self, node: Node) -> Node:
+        methodName = f"visit{type(node).__name__}"
+        method = getattr(self, methodName, self.visitLeaf)
+        return method(node)
+    
+    def visitLeaf(self, node: Node) -> Node:
+        return node
+    
+    def visitExprs(self, exprNodes: List[Node], valueUsed: bool) -> List[Node]:
+        # A branch that can never run evaluates to None, which only matters where the value is used
+        exprs = [self.visit(expr) for expr in exprNodes]
+        kept = [expr for i, expr in enumerate(exprs) if not self.isDead(expr) or (valueUsed and i == len(exprs) - 1)]
+        return kept if kept else exprs[-1:]
+    
+    def isDead(self, node: Node) -> bool:
+        return type(node) in COMPARISONS and not node.exprNodes
+    
+    def visitProgramNode(self, node: ProgramNode) -> Node:
+        node.nodes = [self.visit(inst) for inst in node.nodes]
+        return node
+    
+    def visitAssignNode(self, node: AssignNode) -> Node:
+        # A function returns its last result that is not None, so dead expressions can go anywhere in the body
+        node.exprNodes = self.visitExprs(node.exprNodes, False)
+        return node
+    
+    def visitVarAssignNode(self, node: VarAssignNode) -> Node:
+        node.value = self.visit(node.value)
+        return node
+    
+    def visitVarAccessNode(self, node: VarAccessNode) -> Node:
+        if self.substitutions is not None and node.varName in self.substitutions:
+            return copy.deepcopy(self.substitutions[node.varName])
+        return node
+    
+    def visitPrintNode(self, node: PrintNode) -> Node:
+        node.node = self.visit(node.node)
+        return node
+    
+    def visitRandNode(self, node: RandNode) -> Node:
+        node.fromNode = self.visit(node.fromNode)
+        node.toNode = self.visit(node.toNode)
+        return node
+    
+    def visitBinary(self, node: Node) -> Node:
+        node.leftNode = self.visit(node.leftNode)
+        node.rightNode = self.visit(node.rightNode)
+        methodName, operandTypes = FOLDABLE[type(node)]
+        if (type(node.leftNode), type(node.rightNode)) not in operandTypes:
+            return node
+        left = self.literalValue(node.leftNode)
+        right = self.literalValue(node.rightNode)
+        if isinstance(left, StringValue):
+            length = len(left.value) * max(right.value, 0) if methodName == "mul" else len(left.value) + len(right.value)
+            if (methodName == "mul" and length > MAX_FOLDED_STRING) or (self.maxString is not None and length > self.maxString):
+                return node
+        try:
+            res = getattr(left, methodName)(right)
+        except Error:
+            # Division and modulo by zero must still fail when the expression runs
+            return node
+        folded = VALUE_LITERALS[type(res)](node.startPos, node.endPos, res.value)
+        # The literal spans the expression it replaces, but its value carries no position, like the result computed at runtime, so errors point where they would without folding
+        folded.constant = res
+        return folded
+    
+    def visitPlusNode(self, node: PlusNode) -> Node:
+        return self.visitBinary(node)
+    
+    def visitMinusNode(self, node: MinusNode) -> Node:
+        return self.visitBinary(node)
+    
+    def visitMulNode(self, node: MulNode) -> Node:
+        return self.visitBinary(node)
+    
+    def visitDivNode(self, node: DivNode) -> Node:
+        return self.visitBinary(node)
+    
+    def visitModNode(self, node: ModNode) -> Node:
+        return self.visitBinary(node)
+    
+    def visitComparison(self, node: Node) -> Node:
+        node.leftNode = self.visit(node.leftNode)
+        node.rightNode = self.visit(node.rightNode)
+        node.exprNodes = self.visitExprs(node.exprNodes, True)
+        if type(node.leftNode) not in LITERAL_VALUES or type(node.rightNode) not in LITERAL_VALUES:
+            return node
+        left = self.literalValue(node.leftNode)
+        right = self.literalValue(node.rightNode)
+        if not getattr(left, COMPARISONS[type(node)])(right):
+            node.exprNodes = []
+        elif len(node.exprNodes) == 1:
+            return node.exprNodes[0]
+        return node
+    
+    def visitEqualNode(self, node: EqualNode) -> Node:
+        return self.visitComparison(node)
+    
+    def visitLessThanNode(self, node: LessThanNode) -> Node:
+        return self.visitComparison(node)
+    
+    def visitGreaterThanNode(self, node: GreaterThanNode) -> Node:
+        return self.visitComparison(node)
+    
+    def visitNotEqualNode(self, node: NotEqualNode) -> Node:
+        return self.visitComparison(node)
+    
+    def visitCallNode(self, node: CallNode) -> Node:
+        node.params = [self.visit(param) for param in node.params]
+        func = self.inlinable.get(node.funcName)
+        if func is None or len(node.params) != len(func.params):
+            return node
+        if any(type(param) not in LITERAL_VALUES and type(param) is not VarAccessNode for param in node.params):
+            return node
+        outerSubstitutions = self.substitutions
+        self.substitutions = dict(zip(func.params, node.params))
+        try:
+            return self.visit(copy.deepcopy(func.exprNodes[0]))
+        finally:
+            self.substitutions = outerSubstitutions
+    
+    def literalValue(self, node: Node) -> Value:
+        return LITERAL_VALUES[type(node)](node.value, node.startPos, node.endPos)
+    
+    def findInlinable(self, ast: ProgramNode):
+        stable = stableFunctions(ast, self.lexical)
+        for node in ast.nodes:
+            if isinstance(node, AssignNode) and node.funcName in stable and self.isTrivial(node):
+                self.inlinable[node.funcName] = node
+    
+    def isTrivial(self, node: AssignNode) -> bool:
+        if len(node.exprNodes) != 1:
+            return False
+        children = list(walk(node.exprNodes[0]))
+        if len(children) > MAX_INLINE_NODES or any(isinstance(child, (CallNode, InputNode, RandNode)) for child in children):
+            return False
+        if not node.params:
+            # Without parameters the body runs in the caller's context either way, unless it has locals of its own
+            return not self.lexical or not any(isinstance(child, (VarAssignNode, VarAccessNode)) for child in children)
+        if not self.lexical or len(set(node.params)) != len(node.params):
+            # Dynamically scoped calls leave their parameters bound in the shared context
+            return False
+        # Arguments are substituted for parameters, so each must be read and nothing may run before it is
+        used: Set[str] = set()
+        for child in children:
+            if isinstance(child, (VarAssignNode, PrintNode)):
+                return False
+            if isinstance(child, VarAccessNode):
+                if child.varName not in node.params:
+                    return False
+                used.add(child.varName)
+        return used == set(node.params)
\ No newline at end of file
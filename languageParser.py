@@ -1,15 +1,24 @@
 from __future__ import annotations
-from typing import List, Optional, Tuple, Union
+from typing import Callable, List, Optional, Union, Iterable, Iterator, Deque, TYPE_CHECKING
+
+from collections import deque
+from itertools import chain
 
 from tokens import *
 from languageLexer import Position, Token
 from error import Error, InvalidSyntaxError
 
+if TYPE_CHECKING:
+    import values as v
+
 class Node:
     def __init__(self, startPos: Position, endPos: Position):
         self.startPos: Position = startPos
         self.endPos: Position = endPos
     
+    def children(self) -> List[Node]:
+        return []
+    
     def __repr__(self) -> str:
         return "Node"
 
@@ -18,6 +27,9 @@ class ProgramNode(Node):
         super().__init__(startPos, endPos)
         self.nodes: List[Node] = nodes
     
+    def children(self) -> List[Node]:
+        return self.nodes
+    
     def __repr__(self) -> str:
         s = ",\n"
         return f"ProgramNode: [\n{s.join(str(node) for node in self.nodes)}\n]"
@@ -28,6 +40,13 @@ class AssignNode(Node):
         self.funcName: str = funcName
         self.params: List[str] = params
         self.exprNodes: List[Node] = exprNodes
+        self.isPure: bool = False
+        self.numSlots: Optional[int] = None
+        # Tokens of a body a lazy parser skipped, which is parsed when the function is first called
+        self.tokens: Optional[List[Token]] = None
+    
+    def children(self) -> List[Node]:
+        return self.exprNodes
     
     def __repr__(self) -> str:
         return f"AssignNode [{self.funcName}, {self.params}, {', '.join(str(node) for node in self.exprNodes)}]"
@@ -37,6 +56,10 @@ class VarAssignNode(Node):
         super().__init__(startPos, endPos)
         self.varName: str = varName
         self.value: Node = value
+        self.slot: Optional[int] = None
+    
+    def children(self) -> List[Node]:
+        return [self.value]
     
     def __repr__(self) -> str:
         return f"VarAssignNode [{self.varName}, {str(self.value)}]"
@@ -45,6 +68,7 @@ class VarAccessNode(Node):
     def __init__(self, startPos: Position, endPos: Position, varName: str):
         super().__init__(startPos, endPos)
         self.varName: str = varName
+        self.slot: Optional[int] = None
     
     def __repr__(self) -> str:
         return f"VarAccessNode [{self.varName}]"
@@ -53,6 +77,7 @@ class IntNode(Node):
     def __init__(self, startPos: Position, endPos: Position, value: int):
         super().__init__(startPos, endPos)
         self.value: int = value
+        self.constant: Optional[v.Value] = None
     
     def __repr__(self) -> str:
         return f"IntNode [{self.value}]"
@@ -61,6 +86,7 @@ class FloatNode(Node):
     def __init__(self, startPos: Position, endPos: Position, value: float):
         super().__init__(startPos, endPos)
         self.value: float = value
+        self.constant: Optional[v.Value] = None
     
     def __repr__(self) -> str:
         return f"FloatNode [{self.value}]"
@@ -69,6 +95,7 @@ class StringNode(Node):
     def __init__(self, startPos: Position, endPos: Position, value: str):
         super().__init__(startPos, endPos)
         self.value: str = value
+        self.constant: Optional[v.Value] = None
     
     def __repr__(self) -> str:
         return f"StringNode [{repr(self.value)}]"
@@ -85,6 +112,9 @@ class PrintNode(Node):
         super().__init__(startPos, endPos)
         self.node: Node = node
     
+    def children(self) -> List[Node]:
+        return [self.node]
+    
     def __repr__(self) -> str:
         return f"PrintNode [{str(self.node)}]"
 
@@ -93,6 +123,11 @@ class PlusNode(Node):
         super().__init__(startPos, endPos)
         self.leftNode: Node = leftNode
         self.rightNode: Node = rightNode
+        # Set when the operand types are proven, to the operation of values.py that skips checking them
+        self.operation: Optional[Callable[[v.Value, v.Value], v.Value]] = None
+    
+    def children(self) -> List[Node]:
+        return [self.leftNode, self.rightNode]
     
     def __repr__(self) -> str:
         return f"PlusNode [{str(self.leftNode)}, {str(self.rightNode)}]"
@@ -102,6 +137,10 @@ class MinusNode(Node):
         super().__init__(startPos, endPos)
         self.leftNode: Node = leftNode
         self.rightNode: Node = rightNode
+        self.operation: Optional[Callable[[v.Value, v.Value], v.Value]] = None
+    
+    def children(self) -> List[Node]:
+        return [self.leftNode, self.rightNode]
     
     def __repr__(self) -> str:
         return f"MinusNode [{str(self.leftNode)}, {str(self.rightNode)}]"
@@ -111,6 +150,10 @@ class MulNode(Node):
         super().__init__(startPos, endPos)
         self.leftNode: Node = leftNode
         self.rightNode: Node = rightNode
+        self.operation: Optional[Callable[[v.Value, v.Value], v.Value]] = None
+    
+    def children(self) -> List[Node]:
+        return [self.leftNode, self.rightNode]
     
     def __repr__(self) -> str:
         return f"MulNode [{str(self.leftNode)}, {str(self.rightNode)}]"
@@ -120,6 +163,10 @@ class DivNode(Node):
         super().__init__(startPos, endPos)
         self.leftNode: Node = leftNode
         self.rightNode: Node = rightNode
+        self.operation: Optional[Callable[[v.Value, v.Value], v.Value]] = None
+    
+    def children(self) -> List[Node]:
+        return [self.leftNode, self.rightNode]
     
     def __repr__(self) -> str:
         return f"DivNode [{str(self.leftNode)}, {str(self.rightNode)}]"
@@ -129,6 +176,10 @@ class ModNode(Node):
         super().__init__(startPos, endPos)
         self.leftNode: Node = leftNode
         self.rightNode: Node = rightNode
+        self.operation: Optional[Callable[[v.Value, v.Value], v.Value]] = None
+    
+    def children(self) -> List[Node]:
+        return [self.leftNode, self.rightNode]
     
     def __repr__(self) -> str:
         return f"ModNode [{str(self.leftNode)}, {str(self.rightNode)}]"
@@ -139,6 +190,10 @@ class EqualNode(Node):
         self.leftNode: Node = leftNode
         self.rightNode: Node = rightNode
         self.exprNodes: List[Node] = exprNodes
+        self.operation: Optional[Callable[[v.Value, v.Value], bool]] = None
+    
+    def children(self) -> List[Node]:
+        return [self.leftNode, self.rightNode] + self.exprNodes
     
     def __repr__(self) -> str:
         return f"EqualNode [{str(self.leftNode)}, {str(self.rightNode)}, {', '.join(str(node) for node in self.exprNodes)}]"
@@ -149,6 +204,10 @@ class LessThanNode(Node):
         self.leftNode: Node = leftNode
         self.rightNode: Node = rightNode
         self.exprNodes: List[Node] = exprNodes
+        self.operation: Optional[Callable[[v.Value, v.Value], bool]] = None
+    
+    def children(self) -> List[Node]:
+        return [self.leftNode, self.rightNode] + self.exprNodes
     
     def __repr__(self) -> str:
         return f"LessThanNode [{str(self.leftNode)}, {str(self.rightNode)}, {', '.join(str(node) for node in self.exprNodes)}]"
@@ -159,6 +218,10 @@ class GreaterThanNode(Node):
         self.leftNode: Node = leftNode
         self.rightNode: Node = rightNode
         self.exprNodes: List[Node] = exprNodes
+        self.operation: Optional[Callable[[v.Value, v.Value], bool]] = None
+    
+    def children(self) -> List[Node]:
+        return [self.leftNode, self.rightNode] + self.exprNodes
     
     def __repr__(self) -> str:
         return f"GreaterThanNode [{str(self.leftNode)}, {str(self.rightNode)}, {', '.join(str(node) for node in self.exprNodes)}]"
@@ -169,6 +232,10 @@ class NotEqualNode(Node):
         self.leftNode: Node = leftNode
         self.rightNode: Node = rightNode
         self.exprNodes: List[Node] = exprNodes
+        self.operation: Optional[Callable[[v.Value, v.Value], bool]] = None
+    
+    def children(self) -> List[Node]:
+        return [self.leftNode, self.rightNode] + self.exprNodes
     
     def __repr__(self) -> str:
         return f"NotEqualNode [{str(self.leftNode)}, {str(self.rightNode)}, {', '.join(str(node) for node in self.exprNodes)}]"
@@ -178,6 +245,10 @@ class CallNode(Node):
         super().__init__(startPos, endPos)
         self.funcName: str = funcName
         self.params: List[Node] = params
+        self.isTail: bool = False
+    
+    def children(self) -> List[Node]:
+        return self.params
     
     def __repr__(self) -> str:
         return f"CallNode [{self.funcName}, {', '.join(str(node) for node in self.params)}]"
@@ -188,63 +259,97 @@ class RandNode(Node):
         self.fromNode: Node = fromNode
         self.toNode: Node = toNode
     
+    def children(self) -> List[Node]:
+        return [self.fromNode, self.toNode]
+    
     def __repr__(self) -> str:
         return f"RandNode [{str(self.fromNode)}, {str(self.toNode)}]"
 
-ParseResult = Tuple[Optional[Node], Optional[Error]]
+# Tokens that start an operation, each followed by its operands in parentheses
+OPERATORS = (TT_DOLLAR, TT_PLUS, TT_MINUS, TT_MUL, TT_DIV, TT_MOD, TT_AT, TT_EQUAL, TT_LESSTHAN, TT_GREATERTHAN, TT_NOTEQUAL)
 
 class Parser:
-    def __init__(self, tokens: List[Token]):
-        self.tokens: List[Token] = tokens
+    def __init__(self, tokens: Iterable[Token], lazy: bool = False):
+        self.tokens: Iterator[Token] = iter(tokens)
+        self.lazy: bool = lazy
+        self.lookahead: Deque[Token] = deque()
+        self.lastToken: Optional[Token] = None
         self.idx: int = -1
         self.token: Optional[Token] = None
         self.nextToken: Optional[Token] = None
         self.advance()
     
+    def fill(self, count: int):
+        # Tokens are pulled from the stream only as far as the parser looks ahead; EOF repeats once it runs out
+        while len(self.lookahead) < count:
+            token = next(self.tokens, self.lastToken)
+            if token is None:
+                return
+            self.lastToken = token
+            self.lookahead.append(token)
+    
     def advance(self):
         self.idx += 1
-        if self.idx < len(self.tokens):
-            self.token = self.tokens[self.idx]
-        else:
-            self.token = None
-        if self.idx + 1 < len(self.tokens):
-            self.nextToken = self.tokens[self.idx + 1]
-        else:
-            self.nextToken = None
+        self.fill(2)
+        self.token = self.lookahead.popleft() if self.lookahead else None
+        self.nextToken = self.lookahead[0] if self.lookahead else None
+    
+    def rewind(self, tokens: List[Token]):
+        self.idx -= len(tokens)
+        self.lookahead.appendleft(self.token)
+        self.lookahead.extendleft(reversed(tokens))
+        self.token = self.lookahead.popleft()
+        self.nextToken = self.lookahead[0]
     
-    def parseTokens(self) -> ParseResult:
+    def parseTokens(self) -> Node:
         return self.makeProgram()
     
-    def makeProgram(self) -> ParseResult:
+    def peek(self, offset: int) -> Token:
+        if offset == 0:
+            return self.token
+        self.fill(offset)
+        return self.lookahead[offset - 1]
+    
+    def makeProgram(self) -> Node:
         nodes = []
         startPos = self.token.startPos
-        while self.isAssignNext():
-            assign, err = self.makeAssign()
-            nodes.append(assign)
-        basicExpr, err = self.makeBasicExpr()
-        if err:
-            return None, err
+        try:
+            while self.isAssignNext():
+                assign = self.makeAssign()
+                nodes.append(assign)
+            basicExpr = self.makeBasicExpr()
+        except Error:
+            # The error to report is the first one in the source, which can be in a body that was skipped
+            for node in nodes:
+                if node.tokens is not None:
+                    parseBody(node)
+            raise
         nodes.append(basicExpr)
         endPos = basicExpr.endPos
         assert(endPos is not None)
-        return ProgramNode(startPos, endPos, nodes), None
+        return ProgramNode(startPos, endPos, nodes)
     
     def isAssignNext(self) -> bool:
-        for i in range(self.idx, len(self.tokens) - 1):
-            if self.tokens[i].type == TT_RPAREN and self.tokens[i + 1].type == TT_EQUAL:
-                return True
-        return False
+        # IDENTIFIER LPAREN (IDENTIFIER (COMMA IDENTIFIER)*)? RPAREN EQUAL
+        if self.token.type != TT_IDENTIFIER or self.peek(1).type != TT_LPAREN:
+            return False
+        offset = 2
+        if self.peek(offset).type == TT_IDENTIFIER:
+            offset += 1
+            while self.peek(offset).type == TT_COMMA and self.peek(offset + 1).type == TT_IDENTIFIER:
+                offset += 2
+        return self.peek(offset).type == TT_RPAREN and self.peek(offset + 1).type == TT_EQUAL
     
-    def makeAssign(self) -> ParseResult:
+    def makeAssign(self) -> Node:
         startPos = self.token.startPos
         if self.token.type != TT_IDENTIFIER:
-            return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected Identifier. Error id: 0")
+            raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected Identifier. Error id: 0")
         funcName = self.token.value
         assert(isinstance(funcName, str))
         self.advance()
         
         if self.token.type != TT_LPAREN:
-            return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 1")
+            raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 1")
         self.advance()
         
         params = []
@@ -254,325 +359,370 @@ class Parser:
             while self.token.type == TT_COMMA:
                 self.advance()
                 if self.token.type != TT_IDENTIFIER:
-                    return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected identifier. Error id: 2")
+                    raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected identifier. Error id: 2")
                 params.append(self.token.value)
                 self.advance()
         if self.token.type != TT_RPAREN:
-            return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 3")
+            raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 3")
         self.advance()
         
         if self.token.type != TT_EQUAL:
-            return None, Error(self.token.startPos, self.token.endPos, "NotAssign", "Expected '='. Error id: 4")
+            raise Error(self.token.startPos, self.token.endPos, "NotAssign", "Expected '='. Error id: 4")
         self.advance()
         
-        exprNodes, err = self.makeExprs()
-        if err:
-            return None, err
+        if self.lazy:
+            tokens = self.skipExprs()
+            if tokens is not None:
+                node = AssignNode(startPos, tokens[-1].endPos, funcName, params, [])
+                node.tokens = tokens
+                return node
+        exprNodes = self.makeExprs()
         endPos = exprNodes[-1].endPos
         assert(endPos is not None)
-        return AssignNode(startPos, endPos, funcName, params, exprNodes), None
+        self.markTailCalls(exprNodes)
+        return AssignNode(startPos, endPos, funcName, params, exprNodes)
+    
+    def skipExprs(self) -> Optional[List[Token]]:
+        # The end of a body is found from its commas and parentheses alone; a body that does not look
+        # well formed to this is parsed right away instead, so its syntax error is reported as usual
+        tokens = []
+        while True:
+            if not self.skipExpr(tokens):
+                self.rewind(tokens)
+                return None
+            if self.token.type != TT_COMMA:
+                break
+            tokens.append(self.token)
+            self.advance()
+        # Only a definition or the program's expression can follow a body
+        if self.token.type in (TT_INT, TT_FLOAT, TT_STRING, TT_POUND, TT_IDENTIFIER) or (self.token.type in OPERATORS and self.nextToken.type == TT_LPAREN):
+            return tokens
+        self.rewind(tokens)
+        return None
     
-    def makeExprs(self) -> Tuple[List[Node], Optional[Error]]:
+    def skipExpr(self, tokens: List[Token]) -> bool:
+        if self.token.type == TT_IDENTIFIER and self.nextToken.type == TT_EQUAL:
+            tokens.append(self.token)
+            tokens.append(self.nextToken)
+            self.advance()
+            self.advance()
+        if self.token.type in (TT_INT, TT_FLOAT, TT_STRING, TT_POUND):
+            tokens.append(self.token)
+            self.advance()
+            return True
+        if self.token.type == TT_IDENTIFIER:
+            tokens.append(self.token)
+            self.advance()
+            if self.token.type != TT_LPAREN:
+                return True
+        elif self.token.type in OPERATORS:
+            tokens.append(self.token)
+            self.advance()
+            if self.token.type != TT_LPAREN:
+                return False
+        else:
+            return False
+        return self.skipGroup(tokens)
+    
+    def skipGroup(self, tokens: List[Token]) -> bool:
+        # Groups are most of what a lazy parser goes over, so their tokens are taken straight from the stream
+        pending = [self.token, *self.lookahead]
+        self.lookahead.clear()
+        depth = 0
+        for i, token in enumerate(chain(pending, self.tokens)):
+            if token.type == TT_EOF:
+                self.lookahead.extend(pending[i:] if i < len(pending) else (token,))
+                self.lastToken = token
+                break
+            tokens.append(token)
+            if token.type == TT_LPAREN:
+                depth += 1
+            elif token.type == TT_RPAREN:
+                depth -= 1
+                if depth == 0:
+                    self.lookahead.extend(pending[i + 1:])
+                    i += 1
+                    break
+        self.idx += i - 1
+        self.advance()
+        return depth == 0
+    
+    def markTailCalls(self, exprNodes: List[Node]):
+        node = exprNodes[-1]
+        if isinstance(node, CallNode):
+            node.isTail = True
+        elif isinstance(node, (EqualNode, LessThanNode, GreaterThanNode, NotEqualNode)):
+            self.markTailCalls(node.exprNodes)
+    
+    def makeExprs(self) -> List[Node]:
         exprs = []
-        expr, err = self.makeExpr()
-        if err:
-            return [], err
+        expr = self.makeExpr()
         exprs.append(expr)
         while self.token.type == TT_COMMA:
             self.advance()
-            expr, err = self.makeExpr()
-            if err:
-                return [], err
+            expr = self.makeExpr()
             exprs.append(expr)
-        return exprs, None
+        return exprs
     
-    def makeExpr(self) -> ParseResult:
+    def makeExpr(self) -> Node:
         if self.token.type == TT_IDENTIFIER and self.nextToken.type == TT_EQUAL:
             startPos = self.token.startPos
             varName = self.token.value
             assert(isinstance(varName, str))
             self.advance()
             self.advance()
-            basicExpr, err = self.makeBasicExpr()
-            if err:
-                return None, err
+            basicExpr = self.makeBasicExpr()
             endPos = basicExpr.endPos
             assert(endPos is not None)
             assert(basicExpr is not None)
-            return VarAssignNode(startPos, endPos, varName, basicExpr), None
-        basicExpr, err = self.makeBasicExpr()
-        if err:
-            return None, err
-        return basicExpr, None
+            return VarAssignNode(startPos, endPos, varName, basicExpr)
+        return self.makeBasicExpr()
     
-    def makeBasicExpr(self) -> ParseResult:
+    def makeOperand(self) -> Optional[Node]:
+        # A broken second operand has always been reported by the check on the token after it
+        try:
+            return self.makeBasicExpr()
+        except InvalidSyntaxError:
+            return None
+    
+    def makeBasicExpr(self) -> Node:
         if self.token.type == TT_EOF:
-            return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Unexpected EOF. Error id: 5")
+            raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Unexpected EOF. Error id: 5")
         if self.token.type == TT_INT:
             startPos = self.token.startPos
             endPos = self.token.endPos
             value = self.token.value
             self.advance()
             assert(isinstance(value, int))
-            return IntNode(startPos, endPos, value), None
+            return IntNode(startPos, endPos, value)
         if self.token.type == TT_FLOAT:
             startPos = self.token.startPos
             endPos = self.token.endPos
             value = self.token.value
             self.advance()
             assert(isinstance(value, float))
-            return FloatNode(startPos, endPos, value), None
+            return FloatNode(startPos, endPos, value)
         if self.token.type == TT_STRING:
             startPos = self.token.startPos
             endPos = self.token.endPos
             value = self.token.value
             self.advance()
             assert(isinstance(value, str))
-            return StringNode(startPos, endPos, value), None
+            return StringNode(startPos, endPos, value)
         if self.token.type == TT_POUND:
             startPos = self.token.startPos
             endPos = self.token.endPos
             self.advance()
-            return InputNode(startPos, endPos), None
+            return InputNode(startPos, endPos)
         if self.token.type == TT_DOLLAR:
             startPos = self.token.startPos
             self.advance()
             if self.token.type != TT_LPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 6")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 6")
             self.advance()
-            basicExpr, err = self.makeBasicExpr()
-            if err:
-                return None, err
+            basicExpr = self.makeBasicExpr()
             if self.token.type != TT_RPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 7")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 7")
             endPos = self.token.endPos
             self.advance()
             assert(basicExpr is not None)
-            return PrintNode(startPos, endPos, basicExpr), None
+            return PrintNode(startPos, endPos, basicExpr)
         if self.token.type == TT_PLUS:
             startPos = self.token.startPos
             self.advance()
             if self.token.type != TT_LPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 8")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 8")
             self.advance()
-            leftNode, err = self.makeBasicExpr()
-            if err:
-                return None, err
+            leftNode = self.makeBasicExpr()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 9")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 9")
             self.advance()
-            rightNode, err = self.makeBasicExpr()
+            rightNode = self.makeOperand()
             if self.token.type != TT_RPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 10")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 10")
             endPos = self.token.endPos
             self.advance()
             assert(leftNode is not None)
             assert(rightNode is not None)
-            return PlusNode(startPos, endPos, leftNode, rightNode), None
+            return PlusNode(startPos, endPos, leftNode, rightNode)
         if self.token.type == TT_MINUS:
             startPos = self.token.startPos
             self.advance()
             if self.token.type != TT_LPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 11")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 11")
             self.advance()
-            leftNode, err = self.makeBasicExpr()
-            if err:
-                return None, err
+            leftNode = self.makeBasicExpr()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 12")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 12")
             self.advance()
-            rightNode, err = self.makeBasicExpr()
+            rightNode = self.makeOperand()
             if self.token.type != TT_RPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 13")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 13")
             endPos = self.token.endPos
             self.advance()
             assert(leftNode is not None)
             assert(rightNode is not None)
-            return MinusNode(startPos, endPos, leftNode, rightNode), None
+            return MinusNode(startPos, endPos, leftNode, rightNode)
         if self.token.type == TT_MUL:
             startPos = self.token.startPos
             self.advance()
             if self.token.type != TT_LPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 14")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 14")
             self.advance()
-            leftNode, err = self.makeBasicExpr()
-            if err:
-                return None, err
+            leftNode = self.makeBasicExpr()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 15")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 15")
             self.advance()
-            rightNode, err = self.makeBasicExpr()
+            rightNode = self.makeOperand()
             if self.token.type != TT_RPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 16")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 16")
             endPos = self.token.endPos
             self.advance()
             assert(leftNode is not None)
             assert(rightNode is not None)
-            return MulNode(startPos, endPos, leftNode, rightNode), None
+            return MulNode(startPos, endPos, leftNode, rightNode)
         if self.token.type == TT_DIV:
             startPos = self.token.startPos
             self.advance()
             if self.token.type != TT_LPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 17")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 17")
             self.advance()
-            leftNode, err = self.makeBasicExpr()
-            if err:
-                return None, err
+            leftNode = self.makeBasicExpr()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 18")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 18")
             self.advance()
-            rightNode, err = self.makeBasicExpr()
+            rightNode = self.makeOperand()
             if self.token.type != TT_RPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 19")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 19")
             endPos = self.token.endPos
             self.advance()
             assert(leftNode is not None)
             assert(rightNode is not None)
-            return DivNode(startPos, endPos, leftNode, rightNode), None
+            return DivNode(startPos, endPos, leftNode, rightNode)
         if self.token.type == TT_MOD:
             startPos = self.token.startPos
             self.advance()
             if self.token.type != TT_LPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 20")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 20")
             self.advance()
-            leftNode, err = self.makeBasicExpr()
-            if err:
-                return None, err
+            leftNode = self.makeBasicExpr()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 21")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 21")
             self.advance()
-            rightNode, err = self.makeBasicExpr()
+            rightNode = self.makeOperand()
             if self.token.type != TT_RPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 22")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 22")
             endPos = self.token.endPos
             self.advance()
             assert(leftNode is not None)
             assert(rightNode is not None)
-            return ModNode(startPos, endPos, leftNode, rightNode), None
+            return ModNode(startPos, endPos, leftNode, rightNode)
         if self.token.type == TT_AT:
             startPos = self.token.startPos
             self.advance()
             if self.token.type != TT_LPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 23")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 23")
             self.advance()
-            fromNode, err = self.makeBasicExpr()
-            if err:
-                return None, err
+            fromNode = self.makeBasicExpr()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 24")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 24")
             self.advance()
-            toNode, err = self.makeBasicExpr()
+            toNode = self.makeOperand()
             if self.token.type != TT_RPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 25")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 25")
             endPos = self.token.endPos
             self.advance()
             assert(fromNode is not None)
             assert(toNode is not None)
-            return RandNode(startPos, endPos, fromNode, toNode), None
+            return RandNode(startPos, endPos, fromNode, toNode)
         if self.token.type == TT_EQUAL:
             startPos = self.token.startPos
             self.advance()
             if self.token.type != TT_LPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 26")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 26")
             self.advance()
-            leftNode, err = self.makeBasicExpr()
-            if err:
-                return None, err
+            leftNode = self.makeBasicExpr()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 27")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 27")
             self.advance()
-            rightNode, err = self.makeBasicExpr()
+            rightNode = self.makeOperand()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 28")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 28")
             self.advance()
-            exprNodes, err = self.makeExprs()
-            if err:
-                return None, err
+            exprNodes = self.makeExprs()
             if self.token.type != TT_RPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 29")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 29")
             endPos = self.token.endPos
             self.advance()
             assert(leftNode is not None)
             assert(rightNode is not None)
-            return EqualNode(startPos, endPos, leftNode, rightNode, exprNodes), None
+            return EqualNode(startPos, endPos, leftNode, rightNode, exprNodes)
         if self.token.type == TT_LESSTHAN:
             startPos = self.token.startPos
             self.advance()
             if self.token.type != TT_LPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 30")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 30")
             self.advance()
-            leftNode, err = self.makeBasicExpr()
-            if err:
-                return None, err
+            leftNode = self.makeBasicExpr()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 31")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 31")
             self.advance()
-            rightNode, err = self.makeBasicExpr()
+            rightNode = self.makeOperand()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 32")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 32")
             self.advance()
-            exprNodes, err = self.makeExprs()
-            if err:
-                return None, err
+            exprNodes = self.makeExprs()
             if self.token.type != TT_RPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 33")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 33")
             endPos = self.token.endPos
             self.advance()
             assert(leftNode is not None)
             assert(rightNode is not None)
-            return LessThanNode(startPos, endPos, leftNode, rightNode, exprNodes), None
+            return LessThanNode(startPos, endPos, leftNode, rightNode, exprNodes)
         if self.token.type == TT_GREATERTHAN:
             startPos = self.token.startPos
             self.advance()
             if self.token.type != TT_LPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 34")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 34")
             self.advance()
-            leftNode, err = self.makeBasicExpr()
-            if err:
-                return None, err
+            leftNode = self.makeBasicExpr()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 35")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 35")
             self.advance()
-            rightNode, err = self.makeBasicExpr()
+            rightNode = self.makeOperand()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 36")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 36")
             self.advance()
-            exprNodes, err = self.makeExprs()
-            if err:
-                return None, err
+            exprNodes = self.makeExprs()
             if self.token.type != TT_RPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 37")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 37")
             endPos = self.token.endPos
             self.advance()
             assert(leftNode is not None)
             assert(rightNode is not None)
-            return GreaterThanNode(startPos, endPos, leftNode, rightNode, exprNodes), None
+            return GreaterThanNode(startPos, endPos, leftNode, rightNode, exprNodes)
         if self.token.type == TT_NOTEQUAL:
             startPos = self.token.startPos
             self.advance()
             if self.token.type != TT_LPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 38")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected '('. Error id: 38")
             self.advance()
-            leftNode, err = self.makeBasicExpr()
-            if err:
-                return None, err
+            leftNode = self.makeBasicExpr()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 39")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 39")
             self.advance()
-            rightNode, err = self.makeBasicExpr()
+            rightNode = self.makeOperand()
             if self.token.type != TT_COMMA:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 40")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ','. Error id: 40")
             self.advance()
-            exprNodes, err = self.makeExprs()
-            if err:
-                return None, err
+            exprNodes = self.makeExprs()
             if self.token.type != TT_RPAREN:
-                return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 41")
+                raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 41")
             endPos = self.token.endPos
             self.advance()
             assert(leftNode is not None)
             assert(rightNode is not None)
-            return NotEqualNode(startPos, endPos, leftNode, rightNode, exprNodes), None
+            return NotEqualNode(startPos, endPos, leftNode, rightNode, exprNodes)
         if self.token.type == TT_IDENTIFIER:
             varName = self.token.value
             assert(isinstance(varName, str))
@@ -583,20 +733,27 @@ class Parser:
                 self.advance()
                 params = []
                 if self.token.type != TT_RPAREN:
-                    basicExpr, err = self.makeBasicExpr()
-                    if err:
-                        return None, err
+                    basicExpr = self.makeBasicExpr()
                     params.append(basicExpr)
                     while self.token.type == TT_COMMA:
                         self.advance()
-                        basicExpr, err = self.makeBasicExpr()
-                        if err:
-                            return None, err
+                        basicExpr = self.makeBasicExpr()
                         params.append(basicExpr)
                 if self.token.type != TT_RPAREN:
-                    return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 42")
+                    raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected ')'. Error id: 42")
                 endPos = self.token.endPos
                 self.advance()
-                return CallNode(startPos, endPos, varName, params), None
-            return VarAccessNode(startPos, endPos, varName), None
-        return None, InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected valid basic expression. Error id: 43")
\ No newline at end of file
+                return CallNode(startPos, endPos, varName, params)
+            return VarAccessNode(startPos, endPos, varName)
+        raise InvalidSyntaxError(self.token.startPos, self.token.endPos, "Expected valid basic expression. Error id: 43")
+
+def parseBody(node: AssignNode):
+    # The token that followed the body is gone, an end of file right after it stands in for it
+    last = node.tokens[-1]
+    parser = Parser(node.tokens + [Token(TT_EOF, None, last.endPos)])
+    exprNodes = parser.makeExprs()
+    if parser.token.type != TT_EOF:
+        raise InvalidSyntaxError(parser.token.startPos, parser.token.endPos, "Expected ','. Error id: 44")
+    parser.markTailCalls(exprNodes)
+    node.exprNodes = exprNodes
+    node.tokens = None
\ No newline at end of file
@@ -0,0 +1,131 @@
+from __future__ import annotations
+from typing import Dict, List, Tuple, Any
+
+import json
+import marshal
+import time
+
+from languageParser import ProgramNode, AssignNode
+
+class FunctionStats:
+    __slots__ = ("name", "calls", "primitiveCalls", "inclusive", "exclusive", "depth", "maxDepth", "callers")
+    
+    def __init__(self, name: str):
+        self.name: str = name
+        self.calls: int = 0
+        # Calls that were not made from inside another activation of the same function
+        self.primitiveCalls: int = 0
+        self.inclusive: float = 0.0
+        self.exclusive: float = 0.0
+        self.depth: int = 0
+        self.maxDepth: int = 0
+        # Caller name -> [calls, time spent in this function for them]
+        self.callers: Dict[str, List[Any]] = {}
+    
+    def toDict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "primitiveCalls": self.primitiveCalls,
+            "inclusive": self.inclusive,
+            "exclusive": self.exclusive,
+            "maxDepth": self.maxDepth,
+            "callers": {caller: {"calls": calls, "time": elapsed} for caller, (calls, elapsed) in self.callers.items()},
+        }
+
+SORT_KEYS = {
+    "calls": lambda stats: stats.calls,
+    "inclusive": lambda stats: stats.inclusive,
+    "exclusive": lambda stats: stats.exclusive,
+    "depth": lambda stats: stats.maxDepth,
+    "name": lambda stats: stats.name,
+}
+
+PROGRAM_NAME = "<program>"
+
+class Profiler:
+    def __init__(self, fileName: str = "<funke>"):
+        self.fileName: str = fileName
+        self.functions: Dict[str, FunctionStats] = {}
+        self.lines: Dict[str, int] = {}
+        # Open activations: stats, caller name, start time, time spent in callees
+        self.stack: List[List[Any]] = []
+        self.timer = time.perf_counter
+    
+    def addDefinitions(self, ast: ProgramNode):
+        for node in ast.nodes:
+            if isinstance(node, AssignNode) and node.funcName not in self.lines:
+                self.lines[node.funcName] = node.startPos.line + 1 if node.startPos is not None else 0
+    
+    def enter(self, name: str):
+        stats = self.functions.get(name)
+        if stats is None:
+            stats = self.functions[name] = FunctionStats(name)
+        stats.calls += 1
+        if stats.depth == 0:
+            stats.primitiveCalls += 1
+        stats.depth += 1
+        if stats.depth > stats.maxDepth:
+            stats.maxDepth = stats.depth
+        caller = self.stack[-1][0].name if self.stack else PROGRAM_NAME
+        self.stack.append([stats, caller, self.timer(), 0.0])
+    
+    def leave(self):
+        stats, caller, start, childTime = self.stack.pop()
+        elapsed = self.timer() - start
+        stats.exclusive += elapsed - childTime
+        stats.depth -= 1
+        # Time of a recursive activation is already part of the outermost one
+        if stats.depth == 0:
+            stats.inclusive += elapsed
+        edge = stats.callers.get(caller)
+        if edge is None:
+            edge = stats.callers[caller] = [0, 0.0]
+        edge[0] += 1
+        edge[1] += elapsed
+        if self.stack:
+            self.stack[-1][3] += elapsed
+    
+    def switch(self, name: str):
+        # A tail call ends the current activation and starts the callee in its place
+        self.leave()
+        self.enter(name)
+    
+    def finish(self):
+        while self.stack:
+            self.leave()
+    
+    def sortedStats(self, sortBy: str = "exclusive") -> List[FunctionStats]:
+        return sorted(self.functions.values(), key=SORT_KEYS[sortBy], reverse=sortBy != "name")
+    
+    def formatTable(self, sortBy: str = "exclusive") -> str:
+        lines = [f"{'function':<20} {'calls':>10} {'inclusive':>12} {'exclusive':>12} {'per call':>10} {'depth':>6}"]
+        for stats in self.sortedStats(sortBy):
+            perCall = stats.exclusive / stats.calls if stats.calls else 0.0
+            lines.append(f"{stats.name:<20} {stats.calls:>10} {stats.inclusive * 1000:>10.3f}ms {stats.exclusive * 1000:>10.3f}ms {perCall * 1e6:>8.2f}us {stats.maxDepth:>6}")
+        return "\n".join(lines)
+    
+    def toJSON(self) -> str:
+        return json.dumps({"file": self.fileName, "functions": [stats.toDict() for stats in self.sortedStats("name")]}, indent=2)
+    
+    def functionKey(self, name: str) -> Tuple[str, int, str]:
+        return (self.fileName, self.lines.get(name, 0), name)
+    
+    def toPstats(self) -> Dict[Tuple[str, int, str], Tuple[Any, ...]]:
+        # The layout pstats.Stats reads back: (primitive calls, calls, exclusive, inclusive, callers)
+        res = {}
+        for name, stats in self.functions.items():
+            callers = {}
+            for caller, (calls, elapsed) in stats.callers.items():
+                if caller != PROGRAM_NAME:
+                    callers[self.functionKey(caller)] = (calls, calls, elapsed, elapsed)
+            res[self.functionKey(name)] = (stats.primitiveCalls, stats.calls, stats.exclusive, stats.inclusive, callers)
+        return res
+    
+    def dump(self, path: str):
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                f.write(self.toJSON())
+        else:
+            with open(path, "wb") as f:
+                marshal.dump(self.toPstats(), f)
\ No newline at end of file
@@ -0,0 +1,141 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from languageParser import ProgramNode, AssignNode
+from languageInterpreter import Context, Interpreter, RuntimeResult
+from languageCompiler import Compiler
+from languageVM import VM
+from languageTranspiler import Transpiler, PythonCode, PythonRunner
+from languageMemo import MemoCache
+from languageBatch import callBatch
+from languageIO import OutputSink, StdoutSink, InputSource, PromptSource
+from values import Value, IntValue, FloatValue, StringValue, FunctionValue
+from error import Error, RTError
+
+def toValue(arg: Any) -> Tuple[Optional[Value], Optional[Error]]:
+    if isinstance(arg, Value):
+        return arg, None
+    # bool is an int subclass, but Funke has no booleans to map it to
+    if isinstance(arg, int) and not isinstance(arg, bool):
+        return IntValue(arg), None
+    if isinstance(arg, float):
+        return FloatValue(arg), None
+    if isinstance(arg, str):
+        return StringValue(arg), None
+    return None, RTError(None, None, f"Cannot pass {type(arg).__name__} {arg!r} to Funke")
+
+def fromValue(value: Optional[Value]) -> Any:
+    if type(value) in (IntValue, FloatValue, StringValue):
+        return value.value
+    return value
+
+class Function:
+    def __init__(self, program: Program, name: str, value: FunctionValue):
+        self.program: Program = program
+        self.name: str = name
+        self.value: FunctionValue = value
+    
+    def call(self, *args: Any) -> Tuple[Any, Optional[Error]]:
+        if len(args) != len(self.value.paramNames):
+            return None, RTError(self.value.startPos, self.value.endPos, f"{self.name} takes {len(self.value.paramNames)} arguments, got {len(args)}")
+        params = []
+        for arg in args:
+            param, err = toValue(arg)
+            if err:
+                return None, err
+            params.append(param)
+        try:
+            res = self.program.callValue(self.value, params)
+        except Error as err:
+            return None, err
+        return fromValue(res), None
+    
+    def callBatch(self, *columns: Sequence[Any]) -> Tuple[Any, Optional[Error]]:
+        return callBatch(self, columns)
+    
+    def __repr__(self) -> str:
+        return f"<Function {self.name}({', '.join(self.value.paramNames)})>"
+
+class Program:
+    def __init__(self, ast: ProgramNode, backend: str = "interpreter", memoSize: int = 1024, output: Optional[OutputSink] = None, input: Optional[InputSource] = None):
+        self.ast: ProgramNode = ast
+        self.backend: str = backend
+        self.memoSize: int = memoSize
+        self.output: OutputSink = output if output is not None else StdoutSink()
+        self.input: InputSource = input if input is not None else PromptSource(self.output)
+        self.memoCaches: Dict[str, MemoCache] = {}
+        self.globals: Dict[str, Value] = {}
+        self.functions: Dict[str, Function] = {}
+        self.pythonCode: Optional[PythonCode] = None
+        self.define()
+    
+    def define(self):
+        # Only the definitions run up front, the program's own expression runs with run()
+        definitions = [node for node in self.ast.nodes if isinstance(node, AssignNode)]
+        context = Context()
+        self.interpreter: Interpreter = Interpreter(self.ast, self.memoSize, output=self.output, input=self.input)
+        if definitions:
+            definitionsNode = ProgramNode(self.ast.startPos, self.ast.endPos, definitions)
+            # Definitions only bind functions, so running them never fails
+            if self.backend == "vm":
+                runner = VM(Compiler().compileProgram(definitionsNode), context, self.memoSize, output=self.output, input=self.input)
+                runner.run()
+            elif self.backend == "python":
+                # Calls reuse the functions transpiled here instead of transpiling them again
+                self.pythonCode = Transpiler().transpileProgram(definitionsNode)
+                runner = PythonRunner(self.pythonCode, context, self.memoSize, output=self.output, input=self.input)
+                runner.run()
+            else:
+                runner = self.interpreter
+                runner.visit(definitionsNode, context)
+            self.memoCaches.update(runner.memoCaches)
+        self.globals = context.symbolTable
+    
+    def getFunction(self, name: str) -> Optional[Function]:
+        function = self.functions.get(name)
+        if function is None:
+            value = self.globals.get(name)
+            if not isinstance(value, FunctionValue):
+                return None
+            function = self.functions[name] = Function(self, name, value)
+        return function
+    
+    def call(self, name: str, *args: Any) -> Tuple[Any, Optional[Error]]:
+        function = self.getFunction(name)
+        if function is None:
+            return None, RTError(None, None, f"Function {name} is not defined")
+        return function.call(*args)
+    
+    def callBatch(self, name: str, *columns: Sequence[Any]) -> Tuple[Any, Optional[Error]]:
+        function = self.getFunction(name)
+        if function is None:
+            return None, RTError(None, None, f"Function {name} is not defined")
+        return function.callBatch(*columns)
+    
+    def callValue(self, func: FunctionValue, params: List[Value]) -> Optional[Value]:
+        # Every call starts from the definitions, so nothing one call assigns leaks into the next
+        context = Context(dict(self.globals))
+        try:
+            if self.backend == "vm":
+                return VM(None, context, self.memoSize, output=self.output, input=self.input).callFunction(func, params)
+            if self.backend == "python":
+                return PythonRunner(self.pythonCode, context, self.memoSize, output=self.output, input=self.input).callFunction(func, params)
+            return self.interpreter.callFunction(func, params, context)
+        finally:
+            self.output.flush()
+    
+    def run(self) -> RuntimeResult:
+        context = Context(dict(self.globals))
+        try:
+            if self.backend == "vm":
+                return VM(Compiler().compileProgram(self.ast), context, self.memoSize, output=self.output, input=self.input).run(), None
+            if self.backend == "python":
+                return PythonRunner(Transpiler().transpileProgram(self.ast), context, self.memoSize, output=self.output, input=self.input).run(), None
+            return self.interpreter.visit(self.ast, context), None
+        except Error as err:
+            return None, err
+        finally:
+            self.output.flush()
+    
+    def __repr__(self) -> str:
+        return f"<Program [{', '.join(name for name, value in self.globals.items() if isinstance(value, FunctionValue))}]>"
\ No newline at end of file
@@ -0,0 +1,113 @@
+from __future__ import annotations
+from typing import Dict, Optional, Iterator, Iterable, Any
+
+import time
+import tracemalloc
+
+from languageParser import Node
+
+class PhaseReport:
+    __slots__ = ("name", "wall", "cpu", "peakMemory")
+    
+    def __init__(self, name: str):
+        self.name: str = name
+        self.wall: float = 0.0
+        self.cpu: float = 0.0
+        self.peakMemory: Optional[int] = None
+    
+    def toDict(self) -> Dict[str, Any]:
+        return {"wall": self.wall, "cpu": self.cpu, "peakMemory": self.peakMemory}
+    
+    def __repr__(self) -> str:
+        return f"PhaseReport [{self.name}, wall={self.wall:.6f}, cpu={self.cpu:.6f}, peakMemory={self.peakMemory}]"
+
+class RunReport:
+    def __init__(self, traceMemory: bool = False):
+        self.traceMemory: bool = traceMemory
+        self.phases: Dict[str, PhaseReport] = {}
+        self.tokenCount: Optional[int] = None
+        self.nodeCount: Optional[int] = None
+        self.ownsTrace: bool = False
+        self.lastWall: float = 0.0
+        self.lastCpu: float = 0.0
+    
+    def start(self):
+        if self.traceMemory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.ownsTrace = True
+        self.restart()
+    
+    def restart(self):
+        # Whatever ran since the last mark is not charged to any phase
+        if self.traceMemory:
+            tracemalloc.reset_peak()
+        self.lastWall = time.perf_counter()
+        self.lastCpu = time.process_time()
+    
+    def mark(self, name: str):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = PhaseReport(name)
+        phase.wall += wall - self.lastWall
+        phase.cpu += cpu - self.lastCpu
+        if self.traceMemory:
+            peak = tracemalloc.get_traced_memory()[1]
+            phase.peakMemory = peak if phase.peakMemory is None else max(phase.peakMemory, peak)
+            tracemalloc.reset_peak()
+        self.lastWall = wall
+        self.lastCpu = cpu
+    
+    def stop(self):
+        if self.ownsTrace:
+            tracemalloc.stop()
+            self.ownsTrace = False
+    
+    def countTokens(self, tokens: Iterable[Any]) -> Iterator[Any]:
+        self.tokenCount = 0
+        for token in tokens:
+            self.tokenCount += 1
+            yield token
+    
+    def countNodes(self, node: Node):
+        count = 0
+        stack = [node]
+        while stack:
+            count += 1
+            stack.extend(stack.pop().children())
+        self.nodeCount = count
+    
+    @property
+    def wall(self) -> float:
+        return sum(phase.wall for phase in self.phases.values())
+    
+    @property
+    def cpu(self) -> float:
+        return sum(phase.cpu for phase in self.phases.values())
+    
+    def toDict(self) -> Dict[str, Any]:
+        return {
+            "phases": {name: phase.toDict() for name, phase in self.phases.items()},
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "tokens": self.tokenCount,
+            "nodes": self.nodeCount,
+        }
+    
+    def format(self) -> str:
+        lines = [f"{'phase':<10} {'wall':>12} {'cpu':>12}" + (f" {'peak memory':>12}" if self.traceMemory else "")]
+        for phase in self.phases.values():
+            line = f"{phase.name:<10} {phase.wall * 1000:>10.3f}ms {phase.cpu * 1000:>10.3f}ms"
+            if self.traceMemory:
+                line += f" {phase.peakMemory / 1024:>10.1f}KB"
+            lines.append(line)
+        lines.append(f"{'total':<10} {self.wall * 1000:>10.3f}ms {self.cpu * 1000:>10.3f}ms")
+        if self.tokenCount is not None:
+            lines.append(f"tokens: {self.tokenCount}")
+        if self.nodeCount is not None:
+            lines.append(f"AST nodes: {self.nodeCount}")
+        return "\n".join(lines)
+    
+    def __repr__(self) -> str:
+        return f"RunReport [{', '.join(repr(phase) for phase in self.phases.values())}, tokens={self.tokenCount}, nodes={self.nodeCount}]"
\ No newline at end of file
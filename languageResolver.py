@@ -0,0 +1,40 @@
+from __future__ import annotations
+from typing import Dict, List
+
+from languageParser import Node, ProgramNode, AssignNode, VarAssignNode, VarAccessNode
+
+class Resolver:
+    def resolve(self, ast: ProgramNode):
+        for node in ast.nodes:
+            if isinstance(node, AssignNode):
+                self.resolveFunction(node)
+    
+    def resolveFunction(self, node: AssignNode):
+        # Parameter i lives in slot i, so a repeated parameter name resolves to its last occurrence
+        slots = {}
+        for i, param in enumerate(node.params):
+            slots[param] = i
+        numSlots = len(node.params)
+        # Everything assigned in the body is local to the call, wherever the assignment is
+        localNames = []
+        for expr in node.exprNodes:
+            self.collectLocals(expr, localNames)
+        for varName in localNames:
+            if varName not in slots:
+                slots[varName] = numSlots
+                numSlots += 1
+        for expr in node.exprNodes:
+            self.resolveNode(expr, slots)
+        node.numSlots = numSlots
+    
+    def collectLocals(self, node: Node, localNames: List[str]):
+        if isinstance(node, VarAssignNode):
+            localNames.append(node.varName)
+        for child in node.children():
+            self.collectLocals(child, localNames)
+    
+    def resolveNode(self, node: Node, slots: Dict[str, int]):
+        if isinstance(node, (VarAssignNode, VarAccessNode)):
+            node.slot = slots.get(node.varName)
+        for child in node.children():
+            self.resolveNode(child, slots)
\ No newline at end of file
@@ -0,0 +1,518 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional, NoReturn
+
+import random
+
+from languageParser import Node, ProgramNode, AssignNode, VarAssignNode, VarAccessNode, IntNode, FloatNode, StringNode, InputNode, PrintNode, PlusNode, MinusNode, MulNode, DivNode, ModNode, EqualNode, LessThanNode, GreaterThanNode, NotEqualNode, CallNode, RandNode
+from languageInterpreter import Context, Interpreter
+from languageMemo import MemoCache, memoKey, walk
+from languageProfiler import Profiler
+from languageIO import OutputSink, StdoutSink, InputSource
+from values import Value, IntValue, FloatValue, StringValue, FunctionValue, SMALL_INTS, SPECIALIZED_ARITHMETIC
+from error import RTError
+
+# Method of values.py each operation falls back to, and the Python operator of its fast paths
+ARITHMETIC = {PlusNode: ("add", "+"), MinusNode: ("sub", "-"), MulNode: ("mul", "*"), DivNode: ("div", "//"), ModNode: ("mod", "%")}
+COMPARISONS = {EqualNode: ("eq", "=="), LessThanNode: ("lt", "<"), GreaterThanNode: ("gt", ">"), NotEqualNode: ("ne", "!=")}
+# Specialized operation -> the operand types it was proven to get
+OPERAND_KINDS = {operation: (leftKind, rightKind) for (_, leftKind, rightKind), operation in SPECIALIZED_ARITHMETIC.items()}
+
+class TailCall:
+    __slots__ = ("func", "params", "fallback")
+    
+    def __init__(self, func: Value, params: List[Optional[Value]], fallback: Optional[Value]):
+        self.func: Value = func
+        self.params: List[Optional[Value]] = params
+        # Result of the activations the tail call replaced, for when the callee returns None
+        self.fallback: Optional[Value] = fallback
+
+def undefinedName(node: VarAccessNode) -> NoReturn:
+    raise RTError(node.startPos, node.endPos, f"Name '{node.varName}' is not defined")
+
+def undefinedFunction(node: CallNode) -> NoReturn:
+    raise RTError(node.startPos, node.endPos, f"Function {node.funcName} is not defined")
+
+class Operand:
+    __slots__ = ("expr", "kind", "raw", "nullable")
+    
+    def __init__(self, expr: str, kind: Optional[type] = None, raw: Optional[str] = None, nullable: bool = True):
+        # Python expression that holds the value; it is only ever a name, so it can be read any number of times
+        self.expr: str = expr
+        # Value class the operand is known to have before the program runs
+        self.kind: Optional[type] = kind
+        # Python expression for the unboxed value
+        self.raw: str = raw if raw is not None else f"{expr}.value"
+        self.nullable: bool = nullable
+
+class PythonCode:
+    def __init__(self, transpiler: Transpiler, main: str, definitions: Dict[str, AssignNode]):
+        self.transpiler: Transpiler = transpiler
+        # Constants and nodes are added to the namespace as the transpiler creates them
+        self.namespace: Dict[str, Any] = transpiler.constants
+        self.namespace.update(IntValue=IntValue, FloatValue=FloatValue, FunctionValue=FunctionValue, SMALL_INTS=SMALL_INTS, TailCall=TailCall, undefinedName=undefinedName, undefinedFunction=undefinedFunction)
+        # Functions are only transpiled and compiled the first time they are called, so large programs start right away
+        self.definitions: Dict[str, AssignNode] = definitions
+        self.sources: List[str] = []
+        self.load(main)
+    
+    def load(self, source: str):
+        self.sources.append(source)
+        exec(compile(source, "<funke>", "exec"), self.namespace)
+    
+    def function(self, name: str) -> Callable[..., Any]:
+        native = self.namespace.get(name)
+        if native is None:
+            self.load(self.transpiler.transpileFunction(self.definitions[name], name))
+            native = self.namespace[name]
+        return native
+    
+    def disassemble(self) -> str:
+        for name in self.definitions:
+            self.function(name)
+        return "\n".join(self.sources)
+    
+    def __repr__(self) -> str:
+        return f"<PythonCode {len(self.definitions)} functions>"
+
+class Transpiler:
+    def __init__(self):
+        self.lines: List[str] = []
+        self.depth: int = 0
+        self.constants: Dict[str, Any] = {}
+        self.numConstants: int = 0
+        self.nodeNames: Dict[int, str] = {}
+        self.temps: int = 0
+        self.function: Optional[AssignNode] = None
+        self.functionName: Optional[str] = None
+        self.loops: bool = False
+        self.hasRes: bool = False
+    
+    def transpileProgram(self, ast: ProgramNode) -> PythonCode:
+        definitions = {}
+        self.lines = []
+        self.function = None
+        self.temps = 0
+        self.emit("def main():")
+        self.depth += 1
+        res = "None"
+        for node in ast.nodes:
+            if isinstance(node, AssignNode):
+                name = f"f{len(definitions)}"
+                definitions[name] = node
+                res = self.temp()
+                self.emit(f"{res} = define({self.nodeName(node)}, {name!r})")
+                self.emit(f"g[{node.funcName!r}] = {res}")
+            else:
+                res = self.transpile(node).expr
+        self.emit(f"return {res}")
+        self.depth -= 1
+        return PythonCode(self, "\n".join(self.lines) + "\n", definitions)
+    
+    def emit(self, line: str):
+        self.lines.append("    " * self.depth + line)
+    
+    def temp(self) -> str:
+        self.temps += 1
+        return f"t{self.temps}"
+    
+    def constant(self, value: Value) -> str:
+        name = f"k{self.numConstants}"
+        self.numConstants += 1
+        self.constants[name] = value
+        return name
+    
+    def nodeName(self, node: Node) -> str:
+        # Nodes are only needed for their positions, by errors and by the values that carry one
+        name = self.nodeNames.get(id(node))
+        if name is None:
+            name = self.nodeNames[id(node)] = f"n{len(self.nodeNames)}"
+            self.constants[name] = node
+        return name
+    
+    def assertions(self, *operands: Operand) -> List[str]:
+        # The interpreter asserts its operands are there before it calls a method on them
+        nullable = [f"{operand.expr} is not None" for operand in operands if operand.nullable]
+        return [f"assert({' and '.join(nullable)})"] if nullable else []
+    
+    def transpileFunction(self, node: AssignNode, name: str) -> str:
+        self.lines = []
+        self.depth = 0
+        self.function = node
+        self.functionName = name
+        self.temps = 0
+        # Only a function that tail calls itself needs a loop, every other tail call goes back through the caller
+        self.loops = any(isinstance(child, CallNode) and child.isTail and child.funcName == node.funcName for expr in node.exprNodes for child in walk(expr))
+        self.hasRes = len(node.exprNodes) > 1
+        self.emit(f"def {name}(params, fallback):")
+        self.depth += 1
+        self.emit(f"# {node.funcName}({', '.join(node.params)})")
+        for i, param in enumerate(node.params):
+            self.emit(f"{self.paramTarget(param, i)} = params[{i}]")
+        if node.isPure and node.numSlots is None and node.params:
+            # Memoized calls record the names they write, and with dynamic scoping the parameters are written on every call
+            self.emit("log = context.writeLog")
+            self.emit("if log is not None:")
+            self.emit(f"    log.update({tuple(node.params)!r})")
+        if self.loops:
+            self.emit("while True:")
+            self.depth += 1
+        if node.numSlots is not None:
+            for slot in range(len(node.params), node.numSlots):
+                self.emit(f"s{slot} = None")
+        if self.hasRes:
+            self.emit("res = None")
+        for expr in node.exprNodes[:-1]:
+            operand = self.transpile(expr)
+            if operand.nullable:
+                self.emit(f"if {operand.expr} is not None:")
+                self.emit(f"    res = {operand.expr}")
+            else:
+                self.emit(f"res = {operand.expr}")
+        self.transpileTail(node.exprNodes[-1])
+        return "\n".join(self.lines) + "\n"
+    
+    def paramTarget(self, param: str, i: int) -> str:
+        return f"g[{param!r}]" if self.function.numSlots is None else f"s{i}"
+    
+    def fallbackExpr(self) -> str:
+        return "(res if res is not None else fallback)" if self.hasRes else "fallback"
+    
+    def emitReturn(self, operand: Optional[Operand]):
+        if operand is None:
+            self.emit(f"return {self.fallbackExpr()}")
+        elif operand.nullable:
+            self.emit(f"return {operand.expr} if {operand.expr} is not None else {self.fallbackExpr()}")
+        else:
+            self.emit(f"return {operand.expr}")
+    
+    def transpileTail(self, node: Node):
+        # Every path through the last expression of a function ends in a return, or in a continue for a tail call to itself
+        if isinstance(node, CallNode) and node.isTail:
+            self.transpileTailCall(node)
+        elif type(node) in COMPARISONS:
+            self.emit(f"if {self.condition(node)}:")
+            self.depth += 1
+            for expr in node.exprNodes[:-1]:
+                self.transpile(expr)
+            if node.exprNodes:
+                self.transpileTail(node.exprNodes[-1])
+            else:
+                self.emitReturn(None)
+            self.depth -= 1
+            self.emitReturn(None)
+        else:
+            self.emitReturn(self.transpile(node))
+    
+    def transpileTailCall(self, node: CallNode):
+        func = self.lookupFunction(node)
+        params = [self.transpile(param).expr for param in node.params]
+        if self.loops and node.funcName == self.function.funcName and len(params) >= len(self.function.params):
+            self.emit(f"if type({func}) is FunctionValue and {func}.native is {self.functionName}:")
+            self.depth += 1
+            if self.hasRes:
+                self.emit("if res is not None:")
+                self.emit("    fallback = res")
+            self.emit("if profiler is not None:")
+            self.emit(f"    profiler.switch({self.function.funcName!r})")
+            for i, param in enumerate(self.function.params):
+                self.emit(f"{self.paramTarget(param, i)} = {params[i]}")
+            self.emit("continue")
+            self.depth -= 1
+        if self.hasRes:
+            self.emit("if res is not None:")
+            self.emit("    fallback = res")
+        self.emit(f"return TailCall({func}, [{', '.join(params)}], fallback)")
+    
+    def lookupFunction(self, node: CallNode) -> str:
+        func = self.temp()
+        self.emit(f"{func} = g.get({node.funcName!r}) or undefinedFunction({self.nodeName(node)})")
+        return func
+    
+    def transpile(self, node: Node) -> Operand:
+        methodName = f"transpile{type(node).__name__}"
+        method = getattr(self, methodName, self.noTranspileMethod)
+        return method(node)
+    
+    def noTranspileMethod(self, node: Node) -> NoReturn:
+        raise Exception(f"No transpile{type(node).__name__} method defined")
+    
+    def transpileVarAssignNode(self, node: VarAssignNode) -> Operand:
+        operand = self.transpile(node.value)
+        target = f"s{node.slot}" if node.slot is not None else f"g[{node.varName!r}]"
+        if operand.nullable:
+            self.emit(f"if {operand.expr} is not None:")
+            self.emit(f"    {target} = {operand.expr}")
+        else:
+            self.emit(f"{target} = {operand.expr}")
+        return operand
+    
+    def transpileVarAccessNode(self, node: VarAccessNode) -> Operand:
+        # The value is copied, so an assignment later in the same expression cannot change what was read
+        res = self.temp()
+        value = f"s{node.slot}" if node.slot is not None else f"g.get({node.varName!r})"
+        # Like the interpreter, a name is defined when its value is truthy, which every value is
+        self.emit(f"{res} = {value} or undefinedName({self.nodeName(node)})")
+        return Operand(res, nullable=False)
+    
+    def transpileIntNode(self, node: IntNode) -> Operand:
+        return Operand(self.constant(node.constant if node.constant is not None else IntValue(node.value, node.startPos, node.endPos)), IntValue, repr(node.value), False)
+    
+    def transpileFloatNode(self, node: FloatNode) -> Operand:
+        return Operand(self.constant(node.constant if node.constant is not None else FloatValue(node.value, node.startPos, node.endPos)), FloatValue, repr(node.value), False)
+    
+    def transpileStringNode(self, node: StringNode) -> Operand:
+        return Operand(self.constant(node.constant if node.constant is not None else StringValue(node.value, node.startPos, node.endPos)), StringValue, repr(node.value), False)
+    
+    def transpileInputNode(self, node: InputNode) -> Operand:
+        res = self.temp()
+        self.emit(f"{res} = readInput({self.nodeName(node)}, None)")
+        return Operand(res, nullable=False)
+    
+    def transpilePrintNode(self, node: PrintNode) -> Operand:
+        operand = self.transpile(node.node)
+        self.emit(f'write(f"{{{operand.expr}}}\\n")')
+        return operand
+    
+    def transpileRandNode(self, node: RandNode) -> Operand:
+        fromVal = self.transpile(node.fromNode)
+        toVal = self.transpile(node.toNode)
+        res = self.temp()
+        self.emit(f"{res} = rand({self.nodeName(node)}, {fromVal.expr}, {toVal.expr})")
+        return Operand(res, IntValue, nullable=False)
+    
+    def typeChecks(self, kind: type, *operands: Operand) -> Optional[List[str]]:
+        # None when an operand is known to have another type, so the fast path can never run
+        if any(operand.kind is not None and operand.kind is not kind for operand in operands):
+            return None
+        return [f"type({operand.expr}) is {kind.__name__}" for operand in operands if operand.kind is None]
+    
+    def arithmetic(self, node: Node) -> Operand:
+        methodName, op = ARITHMETIC[type(node)]
+        left = self.transpile(node.leftNode)
+        right = self.transpile(node.rightNode)
+        fallback = f"{left.expr}.{methodName}({right.expr})"
+        if node.operation is not None:
+            # Proven operands need no type checks, and whatever the fast paths leave goes to the specialized operation
+            leftKind, rightKind = OPERAND_KINDS[node.operation]
+            left = Operand(left.expr, leftKind, left.raw, False)
+            right = Operand(right.expr, rightKind, right.raw, False)
+            fallback = f"{self.constant(node.operation)}({left.expr}, {right.expr})"
+        res = self.temp()
+        paths = []
+        checks = self.typeChecks(IntValue, left, right)
+        if checks is not None and op in ("//", "%"):
+            # A zero divisor is an error, which the methods of values.py report
+            if right.kind is None:
+                checks.append(f"{right.raw} != 0")
+            elif right.raw == "0":
+                checks = None
+            elif not right.raw.isdigit():
+                checks.append(f"{right.raw} != 0")
+        if checks is not None:
+            paths.append((checks, [f"v = {left.raw} {op} {right.raw}", f"{res} = SMALL_INTS[v + 5] if -5 <= v <= 256 else IntValue(v)"]))
+        checks = self.typeChecks(FloatValue, left, right) if op in ("+", "-", "*") else None
+        if checks is not None:
+            paths.append((checks, [f"{res} = FloatValue({left.raw} {op} {right.raw})"]))
+        paths.append(([], self.assertions(left, right) + [f"{res} = {fallback}"]))
+        self.emitPaths(paths)
+        kind = None
+        if left.kind is right.kind and left.kind in (IntValue, FloatValue) or (left.kind is StringValue and (op, right.kind) in (("+", StringValue), ("*", IntValue))):
+            kind = left.kind
+        return Operand(res, kind, nullable=False)
+    
+    def emitPaths(self, paths: List[Any]):
+        for i, (checks, lines) in enumerate(paths):
+            if not checks:
+                if i > 0:
+                    self.emit("else:")
+                    self.depth += 1
+                for line in lines:
+                    self.emit(line)
+                if i > 0:
+                    self.depth -= 1
+                return
+            self.emit(f"{'if' if i == 0 else 'elif'} {' and '.join(checks)}:")
+            self.depth += 1
+            for line in lines:
+                self.emit(line)
+            self.depth -= 1
+    
+    def transpilePlusNode(self, node: PlusNode) -> Operand:
+        return self.arithmetic(node)
+    
+    def transpileMinusNode(self, node: MinusNode) -> Operand:
+        return self.arithmetic(node)
+    
+    def transpileMulNode(self, node: MulNode) -> Operand:
+        return self.arithmetic(node)
+    
+    def transpileDivNode(self, node: DivNode) -> Operand:
+        return self.arithmetic(node)
+    
+    def transpileModNode(self, node: ModNode) -> Operand:
+        return self.arithmetic(node)
+    
+    def condition(self, node: Node) -> str:
+        methodName, op = COMPARISONS[type(node)]
+        left = self.transpile(node.leftNode)
+        right = self.transpile(node.rightNode)
+        cond = self.temp()
+        if node.operation is not None:
+            # Both operands were proven to have the same type, which compares like its Python values
+            self.emit(f"{cond} = {left.raw} {op} {right.raw}")
+            return cond
+        paths = []
+        checks = self.typeChecks(IntValue, left, right)
+        if checks is not None:
+            paths.append((checks, [f"{cond} = {left.raw} {op} {right.raw}"]))
+        paths.append(([], self.assertions(left, right) + [f"{cond} = {left.expr}.{methodName}({right.expr})"]))
+        self.emitPaths(paths)
+        return cond
+    
+    def comparison(self, node: Node) -> Operand:
+        cond = self.condition(node)
+        res = self.temp()
+        self.emit(f"if {cond}:")
+        self.depth += 1
+        # A branch evaluates to its last expression, even when that one is None
+        operand = None
+        for expr in node.exprNodes:
+            operand = self.transpile(expr)
+        self.emit(f"{res} = {operand.expr if operand is not None else 'None'}")
+        self.depth -= 1
+        self.emit("else:")
+        self.emit(f"    {res} = None")
+        return Operand(res)
+    
+    def transpileEqualNode(self, node: EqualNode) -> Operand:
+        return self.comparison(node)
+    
+    def transpileLessThanNode(self, node: LessThanNode) -> Operand:
+        return self.comparison(node)
+    
+    def transpileGreaterThanNode(self, node: GreaterThanNode) -> Operand:
+        return self.comparison(node)
+    
+    def transpileNotEqualNode(self, node: NotEqualNode) -> Operand:
+        return self.comparison(node)
+    
+    def transpileCallNode(self, node: CallNode) -> Operand:
+        func = self.lookupFunction(node)
+        params = ", ".join(self.transpile(param).expr for param in node.params)
+        res = self.temp()
+        # Calls that need neither the memo nor the profiler go straight to the generated function
+        self.emit(f"if type({func}) is FunctionValue and {func}.memo is None and profiler is None:")
+        self.emit(f"    {res} = {func}.native([{params}], None)")
+        self.emit(f"    if type({res}) is TailCall:")
+        self.emit(f"        {res} = finish({res})")
+        self.emit("else:")
+        self.emit(f"    {res} = call({func}, [{params}])")
+        return Operand(res)
+
+class PythonRunner:
+    def __init__(self, code: PythonCode, context: Optional[Context] = None, memoSize: int = 1024, profiler: Optional[Profiler] = None, output: Optional[OutputSink] = None, input: Optional[InputSource] = None):
+        self.code: PythonCode = code
+        self.memoSize: int = memoSize
+        self.profiler: Optional[Profiler] = profiler
+        self.memoCaches: Dict[str, MemoCache] = {}
+        self.context: Context = context if context is not None else Context()
+        self.output: OutputSink = output if output is not None else StdoutSink("line")
+        self.interpreter: Interpreter = Interpreter(output=self.output, input=input)
+    
+    def bind(self):
+        # The generated functions look their runtime up as globals, so every run points them at its own context and sinks
+        self.code.namespace.update(
+            g=self.context.symbolTable,
+            context=self.context,
+            profiler=self.profiler,
+            define=self.makeFunction,
+            call=self.call,
+            finish=self.finish,
+            write=self.output.write,
+            readInput=self.interpreter.visitInputNode,
+            rand=self.rand,
+        )
+    
+    def run(self) -> Optional[Value]:
+        self.bind()
+        return self.code.namespace["main"]()
+    
+    def callFunction(self, func: FunctionValue, params: List[Value]) -> Optional[Value]:
+        self.bind()
+        return self.call(func, params)
+    
+    def makeFunction(self, node: AssignNode, name: str) -> FunctionValue:
+        f = FunctionValue(node.exprNodes, node.params, node.startPos, node.endPos)
+        f.name = node.funcName
+        f.numSlots = node.numSlots
+        f.native = self.code.namespace.get(name)
+        if f.native is None:
+            f.native = self.loader(f, name)
+        if node.isPure and self.memoSize > 0:
+            f.memo = MemoCache(self.memoSize)
+            self.memoCaches[node.funcName] = f.memo
+        return f
+    
+    def loader(self, f: FunctionValue, name: str) -> Callable[..., Any]:
+        def load(params: List[Optional[Value]], fallback: Optional[Value]) -> Any:
+            f.native = self.code.function(name)
+            return f.native(params, fallback)
+        return load
+    
+    def call(self, func: Value, params: List[Optional[Value]]) -> Optional[Value]:
+        if not isinstance(func, FunctionValue) or func.native is None:
+            return func.call(params, self.context, self.interpreter)
+        if self.profiler is None:
+            return self.callMemoized(func, params)
+        self.profiler.enter(func.name)
+        try:
+            return self.callMemoized(func, params)
+        finally:
+            self.profiler.leave()
+    
+    def callMemoized(self, func: FunctionValue, params: List[Optional[Value]]) -> Optional[Value]:
+        key = memoKey(params) if func.memo is not None else None
+        if key is None:
+            return self.runFunction(func, params)
+        context = self.context
+        entry = func.memo.get(key)
+        if entry is not None:
+            res, writes = entry
+            context.symbolTable.update(writes)
+            if context.writeLog is not None:
+                context.writeLog.update(writes)
+            return res
+        parentLog = context.writeLog
+        writeLog = context.writeLog = set()
+        try:
+            res = self.runFunction(func, params)
+        finally:
+            context.writeLog = parentLog
+        if parentLog is not None:
+            parentLog |= writeLog
+        func.memo.put(key, (res, {varName: context.symbolTable.get(varName) for varName in writeLog}))
+        return res
+    
+    def runFunction(self, func: FunctionValue, params: List[Optional[Value]]) -> Optional[Value]:
+        res = func.native(params, None)
+        if type(res) is TailCall:
+            res = self.finish(res)
+        return res
+    
+    def finish(self, tailCall: TailCall) -> Optional[Value]:
+        # Tail calls to other functions run here, one after the other, so they never grow the Python stack
+        while True:
+            func = tailCall.func
+            if not isinstance(func, FunctionValue) or func.native is None:
+                res = func.call(tailCall.params, self.context, self.interpreter)
+                return res if res is not None else tailCall.fallback
+            if self.profiler is not None:
+                self.profiler.switch(func.name)
+            res = func.native(tailCall.params, tailCall.fallback)
+            if type(res) is not TailCall:
+                return res
+            tailCall = res
+    
+    def rand(self, node: RandNode, fromVal: Value, toVal: Value) -> Value:
+        assert(isinstance(fromVal.value, int) and isinstance(toVal.value, int))
+        return IntValue(random.randint(fromVal.value, toVal.value), node.startPos, node.endPos)
\ No newline at end of file
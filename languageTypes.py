@@ -0,0 +1,248 @@
+from __future__ import annotations
+from typing import Callable, Deque, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from collections import deque
+
+from languageParser import Node, ProgramNode, AssignNode, VarAssignNode, VarAccessNode, IntNode, FloatNode, StringNode, InputNode, PrintNode, PlusNode, MinusNode, MulNode, DivNode, ModNode, EqualNode, LessThanNode, GreaterThanNode, NotEqualNode, CallNode, RandNode
+from languageMemo import stableFunctions
+from values import IntValue, FloatValue, StringValue, FunctionValue, SPECIALIZED_ARITHMETIC, SPECIALIZED_COMPARISONS
+
+# Every type a value can have at some point, None included
+Types = FrozenSet[type]
+
+NONE = type(None)
+NOTHING: Types = frozenset()
+ONLY_NONE: Types = frozenset({NONE})
+INT: Types = frozenset({IntValue})
+FLOAT: Types = frozenset({FloatValue})
+STRING: Types = frozenset({StringValue})
+FUNCTION: Types = frozenset({FunctionValue})
+INPUT: Types = frozenset({IntValue, FloatValue, StringValue})
+ANY: Types = frozenset({IntValue, FloatValue, StringValue, FunctionValue, NONE})
+
+# Method of values.py each operation calls; the operand types it is defined for are the keys of SPECIALIZED_ARITHMETIC
+ARITHMETIC = {PlusNode: "add", MinusNode: "sub", MulNode: "mul", DivNode: "div", ModNode: "mod"}
+COMPARISONS = {EqualNode: "eq", LessThanNode: "lt", GreaterThanNode: "gt", NotEqualNode: "ne"}
+
+# Two values of one of these types compare the same way their Python values do
+COMPARABLE = (IntValue, FloatValue, StringValue)
+
+class TypeAnalyzer:
+    def __init__(self, ast: ProgramNode, lexical: bool = False, exported: bool = False):
+        self.ast: ProgramNode = ast
+        self.lexical: bool = lexical
+        # Exported functions can be called from Python with arguments of any type
+        self.exported: bool = exported
+        self.definitions: Dict[str, AssignNode] = {}
+        self.stable: Set[str] = set()
+        # Functions whose every call can be seen in the program, so their parameters only get what those calls pass
+        self.known: Set[str] = set()
+        # Types of the globals, which with dynamic scoping are all the names there are
+        self.names: Dict[str, Types] = {}
+        # Types of the locals of every function, with lexical scoping
+        self.slots: Dict[AssignNode, List[Types]] = {}
+        self.returns: Dict[str, Types] = {}
+        self.types: Dict[Node, Types] = {}
+        self.results: Dict[Tuple[str, Types, Types], Types] = {}
+        # Top-level nodes that still have to be gone over, and the ones that read each name and each return type
+        self.pending: Deque[Node] = deque()
+        self.queued: Set[Node] = set()
+        self.nameReaders: Dict[str, Set[Node]] = {}
+        self.returnReaders: Dict[str, Set[Node]] = {}
+        self.current: Optional[Node] = None
+        self.function: Optional[AssignNode] = None
+        # Node type -> unbound visit method, which unlike a bound one does not keep the analyzer alive in a cycle
+        self.methods: Dict[type, Callable[[TypeAnalyzer, Node], Types]] = {}
+    
+    def analyze(self) -> Dict[Node, Types]:
+        functions = [node for node in self.ast.nodes if isinstance(node, AssignNode)]
+        for node in functions:
+            self.definitions[node.funcName] = node
+        self.stable = stableFunctions(self.ast, self.lexical)
+        if not self.exported:
+            self.known = set(self.stable)
+        for node in functions:
+            if self.lexical:
+                self.slots[node] = [NOTHING] * node.numSlots
+            if node.funcName not in self.known:
+                self.widenParams(node, ANY)
+            self.widenName(node.funcName, FUNCTION)
+        # Types only ever grow, so going over whatever read a type that grew until nothing is left ends
+        self.wake(self.ast.nodes)
+        while self.pending:
+            node = self.current = self.pending.popleft()
+            self.queued.discard(node)
+            self.visit(node)
+        return self.types
+    
+    def wake(self, nodes: Iterable[Node]):
+        for node in nodes:
+            if node not in self.queued:
+                self.queued.add(node)
+                self.pending.append(node)
+    
+    def widenName(self, varName: str, types: Types):
+        old = self.names.get(varName, NOTHING)
+        if not types <= old:
+            self.names[varName] = old | types
+            self.wake(self.nameReaders.get(varName, ()))
+    
+    def widenSlot(self, function: AssignNode, slot: int, types: Types):
+        # Only the function itself reads its slots
+        old = self.slots[function][slot]
+        if not types <= old:
+            self.slots[function][slot] = old | types
+            self.wake((function,))
+    
+    def widenParams(self, function: AssignNode, types: Types):
+        for i, param in enumerate(function.params):
+            if self.lexical:
+                self.widenSlot(function, i, types)
+            else:
+                self.widenName(param, types)
+    
+    def widenReturn(self, funcName: str, types: Types):
+        old = self.returns.get(funcName, NOTHING)
+        if not types <= old:
+            self.returns[funcName] = old | types
+            self.wake(self.returnReaders.get(funcName, ()))
+    
+    def visit(self, node: Node) -> Types:
+        method = self.methods.get(type(node))
+        if method is None:
+            method = self.methods[type(node)] = getattr(type(self), f"visit{type(node).__name__}")
+        types = self.types[node] = method(self, node)
+        return types
+    
+    def visitAssignNode(self, node: AssignNode) -> Types:
+        outerFunction = self.function
+        self.function = node
+        try:
+            results = [self.visit(expr) for expr in node.exprNodes]
+        finally:
+            self.function = outerFunction
+        # A call returns its last result that is not None, so it is only None when every expression can be
+        res = NOTHING.union(*results) - ONLY_NONE
+        if all(NONE in types for types in results):
+            res |= ONLY_NONE
+        self.widenReturn(node.funcName, res)
+        return FUNCTION
+    
+    def visitVarAssignNode(self, node: VarAssignNode) -> Types:
+        types = self.visit(node.value)
+        # None is never stored
+        if node.slot is not None:
+            self.widenSlot(self.function, node.slot, types - ONLY_NONE)
+        else:
+            self.widenName(node.varName, types - ONLY_NONE)
+        return types
+    
+    def visitVarAccessNode(self, node: VarAccessNode) -> Types:
+        # A name that holds nothing is not defined, and reading it fails
+        if node.slot is not None:
+            return self.slots[self.function][node.slot] - ONLY_NONE
+        if node.varName in self.known:
+            # A function that is read as a value can be called under any other name, with anything
+            self.known.discard(node.varName)
+            self.widenParams(self.definitions[node.varName], ANY)
+        self.nameReaders.setdefault(node.varName, set()).add(self.current)
+        return self.names.get(node.varName, NOTHING) - ONLY_NONE
+    
+    def visitIntNode(self, node: IntNode) -> Types:
+        return INT
+    
+    def visitFloatNode(self, node: FloatNode) -> Types:
+        return FLOAT
+    
+    def visitStringNode(self, node: StringNode) -> Types:
+        return STRING
+    
+    def visitInputNode(self, node: InputNode) -> Types:
+        return INPUT
+    
+    def visitPrintNode(self, node: PrintNode) -> Types:
+        return self.visit(node.node)
+    
+    def visitRandNode(self, node: RandNode) -> Types:
+        self.visit(node.fromNode)
+        self.visit(node.toNode)
+        return INT
+    
+    def visitArithmetic(self, node: Node) -> Types:
+        left = self.visit(node.leftNode)
+        right = self.visit(node.rightNode)
+        key = (ARITHMETIC[type(node)], left, right)
+        res = self.results.get(key)
+        if res is None:
+            # Every operation gives a value of the type of its left operand, when it is defined for the two
+            res = self.results[key] = frozenset(leftType for leftType in left for rightType in right if (key[0], leftType, rightType) in SPECIALIZED_ARITHMETIC)
+        return res
+    
+    def visitPlusNode(self, node: PlusNode) -> Types:
+        return self.visitArithmetic(node)
+    
+    def visitMinusNode(self, node: MinusNode) -> Types:
+        return self.visitArithmetic(node)
+    
+    def visitMulNode(self, node: MulNode) -> Types:
+        return self.visitArithmetic(node)
+    
+    def visitDivNode(self, node: DivNode) -> Types:
+        return self.visitArithmetic(node)
+    
+    def visitModNode(self, node: ModNode) -> Types:
+        return self.visitArithmetic(node)
+    
+    def visitComparison(self, node: Node) -> Types:
+        self.visit(node.leftNode)
+        self.visit(node.rightNode)
+        # A branch evaluates to its last expression, and to None when it is not taken
+        res = NOTHING
+        for expr in node.exprNodes:
+            res = self.visit(expr)
+        return res | ONLY_NONE
+    
+    def visitEqualNode(self, node: EqualNode) -> Types:
+        return self.visitComparison(node)
+    
+    def visitLessThanNode(self, node: LessThanNode) -> Types:
+        return self.visitComparison(node)
+    
+    def visitGreaterThanNode(self, node: GreaterThanNode) -> Types:
+        return self.visitComparison(node)
+    
+    def visitNotEqualNode(self, node: NotEqualNode) -> Types:
+        return self.visitComparison(node)
+    
+    def visitCallNode(self, node: CallNode) -> Types:
+        params = [self.visit(param) for param in node.params]
+        if node.funcName not in self.stable:
+            return ANY
+        function = self.definitions[node.funcName]
+        if node.funcName in self.known:
+            for i in range(min(len(params), len(function.params))):
+                if self.lexical:
+                    self.widenSlot(function, i, params[i])
+                else:
+                    self.widenName(function.params[i], params[i])
+        self.returnReaders.setdefault(node.funcName, set()).add(self.current)
+        return self.returns.get(node.funcName, NOTHING)
+
+def checkTypes(ast: ProgramNode, lexical: bool = False, exported: bool = False) -> int:
+    types = TypeAnalyzer(ast, lexical, exported).analyze()
+    specialized = 0
+    for node in types:
+        if type(node) in ARITHMETIC:
+            left = types[node.leftNode]
+            right = types[node.rightNode]
+            # Operands the operation is not defined for are left to fail at runtime, if that code ever runs
+            if len(left) == 1 and len(right) == 1 and types[node]:
+                node.operation = SPECIALIZED_ARITHMETIC[(ARITHMETIC[type(node)], *left, *right)]
+                specialized += 1
+        elif type(node) in COMPARISONS:
+            left = types[node.leftNode]
+            right = types[node.rightNode]
+            if len(left) == 1 and left == right and next(iter(left)) in COMPARABLE:
+                node.operation = SPECIALIZED_COMPARISONS[COMPARISONS[type(node)]]
+                specialized += 1
+    return specialized
\ No newline at end of file
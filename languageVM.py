@@ -0,0 +1,317 @@
+from __future__ import annotations
+from typing import List, Tuple, Optional, Dict, Set, Any
+
+import random
+
+from languageCompiler import *
+from languageInterpreter import Context, Interpreter
+from languageMemo import MemoCache, memoKey
+from languageProfiler import Profiler
+from languageIO import OutputSink, StdoutSink, InputSource
+from values import Value, IntValue, FunctionValue
+from error import RTError
+
+# Cache and key a memoized call is recorded under, and the write log of the enclosing recording
+MemoRecord = Tuple[MemoCache, Tuple[Any, ...], Optional[Set[str]]]
+
+# Return address and locals of the caller, the result of the activation that a tail call replaced, and the memo record of the call
+Frame = Tuple[Code, int, Optional[Value], Optional[MemoRecord], Optional[List[Optional[Value]]]]
+
+# Arity -> code that calls the function below its arguments on the stack and returns the result
+CALL_STUBS: Dict[int, Code] = {}
+
+class VM:
+    def __init__(self, code: Code, context: Optional[Context] = None, memoSize: int = 1024, profiler: Optional[Profiler] = None, output: Optional[OutputSink] = None, input: Optional[InputSource] = None):
+        self.code: Code = code
+        self.memoSize: int = memoSize
+        self.profiler: Optional[Profiler] = profiler
+        self.memoCaches: Dict[str, MemoCache] = {}
+        self.context: Context = context if context is not None else Context()
+        self.stack: List[Optional[Value]] = []
+        self.frames: List[Frame] = []
+        self.pc: int = 0
+        self.fastLocals: Optional[List[Optional[Value]]] = None
+        self.writeLog: Optional[Set[str]] = None
+        # Calls the VM makes before it pauses, None runs the program to the end in one go
+        self.sliceSize: Optional[int] = None
+        # Whether # pauses the VM instead of reading, so the input can be read asynchronously and pushed on the stack
+        self.pauseOnInput: bool = False
+        self.paused: bool = False
+        self.waitingFor: Optional[InputNode] = None
+        self.output: OutputSink = output if output is not None else StdoutSink("line")
+        self.interpreter: Interpreter = Interpreter(output=self.output, input=input)
+    
+    def callFunction(self, func: FunctionValue, params: List[Value]) -> Optional[Value]:
+        # A host call runs as a two instruction program, so the callee gets the same frames, memo and profiling as any other call
+        stub = CALL_STUBS.get(len(params))
+        if stub is None:
+            stub = CALL_STUBS[len(params)] = Code("<call>", [])
+            stub.emit(OP_CALL, len(params))
+            stub.emit(OP_RETURN)
+        self.code = stub
+        self.stack[:] = [func, *params]
+        self.frames.clear()
+        self.pc = 0
+        self.fastLocals = None
+        self.writeLog = None
+        return self.run()
+    
+    def pause(self, code: Code, pc: int, fastLocals: Optional[List[Optional[Value]]], writeLog: Optional[Set[str]]):
+        # Everything else the loop uses already lives on the VM, so this is all run needs to carry on
+        self.code = code
+        self.pc = pc
+        self.fastLocals = fastLocals
+        self.writeLog = writeLog
+        self.paused = True
+    
+    def run(self) -> Optional[Value]:
+        context = self.context
+        symbolTable = context.symbolTable
+        stack = self.stack
+        frames = self.frames
+        code = self.code
+        instructions = code.instructions
+        pc = self.pc
+        fastLocals = self.fastLocals
+        writeLog = self.writeLog
+        profiler = self.profiler
+        write = self.output.write
+        # Without a slice size the count starts below zero and never gets back to it
+        budget = self.sliceSize or 0
+        self.paused = False
+        # The opcodes are tested in order of how often they run, and the common ones are compared against locals instead of module globals
+        LOAD_FAST = OP_LOAD_FAST
+        LOAD_NAME = OP_LOAD_NAME
+        MERGE = OP_MERGE
+        LOAD_CONST = OP_LOAD_CONST
+        STORE_FAST = OP_STORE_FAST
+        STORE_NAME = OP_STORE_NAME
+        APPLY = OP_APPLY
+        LOAD_FUNC = OP_LOAD_FUNC
+        JUMP_UNLESS = OP_JUMP_UNLESS
+        CALL = OP_CALL
+        RETURN = OP_RETURN
+        TAIL_CALL = OP_TAIL_CALL
+        JUMP = OP_JUMP
+        PRINT = OP_PRINT
+        
+        while True:
+            op, arg = instructions[pc]
+            pc += 1
+            if op == LOAD_FAST:
+                value = fastLocals[arg]
+                if value is None:
+                    node = code.nodes[pc - 1]
+                    raise RTError(node.startPos, node.endPos, f"Name '{node.varName}' is not defined")
+                stack.append(value)
+            elif op == LOAD_NAME:
+                value = symbolTable.get(arg)
+                if value is None:
+                    node = code.nodes[pc - 1]
+                    raise RTError(node.startPos, node.endPos, f"Name '{arg}' is not defined")
+                stack.append(value)
+            elif op == MERGE:
+                value = stack.pop()
+                if value is not None:
+                    stack[-1] = value
+            elif op == LOAD_CONST:
+                stack.append(arg)
+            elif op == STORE_FAST:
+                value = stack[-1]
+                if value is not None:
+                    fastLocals[arg] = value
+            elif op == STORE_NAME:
+                value = stack[-1]
+                if value is not None:
+                    symbolTable[arg] = value
+                    if writeLog is not None:
+                        writeLog.add(arg)
+            elif op == APPLY:
+                right = stack.pop()
+                stack[-1] = arg(stack[-1], right)
+            elif op == LOAD_FUNC:
+                func = symbolTable.get(arg)
+                if func is None:
+                    node = code.nodes[pc - 1]
+                    raise RTError(node.startPos, node.endPos, f"Function {arg} is not defined")
+                stack.append(func)
+            elif op == JUMP_UNLESS:
+                right = stack.pop()
+                if not arg[0](stack.pop(), right):
+                    pc = arg[1]
+            elif op == CALL:
+                if arg:
+                    params = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    params = []
+                func = stack.pop()
+                if isinstance(func, FunctionValue) and func.code is not None:
+                    memo = None
+                    if func.memo is not None:
+                        key = memoKey(params)
+                        if key is not None:
+                            entry = func.memo.get(key)
+                            if entry is not None:
+                                res, writes = entry
+                                symbolTable.update(writes)
+                                if writeLog is not None:
+                                    writeLog.update(writes)
+                                stack.append(res)
+                                if profiler is not None:
+                                    profiler.enter(func.name)
+                                    profiler.leave()
+                                continue
+                            memo = (func.memo, key, writeLog)
+                            writeLog = set()
+                    if profiler is not None:
+                        profiler.enter(func.name)
+                    frames.append((code, pc, None, memo, fastLocals))
+                    code = func.code
+                    paramNames = func.paramNames
+                    if code.numSlots is None:
+                        fastLocals = None
+                        for i in range(len(paramNames)):
+                            symbolTable[paramNames[i]] = params[i]
+                        if writeLog is not None:
+                            writeLog.update(paramNames)
+                    else:
+                        fastLocals = [None] * code.numSlots
+                        for i in range(len(paramNames)):
+                            fastLocals[i] = params[i]
+                    instructions = code.instructions
+                    pc = 0
+                    budget -= 1
+                    if budget == 0:
+                        self.pause(code, pc, fastLocals, writeLog)
+                        return None
+                else:
+                    stack.append(func.call(params, context, self.interpreter))
+            elif op == RETURN:
+                if not frames:
+                    return stack.pop()
+                code, pc, fallback, memo, fastLocals = frames.pop()
+                if profiler is not None:
+                    profiler.leave()
+                instructions = code.instructions
+                if stack[-1] is None:
+                    stack[-1] = fallback
+                if memo is not None:
+                    cache, key, parentLog = memo
+                    cache.put(key, (stack[-1], {varName: symbolTable.get(varName) for varName in writeLog}))
+                    if parentLog is not None:
+                        parentLog |= writeLog
+                    writeLog = parentLog
+            elif op == TAIL_CALL:
+                if arg:
+                    params = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    params = []
+                func = stack.pop()
+                if isinstance(func, FunctionValue) and func.code is not None:
+                    res = stack.pop()
+                    if res is not None:
+                        returnCode, returnPc, _, memo, returnLocals = frames[-1]
+                        frames[-1] = (returnCode, returnPc, res, memo, returnLocals)
+                    if profiler is not None:
+                        profiler.switch(func.name)
+                    code = func.code
+                    paramNames = func.paramNames
+                    if code.numSlots is None:
+                        fastLocals = None
+                        for i in range(len(paramNames)):
+                            symbolTable[paramNames[i]] = params[i]
+                        if writeLog is not None:
+                            writeLog.update(paramNames)
+                    else:
+                        fastLocals = [None] * code.numSlots
+                        for i in range(len(paramNames)):
+                            fastLocals[i] = params[i]
+                    instructions = code.instructions
+                    pc = 0
+                    budget -= 1
+                    if budget == 0:
+                        self.pause(code, pc, fastLocals, writeLog)
+                        return None
+                else:
+                    stack.append(func.call(params, context, self.interpreter))
+            elif op == JUMP:
+                pc = arg
+            elif op == PRINT:
+                write(str(stack[-1]) + "\n")
+            elif op == OP_POP:
+                stack.pop()
+            elif op == OP_ADD:
+                right = stack.pop()
+                left = stack.pop()
+                assert(left is not None and right is not None)
+                stack.append(left.add(right))
+            elif op == OP_SUB:
+                right = stack.pop()
+                left = stack.pop()
+                assert(left is not None and right is not None)
+                stack.append(left.sub(right))
+            elif op == OP_MUL:
+                right = stack.pop()
+                left = stack.pop()
+                assert(left is not None and right is not None)
+                stack.append(left.mul(right))
+            elif op == OP_DIV:
+                right = stack.pop()
+                left = stack.pop()
+                assert(left is not None and right is not None)
+                stack.append(left.div(right))
+            elif op == OP_MOD:
+                right = stack.pop()
+                left = stack.pop()
+                assert(left is not None and right is not None)
+                stack.append(left.mod(right))
+            elif op == OP_JUMP_IF_NOT_LT:
+                right = stack.pop()
+                left = stack.pop()
+                assert(left is not None and right is not None)
+                if not left.lt(right):
+                    pc = arg
+            elif op == OP_JUMP_IF_NOT_GT:
+                right = stack.pop()
+                left = stack.pop()
+                assert(left is not None and right is not None)
+                if not left.gt(right):
+                    pc = arg
+            elif op == OP_JUMP_IF_NOT_EQ:
+                right = stack.pop()
+                left = stack.pop()
+                assert(left is not None and right is not None)
+                if not left.eq(right):
+                    pc = arg
+            elif op == OP_JUMP_IF_NOT_NE:
+                right = stack.pop()
+                left = stack.pop()
+                assert(left is not None and right is not None)
+                if not left.ne(right):
+                    pc = arg
+            elif op == OP_INPUT:
+                if self.pauseOnInput:
+                    self.waitingFor = code.nodes[pc - 1]
+                    self.pause(code, pc, fastLocals, writeLog)
+                    return None
+                stack.append(self.interpreter.visitInputNode(code.nodes[pc - 1], context))
+            elif op == OP_RAND:
+                toVal = stack.pop()
+                fromVal = stack.pop()
+                node = code.nodes[pc - 1]
+                assert(isinstance(fromVal.value, int) and isinstance(toVal.value, int))
+                stack.append(IntValue(random.randint(fromVal.value, toVal.value), node.startPos, node.endPos))
+            elif op == OP_MAKE_FUNCTION:
+                node = code.nodes[pc - 1]
+                func = FunctionValue(node.exprNodes, node.params, node.startPos, node.endPos)
+                func.name = node.funcName
+                func.code = arg
+                if node.isPure and self.memoSize > 0:
+                    func.memo = MemoCache(self.memoSize)
+                    self.memoCaches[node.funcName] = func.memo
+                symbolTable[node.funcName] = func
+                stack.append(func)
+            else:
+                raise Exception(f"Unknown opcode {op}")
\ No newline at end of file
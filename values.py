@@ -1,30 +1,38 @@
 from __future__ import annotations
-from typing import Optional, Union, Tuple, List
+from typing import Any, Callable, Optional, Union, List, Dict, Tuple, TYPE_CHECKING
 
-from error import Position, RTError, Error
-from languageParser import Node
+from error import Position, RTError
+from languageParser import Node, AssignNode
 import languageInterpreter as li
 
+if TYPE_CHECKING:
+    import languageCompiler as lc
+    import languageMemo as lm
+
 class Value:
+    # Every subclass adds the slot its value lives in
+    __slots__ = ("startPos", "endPos")
+    
     def __init__(self, value: Union[int,float, str, None, List[Node]] = None, startPos: Optional[Position] = None, endPos: Optional[Position] = None):
         self.value: Union[int, float, str, None, List[Node]] = value
         self.startPos: Optional[Position] = startPos
         self.endPos: Optional[Position] = endPos
     
-    def add(self, other: Value) -> Tuple[Optional[Value], Optional[Error]]:
-        return None, RTError(self.startPos, other.endPos, f"Addition not implemented for {self} and {other}")
+    # Subclasses hand operands of types they do not support back to these
+    def add(self, other: Value) -> Value:
+        raise RTError(self.startPos, other.endPos, f"Addition not implemented for {self} and {other}")
     
-    def sub(self, other: Value) -> Tuple[Optional[Value], Optional[Error]]:
-        return None, RTError(self.startPos, other.endPos, f"Subtraction not implemented for {self} and {other}")
+    def sub(self, other: Value) -> Value:
+        raise RTError(self.startPos, other.endPos, f"Subtraction not implemented for {self} and {other}")
     
-    def mul(self, other: Value) -> Tuple[Optional[Value], Optional[Error]]:
-        return None, RTError(self.startPos, other.endPos, f"Multiplication not implemented for {self} and {other}")
+    def mul(self, other: Value) -> Value:
+        raise RTError(self.startPos, other.endPos, f"Multiplication not implemented for {self} and {other}")
     
-    def div(self, other: Value) -> Tuple[Optional[Value], Optional[Error]]:
-        return None, RTError(self.startPos, other.endPos, f"Division not implemented for {self} and {other}")
+    def div(self, other: Value) -> Value:
+        raise RTError(self.startPos, other.endPos, f"Division not implemented for {self} and {other}")
     
-    def mod(self, other: Value) -> Tuple[Optional[Value], Optional[Error]]:
-        return None, RTError(self.startPos, other.endPos, f"Modulo not implemented for {self} and {other}")
+    def mod(self, other: Value) -> Value:
+        raise RTError(self.startPos, other.endPos, f"Modulo not implemented for {self} and {other}")
     
     def eq(self, other: Value) -> bool:
         return type(self).__name__ == type(other).__name__ and self.value == other.value
@@ -54,8 +62,8 @@ class Value:
     def ne(self, other: Value) -> bool:
         return type(self).__name__ != type(other).__name__ or self.value != other.value
     
-    def call(self, params: List[Value], context: li.Context) -> Tuple[Optional[Value], Optional[Error]]:
-        return None, RTError(self.startPos, self.endPos, f"Call not implemented for {self}")
+    def call(self, params: List[Value], context: li.Context, interpreter: li.Interpreter) -> Value:
+        raise RTError(self.startPos, self.endPos, f"Call not implemented for {self}")
     
     def __repr__(self) -> str:
         return repr(self.value)
@@ -64,88 +72,273 @@ class Value:
         return str(self.value)
 
 class IntValue(Value):
+    __slots__ = ("value",)
+    
     def __init__(self, value: int = 0, startPos: Optional[Position] = None, endPos: Optional[Position] = None):
         super().__init__(value, startPos, endPos)
     
-    def add(self, other: IntValue) -> Tuple[Optional[Value], Optional[Error]]:
-        assert(isinstance(self.value, int) and isinstance(other.value, int))
-        return IntValue(self.value + other.value), None
+    def add(self, other: IntValue) -> Value:
+        if type(other) is not IntValue:
+            return super().add(other)
+        return makeInt(self.value + other.value)
     
-    def sub(self, other: IntValue) -> Tuple[Optional[Value], Optional[Error]]:
-        assert(isinstance(self.value, int) and isinstance(other.value, int))
-        return IntValue(self.value - other.value), None
+    def sub(self, other: IntValue) -> Value:
+        if type(other) is not IntValue:
+            return super().sub(other)
+        return makeInt(self.value - other.value)
     
-    def mul(self, other: IntValue) -> Tuple[Optional[Value], Optional[Error]]:
-        assert(isinstance(self.value, int) and isinstance(other.value, int))
-        return IntValue(self.value * other.value), None
+    def mul(self, other: IntValue) -> Value:
+        if type(other) is not IntValue:
+            return super().mul(other)
+        return makeInt(self.value * other.value)
     
-    def div(self, other: IntValue) -> Tuple[Optional[Value], Optional[Error]]:
-        assert(isinstance(self.value, int) and isinstance(other.value, int))
+    def div(self, other: IntValue) -> Value:
+        if type(other) is not IntValue:
+            return super().div(other)
         if other.value == 0:
-            return None, RTError(self.startPos, other.endPos, "Division by zero")
-        return IntValue(self.value // other.value), None
+            raise RTError(self.startPos, other.endPos, "Division by zero")
+        return makeInt(self.value // other.value)
     
-    def mod(self, other: IntValue) -> Tuple[Optional[Value], Optional[Error]]:
-        assert(isinstance(self.value, int) and isinstance(other.value, int))
+    def mod(self, other: IntValue) -> Value:
+        if type(other) is not IntValue:
+            return super().mod(other)
         if other.value == 0:
-            return None, RTError(self.startPos, other.endPos, "Modulo by zero")
-        return IntValue(self.value % other.value), None
+            raise RTError(self.startPos, other.endPos, "Modulo by zero")
+        return makeInt(self.value % other.value)
 
 class FloatValue(Value):
+    __slots__ = ("value",)
+    
     def __init__(self, value: float = 0.0, startPos: Optional[Position] = None, endPos: Optional[Position] = None):
         super().__init__(value, startPos, endPos)
     
-    def add(self, other: FloatValue) -> Tuple[Optional[Value], Optional[Error]]:
-        assert(isinstance(self.value, float) and isinstance(other.value, float))
-        return FloatValue(self.value + other.value), None
+    def add(self, other: FloatValue) -> Value:
+        if type(other) is not FloatValue:
+            return super().add(other)
+        return FloatValue(self.value + other.value)
     
-    def sub(self, other: FloatValue) -> Tuple[Optional[Value], Optional[Error]]:
-        assert(isinstance(self.value, float) and isinstance(other.value, float))
-        return FloatValue(self.value - other.value), None
+    def sub(self, other: FloatValue) -> Value:
+        if type(other) is not FloatValue:
+            return super().sub(other)
+        return FloatValue(self.value - other.value)
     
-    def mul(self, other: FloatValue) -> Tuple[Optional[Value], Optional[Error]]:
-        assert(isinstance(self.value, float) and isinstance(other.value, float))
-        return FloatValue(self.value * other.value), None
+    def mul(self, other: FloatValue) -> Value:
+        if type(other) is not FloatValue:
+            return super().mul(other)
+        return FloatValue(self.value * other.value)
     
-    def div(self, other: FloatValue) -> Tuple[Optional[Value], Optional[Error]]:
-        assert(isinstance(self.value, float) and isinstance(other.value, float))
+    def div(self, other: FloatValue) -> Value:
+        if type(other) is not FloatValue:
+            return super().div(other)
         if other.value == 0.0:
-            return None, RTError(self.startPos, other.endPos, "Division by zero")
-        return FloatValue(self.value / other.value), None
+            raise RTError(self.startPos, other.endPos, "Division by zero")
+        return FloatValue(self.value / other.value)
     
-    def mod(self, other: FloatValue) -> Tuple[Optional[Value], Optional[Error]]:
-        assert(isinstance(self.value, float) and isinstance(other.value, float))
+    def mod(self, other: FloatValue) -> Value:
+        if type(other) is not FloatValue:
+            return super().mod(other)
         if other.value == 0.0:
-            return None, RTError(self.startPos, other.endPos, "Modulo by zero")
-        return FloatValue(self.value % other.value), None
+            raise RTError(self.startPos, other.endPos, "Modulo by zero")
+        return FloatValue(self.value % other.value)
+
+class Rope:
+    __slots__ = ("chunks", "count", "length")
+    
+    def __init__(self, chunks: List[str], count: int, length: int):
+        # Ropes built from one another share their chunk list, each one only owns its first count chunks
+        self.chunks: List[str] = chunks
+        self.count: int = count
+        self.length: int = length
+    
+    def extend(self, texts: List[str], length: int) -> Rope:
+        chunks = self.chunks
+        if len(chunks) != self.count:
+            # Another rope already appended to the shared list, so this one continues on a copy of its own chunks
+            chunks = chunks[:self.count]
+        chunks.extend(texts)
+        return Rope(chunks, self.count + len(texts), self.length + length)
+    
+    def flatten(self) -> str:
+        if len(self.chunks) == self.count:
+            return "".join(self.chunks)
+        return "".join(self.chunks[:self.count])
+
+# Shorter results are plain strings, concatenating them costs less than keeping a rope for them
+MIN_ROPE_LENGTH = 4096
 
 class StringValue(Value):
-    def __init__(self, value: str = "", startPos: Optional[Position] = None, endPos: Optional[Position] = None):
-        super().__init__(value, startPos, endPos)
+    # The text, or the rope it is still made of until something reads it
+    __slots__ = ("text",)
     
-    def add(self, other: StringValue) -> Tuple[Optional[Value], Optional[Error]]:
-        assert(isinstance(self.value, str) and isinstance(other.value, str))
-        return StringValue(self.value + other.value), None
+    @property
+    def value(self) -> str:
+        # Printing, comparing and memo keys all read the text through here, which is the only place a rope is flattened
+        text = self.text
+        if type(text) is Rope:
+            text = self.text = text.flatten()
+        return text
     
-    def mul(self, other: IntValue) -> Tuple[Optional[Value], Optional[Error]]:
-        assert(isinstance(self.value, str) and isinstance(other.value, int))
-        return StringValue(self.value * other.value), None
+    @value.setter
+    def value(self, value: Union[str, Rope]):
+        self.text = value
+    
+    def length(self) -> int:
+        text = self.text
+        return text.length if type(text) is Rope else len(text)
+    
+    def add(self, other: StringValue) -> Value:
+        if type(other) is not StringValue:
+            return super().add(other)
+        left = self.text
+        right = other.text
+        if type(right) is str:
+            if type(left) is Rope:
+                chunks = left.chunks
+                # Appending to the newest rope built on this chunk list is the common case, and it copies nothing
+                if len(chunks) == left.count:
+                    chunks.append(right)
+                    return StringValue(Rope(chunks, left.count + 1, left.length + len(right)))
+                return StringValue(left.extend([right], len(right)))
+            if type(left) is str:
+                if len(left) + len(right) < MIN_ROPE_LENGTH:
+                    return makeString(left + right)
+                return StringValue(Rope([left, right], 2, len(left) + len(right)))
+        texts = right.chunks[:right.count] if type(right) is Rope else [right]
+        length = right.length if type(right) is Rope else len(right)
+        if type(left) is Rope:
+            return StringValue(left.extend(texts, length))
+        return StringValue(Rope([left], 1, len(left)).extend(texts, length))
+    
+    def mul(self, other: IntValue) -> Value:
+        if type(other) is not IntValue:
+            return super().mul(other)
+        return makeString(self.value * other.value)
+    
+    def eq(self, other: Value) -> bool:
+        # Strings of different lengths differ, and telling that needs no flattening
+        if type(other) is StringValue and self.length() != other.length():
+            return False
+        return super().eq(other)
+    
+    def ne(self, other: Value) -> bool:
+        if type(other) is StringValue and self.length() != other.length():
+            return True
+        return super().ne(other)
+
+# Arithmetic results carry no position, so the common ones can be shared
+SMALL_INTS: List[IntValue] = [IntValue(i) for i in range(-5, 257)]
+MAX_INTERNED_STRING = 16
+MAX_INTERNED_STRINGS = 4096
+INTERNED_STRINGS: Dict[str, StringValue] = {}
+
+def makeInt(value: int) -> IntValue:
+    if -5 <= value <= 256:
+        return SMALL_INTS[value + 5]
+    return IntValue(value)
+
+def makeString(value: str) -> StringValue:
+    if len(value) > MAX_INTERNED_STRING:
+        return StringValue(value)
+    res = INTERNED_STRINGS.get(value)
+    if res is None:
+        res = StringValue(value)
+        if len(INTERNED_STRINGS) < MAX_INTERNED_STRINGS:
+            INTERNED_STRINGS[value] = res
+    return res
 
 class FunctionValue(Value):
+    __slots__ = ("value", "paramNames", "name", "numSlots", "code", "native", "memo", "definition")
+    
     def __init__(self, value: List[Node], paramNames: List[str], startPos: Optional[Position] = None, endPos: Optional[Position] = None):
         super().__init__(value, startPos, endPos)
         self.paramNames: List[str] = paramNames
+        self.name: Optional[str] = None
+        self.numSlots: Optional[int] = None
+        self.code: Optional[lc.Code] = None
+        # Python function the transpiler generated for the body
+        self.native: Optional[Callable[..., Any]] = None
+        self.memo: Optional[lm.MemoCache] = None
+        # Definition whose body was skipped by a lazy parser and has not been parsed yet
+        self.definition: Optional[AssignNode] = None
     
-    def call(self, params: List[Value], context: li.Context) -> Tuple[Optional[Value], Optional[Error]]:
-        for i in range(len(self.paramNames)):
-            context.setVar(self.paramNames[i], params[i])
-        interpreter = li.Interpreter()
-        assert(isinstance(self.value, list) and len(self.value) > 0 and isinstance(self.value[0], Node))
-        res = None
-        for node in self.value:
-            result, err = interpreter.visit(node, context)
-            if err:
-                return None, err
-            if result is not None:
-                res = result
-        return res, None
\ No newline at end of file
+    def call(self, params: List[Value], context: li.Context, interpreter: li.Interpreter) -> Optional[Value]:
+        # The caller's interpreter, so the body prints to and reads from the sink and source of the run
+        return interpreter.callFunction(self, params, context)
+
+# Operations on operands whose types were proven before the program ran, so they go without the checks of the methods above
+def addInts(left: IntValue, right: IntValue) -> Value:
+    return makeInt(left.value + right.value)
+
+def subInts(left: IntValue, right: IntValue) -> Value:
+    return makeInt(left.value - right.value)
+
+def mulInts(left: IntValue, right: IntValue) -> Value:
+    return makeInt(left.value * right.value)
+
+def divInts(left: IntValue, right: IntValue) -> Value:
+    if right.value == 0:
+        raise RTError(left.startPos, right.endPos, "Division by zero")
+    return makeInt(left.value // right.value)
+
+def modInts(left: IntValue, right: IntValue) -> Value:
+    if right.value == 0:
+        raise RTError(left.startPos, right.endPos, "Modulo by zero")
+    return makeInt(left.value % right.value)
+
+def addFloats(left: FloatValue, right: FloatValue) -> Value:
+    return FloatValue(left.value + right.value)
+
+def subFloats(left: FloatValue, right: FloatValue) -> Value:
+    return FloatValue(left.value - right.value)
+
+def mulFloats(left: FloatValue, right: FloatValue) -> Value:
+    return FloatValue(left.value * right.value)
+
+def divFloats(left: FloatValue, right: FloatValue) -> Value:
+    if right.value == 0.0:
+        raise RTError(left.startPos, right.endPos, "Division by zero")
+    return FloatValue(left.value / right.value)
+
+def modFloats(left: FloatValue, right: FloatValue) -> Value:
+    if right.value == 0.0:
+        raise RTError(left.startPos, right.endPos, "Modulo by zero")
+    return FloatValue(left.value % right.value)
+
+def repeatString(left: StringValue, right: IntValue) -> Value:
+    return makeString(left.value * right.value)
+
+# Both operands have the same type, which is all eq and ne compare besides the values
+def equalValues(left: Value, right: Value) -> bool:
+    return left.value == right.value
+
+def lessValues(left: Value, right: Value) -> bool:
+    return left.value < right.value
+
+def greaterValues(left: Value, right: Value) -> bool:
+    return left.value > right.value
+
+def differentValues(left: Value, right: Value) -> bool:
+    return left.value != right.value
+
+# Method name and operand types -> operation that skips the checks
+SPECIALIZED_ARITHMETIC: Dict[Tuple[str, type, type], Callable[[Value, Value], Value]] = {
+    ("add", IntValue, IntValue): addInts,
+    ("sub", IntValue, IntValue): subInts,
+    ("mul", IntValue, IntValue): mulInts,
+    ("div", IntValue, IntValue): divInts,
+    ("mod", IntValue, IntValue): modInts,
+    ("add", FloatValue, FloatValue): addFloats,
+    ("sub", FloatValue, FloatValue): subFloats,
+    ("mul", FloatValue, FloatValue): mulFloats,
+    ("div", FloatValue, FloatValue): divFloats,
+    ("mod", FloatValue, FloatValue): modFloats,
+    # Concatenation already works on the text and ropes without checking them first
+    ("add", StringValue, StringValue): StringValue.add,
+    ("mul", StringValue, IntValue): repeatString,
+}
+SPECIALIZED_COMPARISONS: Dict[str, Callable[[Value, Value], bool]] = {
+    "eq": equalValues,
+    "lt": lessValues,
+    "gt": greaterValues,
+    "ne": differentValues,
+}
\ No newline at end of file